@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import random
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, replace
+from typing import Protocol
+
+from .creature import Creature
+from .evolution import evolve_predator_and_prey
+from .sim_types import SimulationResult
+from .simulation import chase, fight
+from .strategies.movement import GreedyMovementStrategy
+from .types import MOVEMENT_STATS, ClawSize
+
+Case = tuple[Creature, Creature]
+
+
+class SimulationEngine(Protocol):
+    def run(
+        self, predator: Creature, prey: Creature, *, verbose: bool = False
+    ) -> SimulationResult: ...
+
+
+class ReferenceEngine:
+    def __init__(self) -> None:
+        self._strategy = GreedyMovementStrategy()
+
+    def run(
+        self, predator: Creature, prey: Creature, *, verbose: bool = False
+    ) -> SimulationResult:
+        chase_result = chase(predator, prey, self._strategy, verbose=verbose)
+        if not chase_result.caught:
+            return chase_result
+        fight_result = fight(predator, prey, verbose=verbose)
+        logs = [*chase_result.logs, *fight_result.logs]
+        return SimulationResult(
+            caught=fight_result.caught,
+            predator_won=fight_result.predator_won,
+            logs=logs,
+        )
+
+
+@dataclass(frozen=True)
+class Outcome:
+    result: SimulationResult
+    predator: Creature
+    prey: Creature
+
+
+@dataclass(frozen=True)
+class Divergence:
+    index: int
+    predator: Creature
+    prey: Creature
+    expected: Outcome
+    actual: Outcome
+
+
+@dataclass
+class EquivalenceReport:
+    cases_run: int
+    reference_seconds: float
+    candidate_seconds: float
+    divergence: Divergence | None
+
+    @property
+    def equivalent(self) -> bool:
+        return self.divergence is None
+
+    @property
+    def throughput_ratio(self) -> float:
+        if self.candidate_seconds <= 0:
+            return float("inf")
+        return self.reference_seconds / self.candidate_seconds
+
+
+def seeded_cases(seed: int, count: int) -> Iterator[Case]:
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield evolve_predator_and_prey(rng)
+
+
+def boundary_staminas() -> list[int]:
+    values = {0, 1}
+    for stats in MOVEMENT_STATS.values():
+        for pivot in (stats.required_stamina, stats.stamina_cost):
+            values.update({pivot - 1, pivot, pivot + 1})
+    return sorted(v for v in values if v >= 0)
+
+
+def make_creature(
+    position: int, legs: int, wings: int, stamina: int, health: int = 10
+) -> Creature:
+    return Creature(
+        legs_count=legs,
+        wings_count=wings,
+        claws=ClawSize.SMALL,
+        teeth_sharpness=3,
+        base_power=5,
+        position=position,
+        stamina=stamina,
+        health=health,
+    )
+
+
+def edge_cases() -> Iterator[Case]:
+    for stamina in boundary_staminas():
+        for legs in (0, 1, 2):
+            for wings in (0, 1, 2):
+                for prey_position in (0, 1, 12):
+                    yield (
+                        make_creature(0, legs, wings, stamina),
+                        make_creature(prey_position, 2, 0, 50),
+                    )
+                yield (
+                    make_creature(0, 2, 2, 100),
+                    make_creature(12, legs, wings, stamina),
+                )
+    for predator_health, prey_health in ((0, 10), (10, 0), (0, 0), (1, 1)):
+        yield (
+            make_creature(0, 2, 0, 60, health=predator_health),
+            make_creature(0, 2, 0, 60, health=prey_health),
+        )
+
+
+def _run_timed(
+    engine: SimulationEngine, case: Case, verbose: bool
+) -> tuple[Outcome, float]:
+    predator, prey = replace(case[0]), replace(case[1])
+    start = time.perf_counter()
+    result = engine.run(predator, prey, verbose=verbose)
+    elapsed = time.perf_counter() - start
+    return Outcome(result=result, predator=predator, prey=prey), elapsed
+
+
+def compare_engines(
+    candidate: SimulationEngine,
+    cases: Iterable[Case],
+    reference: SimulationEngine | None = None,
+    *,
+    verbose: bool = False,
+) -> EquivalenceReport:
+    reference = reference or ReferenceEngine()
+    report = EquivalenceReport(
+        cases_run=0, reference_seconds=0.0, candidate_seconds=0.0, divergence=None
+    )
+    for index, case in enumerate(cases):
+        expected, reference_time = _run_timed(reference, case, verbose)
+        actual, candidate_time = _run_timed(candidate, case, verbose)
+        report.cases_run += 1
+        report.reference_seconds += reference_time
+        report.candidate_seconds += candidate_time
+        if expected != actual:
+            report.divergence = Divergence(
+                index=index,
+                predator=case[0],
+                prey=case[1],
+                expected=expected,
+                actual=actual,
+            )
+            break
+    return report
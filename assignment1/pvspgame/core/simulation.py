@@ -7,6 +7,7 @@ from .sim_types import SimulationResult
 from .strategies.chase import chase
 from .strategies.fight import fight
 from .strategies.movement import GreedyMovementStrategy, MovementStrategy
+from .visualization import LiveRenderer
 
 logger = logging.getLogger(__name__)
 __all__ = ["run_single_simulation", "run_many_simulations", "chase", "fight"]
@@ -18,12 +19,20 @@ def run_single_simulation(
     *,
     verbose: bool = False,
     visualize: bool = False,
+    renderer: LiveRenderer | None = None,
 ) -> SimulationResult:
     from .evolution import evolve_predator_and_prey
 
     strategy = movement_strategy or GreedyMovementStrategy()
     predator, prey = evolve_predator_and_prey(rng)
-    chase_result = chase(predator, prey, strategy, verbose=verbose, visualize=visualize)
+    chase_result = chase(
+        predator,
+        prey,
+        strategy,
+        verbose=verbose,
+        visualize=visualize,
+        renderer=renderer,
+    )
     if not chase_result.caught:
         for m in chase_result.logs:
             logger.info(m)
@@ -40,10 +49,13 @@ def run_many_simulations(
     *,
     verbose: bool = False,
     visualize: bool = False,
+    renderer: LiveRenderer | None = None,
 ) -> list[SimulationResult]:
     rng = random.Random(seed)
     results: list[SimulationResult] = []
     for _ in range(count):
-        result = run_single_simulation(rng, verbose=verbose, visualize=visualize)
+        result = run_single_simulation(
+            rng, verbose=verbose, visualize=visualize, renderer=renderer
+        )
         results.append(result)
     return results
@@ -3,7 +3,7 @@ from __future__ import annotations
 from ..creature import Creature, apply_movement
 from ..sim_types import SimulationResult
 from ..types import MovementKind
-from ..visualization import describe_creature, render_world
+from ..visualization import LiveRenderer, describe_creature, render_world
 from .movement import MovementStrategy
 
 
@@ -14,6 +14,7 @@ def chase(
     *,
     verbose: bool = False,
     visualize: bool = False,
+    renderer: LiveRenderer | None = None,
 ) -> SimulationResult:
     logs: list[str] = []
     if visualize:
@@ -25,9 +26,13 @@ def chase(
         chosen = movement_strategy.choose(predator)
         if chosen is None:
             logs.append("Pray ran into infinity")
+            if renderer is not None:
+                renderer.finish()
             return SimulationResult(caught=False, predator_won=None, logs=logs)
         apply_movement(predator, chosen)
-        if visualize:
+        if renderer is not None:
+            renderer.draw(predator, prey)
+        elif visualize:
             logs.append(render_world(predator, prey))
         if predator.position >= prey.position:
             break
@@ -35,7 +40,9 @@ def chase(
         if prey_choice is None:
             prey_choice = MovementKind.CRAWL
         apply_movement(prey, prey_choice)
-        if visualize:
+        if renderer is not None:
+            renderer.draw(predator, prey)
+        elif visualize:
             logs.append(render_world(predator, prey))
         if verbose:
             pred_msg = (
@@ -48,4 +55,6 @@ def chase(
             logs.append(f"{pred_msg}; {prey_msg}")
         if predator.position >= prey.position:
             break
+    if renderer is not None:
+        renderer.finish()
     return SimulationResult(caught=True, predator_won=None, logs=logs)
@@ -1,26 +1,117 @@
 from __future__ import annotations
 
+import time
+from collections.abc import Callable
+from typing import TextIO
+
 from .creature import Creature
 
+Layout = tuple[int, int, int]
 
-def render_world(predator: Creature, prey: Creature, width: int = 50) -> str:
-    a = predator.position
-    b = prey.position
-    left = min(a, b)
-    right = max(a, b)
+
+def layout_world(predator_pos: int, prey_pos: int, width: int = 50) -> Layout:
+    left = min(predator_pos, prey_pos)
+    right = max(predator_pos, prey_pos)
     span = right - left
     if span <= 0:
-        return "X"
+        return 1, 0, 0
     if span >= width:
-        pa = 0 if a == left else width - 1
-        pb = 0 if b == left else width - 1
-    else:
-        pa = a - left
-        pb = b - left
-    line = ["." for _ in range(width if span >= width else span + 1)]
-    line[pa] = "A"
-    line[pb] = "B"
-    return "".join(line)
+        pa = 0 if predator_pos == left else width - 1
+        pb = 0 if prey_pos == left else width - 1
+        return width, pa, pb
+    return span + 1, predator_pos - left, prey_pos - left
+
+
+def cell_at(layout: Layout, index: int) -> str:
+    _, pa, pb = layout
+    if index == pa == pb:
+        return "X"
+    if index == pb:
+        return "B"
+    if index == pa:
+        return "A"
+    return "."
+
+
+def render_world(predator: Creature, prey: Creature, width: int = 50) -> str:
+    layout = layout_world(predator.position, prey.position, width)
+    return "".join(cell_at(layout, i) for i in range(layout[0]))
+
+
+class LiveRenderer:
+    def __init__(
+        self,
+        stream: TextIO,
+        width: int = 50,
+        max_fps: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._stream = stream
+        self._width = width
+        self._min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self._clock = clock
+        self._shown: Layout | None = None
+        self._pending: Layout | None = None
+        self._last_draw: float | None = None
+        self.frames_drawn = 0
+        self.frames_skipped = 0
+
+    def draw(self, predator: Creature, prey: Creature) -> None:
+        layout = layout_world(predator.position, prey.position, self._width)
+        now = self._clock()
+        if self._last_draw is not None and now - self._last_draw < self._min_interval:
+            self._pending = layout
+            self.frames_skipped += 1
+            return
+        self._paint(layout)
+        self._last_draw = now
+
+    def finish(self) -> None:
+        if self._pending is not None:
+            self._paint(self._pending)
+        if self._shown is not None:
+            self._stream.write("\n")
+            self._stream.flush()
+        self._shown = None
+        self._pending = None
+        self._last_draw = None
+
+    def _paint(self, layout: Layout) -> None:
+        self._pending = None
+        if layout == self._shown:
+            return
+        length = layout[0]
+        if self._shown is None:
+            line = "".join(cell_at(layout, i) for i in range(length))
+            self._stream.write(f"\r\x1b[K{line}")
+        else:
+            old_length, old_pa, old_pb = self._shown
+            changed = {old_pa, old_pb, layout[1], layout[2]}
+            changed.update(range(old_length, length))
+            changed = {
+                i
+                for i in changed
+                if i >= old_length or cell_at(self._shown, i) != cell_at(layout, i)
+            }
+            self._stream.write(_diff_commands(layout, sorted(changed)))
+            if length < old_length:
+                self._stream.write(f"\x1b[{length + 1}G\x1b[K")
+        self._stream.flush()
+        self._shown = layout
+        self.frames_drawn += 1
+
+
+def _diff_commands(layout: Layout, changed: list[int]) -> str:
+    parts: list[str] = []
+    previous = -2
+    for i in changed:
+        if i >= layout[0]:
+            break
+        if i != previous + 1:
+            parts.append(f"\x1b[{i + 1}G")
+        parts.append(cell_at(layout, i))
+        previous = i
+    return "".join(parts)
 
 
 def describe_creature(c: Creature) -> str:
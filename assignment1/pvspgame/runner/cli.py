@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import sys
+
 import typer
 
 from ..core.simulation import run_many_simulations
+from ..core.visualization import LiveRenderer
 from ..infra.logging_setup import configure_logging
 
 app = typer.Typer(add_completion=False)
@@ -17,9 +20,17 @@ def run(
         help="Render a simple ASCII visualization of positions.",
     ),
     verbose: bool = typer.Option(False, help="Print detailed per-step logs."),
+    fps: float = typer.Option(30.0, help="Frame rate cap for the visualization."),
 ) -> None:
     configure_logging()
-    run_many_simulations(count=count, seed=seed, visualize=visualize, verbose=verbose)
+    renderer = LiveRenderer(sys.stdout, max_fps=fps) if visualize else None
+    run_many_simulations(
+        count=count,
+        seed=seed,
+        visualize=visualize,
+        verbose=verbose,
+        renderer=renderer,
+    )
 
 
 def main() -> None:
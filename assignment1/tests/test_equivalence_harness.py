@@ -0,0 +1,46 @@
+import itertools
+
+from pvspgame.core.creature import Creature
+from pvspgame.core.equivalence import (
+    ReferenceEngine,
+    boundary_staminas,
+    compare_engines,
+    edge_cases,
+    seeded_cases,
+)
+from pvspgame.core.sim_types import SimulationResult
+
+
+class OffByOneFightEngine:
+    def __init__(self) -> None:
+        self._reference = ReferenceEngine()
+
+    def run(
+        self, predator: Creature, prey: Creature, *, verbose: bool = False
+    ) -> SimulationResult:
+        if predator.position == prey.position:
+            prey.health += 1
+        return self._reference.run(predator, prey, verbose=verbose)
+
+
+def test_boundary_staminas_cover_movement_tiers() -> None:
+    staminas = boundary_staminas()
+    assert 0 in staminas
+    for pivot in (20, 40, 60, 80):
+        assert {pivot - 1, pivot, pivot + 1} <= set(staminas)
+
+
+def test_reference_engine_is_equivalent_to_itself() -> None:
+    cases = itertools.chain(edge_cases(), seeded_cases(seed=7, count=200))
+    report = compare_engines(ReferenceEngine(), cases, verbose=True)
+    assert report.equivalent
+    assert report.cases_run > 200
+    assert report.throughput_ratio > 0
+
+
+def test_reports_first_divergent_case() -> None:
+    report = compare_engines(OffByOneFightEngine(), edge_cases())
+    assert report.divergence is not None
+    assert report.cases_run == report.divergence.index + 1
+    assert report.divergence.prey.position == 0
+    assert report.divergence.expected != report.divergence.actual
@@ -0,0 +1,87 @@
+import io
+
+from pvspgame.core.creature import Creature
+from pvspgame.core.strategies.chase import chase
+from pvspgame.core.strategies.movement import GreedyMovementStrategy
+from pvspgame.core.types import ClawSize
+from pvspgame.core.visualization import LiveRenderer, render_world
+
+
+def make_creature(position: int, legs: int, stamina: int) -> Creature:
+    return Creature(
+        legs_count=legs,
+        wings_count=0,
+        claws=ClawSize.NONE,
+        teeth_sharpness=0,
+        base_power=1,
+        position=position,
+        stamina=stamina,
+        health=10,
+    )
+
+
+def replay(output: str) -> list[str]:
+    lines: list[str] = []
+    line: list[str] = []
+    col = 0
+    i = 0
+    while i < len(output):
+        ch = output[i]
+        if ch == "\r":
+            col = 0
+        elif ch == "\n":
+            lines.append("".join(line))
+            line, col = [], 0
+        elif ch == "\x1b":
+            end = i + 2
+            while not output[end].isalpha():
+                end += 1
+            code, arg = output[end], output[i + 2 : end]
+            if code == "G":
+                col = int(arg) - 1
+            elif code == "K":
+                del line[col:]
+            i = end
+        else:
+            line.extend(" " * (col + 1 - len(line)))
+            line[col] = ch
+            col += 1
+        i += 1
+    return lines
+
+
+def test_renderer_final_line_matches_render_world() -> None:
+    predator = make_creature(0, legs=2, stamina=100)
+    prey = make_creature(20, legs=1, stamina=30)
+    stream = io.StringIO()
+    chase(
+        predator,
+        prey,
+        GreedyMovementStrategy(),
+        renderer=LiveRenderer(stream, max_fps=0),
+    )
+    assert replay(stream.getvalue()) == [render_world(predator, prey)]
+
+
+def test_renderer_only_rewrites_changed_cells() -> None:
+    stream = io.StringIO()
+    renderer = LiveRenderer(stream, max_fps=0)
+    renderer.draw(make_creature(0, 2, 0), make_creature(10, 2, 0))
+    stream.seek(0)
+    stream.truncate()
+    renderer.draw(make_creature(3, 2, 0), make_creature(10, 2, 0))
+    assert stream.getvalue() == "\x1b[8GB\x1b[9G\x1b[K"
+
+
+def test_renderer_skips_frames_above_frame_rate_cap() -> None:
+    now = [0.0]
+    stream = io.StringIO()
+    renderer = LiveRenderer(stream, max_fps=10, clock=lambda: now[0])
+    prey = make_creature(40, 2, 0)
+    for pos in range(10):
+        renderer.draw(make_creature(pos, 2, 0), prey)
+        now[0] += 0.01
+    renderer.finish()
+    assert renderer.frames_drawn == 2
+    assert renderer.frames_skipped == 9
+    assert replay(stream.getvalue()) == [render_world(make_creature(9, 2, 0), prey)]
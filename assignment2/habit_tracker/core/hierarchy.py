@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterable
+
+from .habits import HabitComponent
+
+
+class HierarchyCycleError(ValueError):
+    pass
+
+
+class ClosureIndex:
+    def __init__(self) -> None:
+        self._descendants: dict[uuid.UUID, dict[uuid.UUID, int]] = {}
+        self._ancestors: dict[uuid.UUID, dict[uuid.UUID, int]] = {}
+        self._parents: dict[uuid.UUID, dict[uuid.UUID, int]] = {}
+        self._children: dict[uuid.UUID, dict[uuid.UUID, int]] = {}
+
+    @classmethod
+    def from_components(cls, components: Iterable[HabitComponent]) -> ClosureIndex:
+        index = cls()
+        for component in components:
+            for child in component.get_children():
+                if not index.would_cycle(component.id, child.id):
+                    index.link(component.id, child.id)
+        return index
+
+    def is_ancestor(self, ancestor: uuid.UUID, descendant: uuid.UUID) -> bool:
+        return descendant in self._descendants.get(ancestor, {})
+
+    def parents(self, node: uuid.UUID) -> set[uuid.UUID]:
+        return set(self._parents.get(node, ()))
+
+    def ancestors(self, node: uuid.UUID) -> set[uuid.UUID]:
+        return set(self._ancestors.get(node, ()))
+
+    def descendants(self, node: uuid.UUID) -> set[uuid.UUID]:
+        return set(self._descendants.get(node, ()))
+
+    def would_cycle(self, parent: uuid.UUID, child: uuid.UUID) -> bool:
+        return parent == child or self.is_ancestor(child, parent)
+
+    def link(self, parent: uuid.UUID, child: uuid.UUID) -> None:
+        if self.would_cycle(parent, child):
+            raise HierarchyCycleError("Sub-habit would create a cycle")
+        self._apply(parent, child, 1)
+
+    def unlink(self, parent: uuid.UUID, child: uuid.UUID) -> None:
+        if child not in self._children.get(parent, {}):
+            return
+        self._apply(parent, child, -1)
+
+    def discard(self, node: uuid.UUID) -> None:
+        for parent, edges in list(self._parents.get(node, {}).items()):
+            for _ in range(edges):
+                self._apply(parent, node, -1)
+        for child, edges in list(self._children.get(node, {}).items()):
+            for _ in range(edges):
+                self._apply(node, child, -1)
+
+    def _apply(self, parent: uuid.UUID, child: uuid.UUID, sign: int) -> None:
+        _adjust(self._parents, child, parent, sign)
+        _adjust(self._children, parent, child, sign)
+        upper = [(parent, 1), *self._ancestors.get(parent, {}).items()]
+        lower = [(child, 1), *self._descendants.get(child, {}).items()]
+        for ancestor, up in upper:
+            for descendant, down in lower:
+                paths = sign * up * down
+                _adjust(self._descendants, ancestor, descendant, paths)
+                _adjust(self._ancestors, descendant, ancestor, paths)
+
+
+def _adjust(
+    table: dict[uuid.UUID, dict[uuid.UUID, int]],
+    key: uuid.UUID,
+    other: uuid.UUID,
+    delta: int,
+) -> None:
+    row = table.setdefault(key, {})
+    count = row.get(other, 0) + delta
+    if count > 0:
+        row[other] = count
+        return
+    row.pop(other, None)
+    if not row:
+        del table[key]
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import uuid
+from bisect import bisect_left, insort
+
+Entry = tuple[float, str, uuid.UUID]
+
+
+class Leaderboard:
+    def __init__(self) -> None:
+        self._entries: list[Entry] = []
+        self._scores: dict[uuid.UUID, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def update(self, habit_id: uuid.UUID, score: float) -> None:
+        previous = self._scores.get(habit_id)
+        if previous == score:
+            return
+        if previous is not None:
+            self._remove(habit_id, previous)
+        self._scores[habit_id] = score
+        insort(self._entries, (-score, str(habit_id), habit_id))
+
+    def discard(self, habit_id: uuid.UUID) -> None:
+        previous = self._scores.pop(habit_id, None)
+        if previous is not None:
+            self._remove(habit_id, previous)
+
+    def score(self, habit_id: uuid.UUID) -> float | None:
+        return self._scores.get(habit_id)
+
+    def top(self, limit: int) -> list[tuple[uuid.UUID, float]]:
+        return [(habit_id, -score) for score, _, habit_id in self._entries[:limit]]
+
+    def rank(self, habit_id: uuid.UUID) -> int | None:
+        score = self._scores.get(habit_id)
+        if score is None:
+            return None
+        return bisect_left(self._entries, (-score, str(habit_id))) + 1
+
+    def _remove(self, habit_id: uuid.UUID, score: float) -> None:
+        del self._entries[bisect_left(self._entries, (-score, str(habit_id)))]
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .habits import Habit, HabitComponent, HabitType
+
+NAME_KEY_END = "\U0010ffff"
+
+
+def name_key(name: str) -> str:
+    return name.casefold()
+
+
+@dataclass(frozen=True)
+class HabitQuery:
+    category: str | None = None
+    type: HabitType | None = None
+    name_prefix: str | None = None
+
+    @property
+    def filtered(self) -> bool:
+        return (
+            self.category is not None or self.type is not None or bool(self.name_prefix)
+        )
+
+    def name_range(self) -> tuple[str, str]:
+        prefix = name_key(self.name_prefix or "")
+        return prefix, prefix + NAME_KEY_END
+
+    def matches(self, component: HabitComponent) -> bool:
+        category = getattr(component, "category", "")
+        if self.category is not None and category != self.category:
+            return False
+        habit_type = component.type if isinstance(component, Habit) else None
+        if self.type is not None and habit_type != self.type:
+            return False
+        low, high = self.name_range()
+        return low <= name_key(component.name) < high
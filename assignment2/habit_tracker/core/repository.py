@@ -1,12 +1,26 @@
 from __future__ import annotations
 
+import asyncio
 import uuid
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Mapping
+from datetime import date
+from typing import Any, ParamSpec, TypeVar
 
 from .habits import HabitComponent, Log
+from .query import HabitQuery
+from .retention import Bucket
+from .stats import LogAggregate, LogWindowIndex, WindowStrategy
+
+P = ParamSpec("P")
+R = TypeVar("R")
 
 
 class HabitRepository(ABC):
+    blocking = False
+    shared = False
+    storage_id: str
+
     @abstractmethod
     def save(self, habit: HabitComponent) -> None:
         pass
@@ -19,14 +33,156 @@ class HabitRepository(ABC):
     def list_all(self) -> list[HabitComponent]:
         pass
 
+    @abstractmethod
+    def list_page(
+        self, limit: int, after: uuid.UUID | None = None
+    ) -> list[HabitComponent]:
+        pass
+
+    @abstractmethod
+    def find(
+        self,
+        query: HabitQuery,
+        limit: int | None = None,
+        after: uuid.UUID | None = None,
+    ) -> list[HabitComponent]:
+        pass
+
     @abstractmethod
     def delete(self, habit_id: uuid.UUID) -> None:
         pass
 
+    @abstractmethod
+    def get_parent_ids(self, habit_id: uuid.UUID) -> set[uuid.UUID]:
+        pass
+
     @abstractmethod
     def save_log(self, log: Log) -> None:
         pass
 
     @abstractmethod
-    def get_logs(self, habit_id: uuid.UUID) -> list[Log]:
+    def save_logs(self, logs: Iterable[Log]) -> int:
+        pass
+
+    @abstractmethod
+    def get_logs(
+        self,
+        habit_id: uuid.UUID,
+        start: date | None = None,
+        end: date | None = None,
+        limit: int | None = None,
+    ) -> list[Log]:
+        pass
+
+    @abstractmethod
+    def get_aggregate(self, habit_id: uuid.UUID, goal: float) -> LogAggregate:
+        pass
+
+    def get_aggregates(
+        self, goals: Mapping[uuid.UUID, float]
+    ) -> dict[uuid.UUID, LogAggregate]:
+        return {
+            habit_id: self.get_aggregate(habit_id, goal)
+            for habit_id, goal in goals.items()
+        }
+
+    def get_window_index(self, habit_id: uuid.UUID, goal: float) -> LogWindowIndex:
+        return LogWindowIndex.from_logs(self.get_logs(habit_id), goal)
+
+    def get_window_stat(
+        self, habit_id: uuid.UUID, goal: float, strategy: WindowStrategy
+    ) -> Any:
+        return strategy.from_window(self.get_window_index(habit_id, goal))
+
+    @abstractmethod
+    def roll_up(self, cutoff: date, granularity: str, limit: int = 1000) -> int:
         pass
+
+    @abstractmethod
+    def get_rollups(self, habit_id: uuid.UUID) -> list[Bucket]:
+        pass
+
+    @abstractmethod
+    def compact(self, limit: int = 1000) -> int:
+        pass
+
+    @abstractmethod
+    def get_version(self, habit_id: uuid.UUID) -> int:
+        pass
+
+    @abstractmethod
+    def collection_version(self) -> int:
+        pass
+
+
+class AsyncHabitRepository(ABC):
+    @abstractmethod
+    async def get(self, habit_id: uuid.UUID) -> HabitComponent | None:
+        pass
+
+    @abstractmethod
+    async def list_all(self) -> list[HabitComponent]:
+        pass
+
+    @abstractmethod
+    async def list_page(
+        self, limit: int, after: uuid.UUID | None = None
+    ) -> list[HabitComponent]:
+        pass
+
+    @abstractmethod
+    async def find(
+        self,
+        query: HabitQuery,
+        limit: int | None = None,
+        after: uuid.UUID | None = None,
+    ) -> list[HabitComponent]:
+        pass
+
+    @abstractmethod
+    async def get_logs(
+        self,
+        habit_id: uuid.UUID,
+        start: date | None = None,
+        end: date | None = None,
+        limit: int | None = None,
+    ) -> list[Log]:
+        pass
+
+
+class AsyncRepositoryAdapter(AsyncHabitRepository):
+    def __init__(self, repo: HabitRepository):
+        self.repo = repo
+
+    async def _call(self, fn: Callable[P, R], *args: P.args, **kwargs: P.kwargs) -> R:
+        if self.repo.blocking:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+
+    async def get(self, habit_id: uuid.UUID) -> HabitComponent | None:
+        return await self._call(self.repo.get, habit_id)
+
+    async def list_all(self) -> list[HabitComponent]:
+        return await self._call(self.repo.list_all)
+
+    async def list_page(
+        self, limit: int, after: uuid.UUID | None = None
+    ) -> list[HabitComponent]:
+        return await self._call(self.repo.list_page, limit, after)
+
+    async def find(
+        self,
+        query: HabitQuery,
+        limit: int | None = None,
+        after: uuid.UUID | None = None,
+    ) -> list[HabitComponent]:
+        return await self._call(self.repo.find, query, limit, after)
+
+    async def get_logs(
+        self,
+        habit_id: uuid.UUID,
+        start: date | None = None,
+        end: date | None = None,
+        limit: int | None = None,
+    ) -> list[Log]:
+        return await self._call(self.repo.get_logs, habit_id, start, end, limit)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from .stats import LogAggregate
+
+GRANULARITIES = ("day", "week", "month")
+
+Bucket = tuple[date, LogAggregate]
+
+
+class RetentionError(ValueError):
+    pass
+
+
+def period_start(day: date, granularity: str) -> date:
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown roll-up granularity: {granularity}")
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    keep_days: int = 365
+    granularity: str = "month"
+
+    def __post_init__(self) -> None:
+        if self.keep_days < 0:
+            raise ValueError("keep_days must not be negative")
+        if self.granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown roll-up granularity: {self.granularity}")
+
+    def cutoff(self, today: date) -> date:
+        return period_start(today - timedelta(days=self.keep_days), self.granularity)
+
+
+def roll_up_values(
+    days: Sequence[int], values: Sequence[float], goal: float, granularity: str
+) -> list[Bucket]:
+    buckets: list[Bucket] = []
+    for day, value in zip(days, values, strict=True):
+        period = period_start(date.fromordinal(day), granularity)
+        if not buckets or buckets[-1][0] != period:
+            buckets.append((period, LogAggregate(goal=goal)))
+        buckets[-1][1].insert(value, 0)
+    return buckets
+
+
+def merge_buckets(archive: list[Bucket], buckets: Iterable[Bucket]) -> None:
+    for period, aggregate in buckets:
+        if archive and archive[-1][0] == period:
+            archive[-1] = (period, LogAggregate.chain(archive[-1][1], aggregate))
+        else:
+            archive.append((period, aggregate))
+
+
+def check_goal(archive: Iterable[Bucket], goal: float) -> None:
+    if any(aggregate.goal != goal for _, aggregate in archive):
+        raise RetentionError("Goal cannot change once logs have been rolled up")
+
+
+def fold_buckets(archive: Iterable[Bucket], goal: float) -> LogAggregate:
+    folded = LogAggregate(goal=goal)
+    for _, aggregate in archive:
+        folded = LogAggregate.chain(folded, aggregate)
+    folded.goal = goal
+    return folded
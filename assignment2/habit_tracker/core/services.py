@@ -1,23 +1,67 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import re
+import threading
+import time
 import uuid
+from collections.abc import Callable, Hashable, Iterable
 from datetime import date
-from typing import Any
+from functools import partial
+from typing import Any, ParamSpec, TypeVar
 
 from .habits import Habit, HabitComponent, HabitType, Log, Routine
-from .repository import HabitRepository
+from .hierarchy import ClosureIndex, HierarchyCycleError
+from .leaderboard import Leaderboard
+from .query import HabitQuery
+from .repository import AsyncHabitRepository, AsyncRepositoryAdapter, HabitRepository
+from .retention import RetentionPolicy, check_goal
+from .singleflight import SingleFlight
 from .stats import (
     CompletionRateStrategy,
     CurrentStreakStrategy,
+    LogAggregate,
+    LongestStreakStrategy,
+    RollingCompletionRateStrategy,
+    RollingTotalStrategy,
     StatContext,
     StatStrategy,
     TotalProgressStrategy,
+    WindowStrategy,
 )
 
+WINDOWED_STAT = re.compile(r"(total|completion_rate)_(\d+)d")
+MAX_WINDOW_DAYS = 36_500
+LEADERBOARD_STRATEGIES: dict[str, StatStrategy] = {
+    "streak": CurrentStreakStrategy(),
+    "completion_rate": CompletionRateStrategy(),
+}
+LEADERBOARD_REFRESH_SECONDS = 5.0
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
 
 class HabitService:
-    def __init__(self, repository: HabitRepository):
+    def __init__(
+        self, repository: HabitRepository, stats_flight: SingleFlight | None = None
+    ):
         self.repo = repository
+        self._stats_flight = stats_flight or SingleFlight()
+        self._rollups: dict[uuid.UUID, tuple[Hashable, LogAggregate]] = {}
+        self._hierarchy: ClosureIndex | None = None
+        self._hierarchy_lock = threading.RLock()
+        self._leaderboards: dict[str, Leaderboard] | None = None
+        self._leaderboards_built = 0.0
+        self._leaderboard_lock = threading.RLock()
+
+    @property
+    def hierarchy(self) -> ClosureIndex:
+        with self._hierarchy_lock:
+            if self._hierarchy is None:
+                self._hierarchy = ClosureIndex.from_components(self.repo.list_all())
+            return self._hierarchy
 
     def create_habit(
         self,
@@ -37,6 +81,7 @@ class HabitService:
             goal=goal,
         )
         self.repo.save(habit)
+        self._refresh_leaderboards([habit.id])
         return habit
 
     def create_routine(self, name: str, description: str, category: str) -> Routine:
@@ -56,8 +101,68 @@ class HabitService:
     def list_habits(self) -> list[HabitComponent]:
         return self.repo.list_all()
 
+    def list_habits_page(
+        self, limit: int, after: uuid.UUID | None = None
+    ) -> list[HabitComponent]:
+        return self.repo.list_page(limit, after)
+
+    def find_habits(
+        self,
+        query: HabitQuery,
+        limit: int | None = None,
+        after: uuid.UUID | None = None,
+    ) -> list[HabitComponent]:
+        return self.repo.find(query, limit, after)
+
     def delete_habit(self, habit_id: uuid.UUID) -> None:
         self.repo.delete(habit_id)
+        self._rollups.pop(habit_id, None)
+        with self._hierarchy_lock:
+            if self._hierarchy is not None:
+                self._hierarchy.discard(habit_id)
+        with self._leaderboard_lock:
+            for board in (self._leaderboards or {}).values():
+                board.discard(habit_id)
+
+    def compact(self, limit: int = 1000) -> int:
+        removed = self.repo.compact(limit)
+        for routine_id in list(self._rollups):
+            if self.repo.get(routine_id) is None:
+                self._rollups.pop(routine_id, None)
+        return removed
+
+    def apply_retention(
+        self, policy: RetentionPolicy, today: date | None = None, limit: int = 1000
+    ) -> int:
+        cutoff = policy.cutoff(today or date.today())
+        return self.repo.roll_up(cutoff, policy.granularity, limit)
+
+    @property
+    def storage_id(self) -> str:
+        return self.repo.storage_id
+
+    def subtree_versions(self, component: HabitComponent) -> dict[uuid.UUID, int]:
+        versions: dict[uuid.UUID, int] = {}
+        pending = [component]
+        while pending:
+            node = pending.pop()
+            if node.id in versions:
+                continue
+            versions[node.id] = self.repo.get_version(node.id)
+            pending.extend(reversed(node.get_children()))
+        return versions
+
+    def habit_version(self, habit_id: uuid.UUID) -> str | None:
+        habit = self.repo.get(habit_id)
+        if habit is None:
+            return None
+        digest = hashlib.blake2b(self.repo.storage_id.encode(), digest_size=12)
+        for node_id, version in self.subtree_versions(habit).items():
+            digest.update(f"{node_id}:{version};".encode())
+        return digest.hexdigest()
+
+    def collection_version(self) -> str:
+        return f"{self.repo.storage_id}-{self.repo.collection_version()}"
 
     def update_habit(
         self,
@@ -71,6 +176,9 @@ class HabitService:
         if not habit:
             return None
 
+        if isinstance(habit, Habit) and goal is not None and goal != habit.goal:
+            check_goal(self.repo.get_rollups(habit_id), goal)
+
         if name is not None:
             habit.name = name
         if description is not None:
@@ -82,6 +190,7 @@ class HabitService:
             habit.goal = goal
 
         self.repo.save(habit)
+        self._refresh_leaderboards([habit_id])
         return habit
 
     def add_subhabit(self, parent_id: uuid.UUID, child_id: uuid.UUID) -> None:
@@ -90,11 +199,36 @@ class HabitService:
         if not parent or not child:
             raise ValueError("Parent or child not found")
 
-        try:
+        if not parent.is_composite():
+            raise ValueError("Cannot add sub-habit to this habit type")
+
+        with self._hierarchy_lock:
+            if not self.repo.shared:
+                self.hierarchy.link(parent_id, child_id)
             parent.add(child)
+            try:
+                self.repo.save(parent)
+            except HierarchyCycleError:
+                parent.remove(child)
+                raise
+
+    def remove_subhabit(self, parent_id: uuid.UUID, child_id: uuid.UUID) -> None:
+        parent = self.repo.get(parent_id)
+        if not parent or not parent.is_composite():
+            raise ValueError("Parent routine not found")
+        child = next((c for c in parent.get_children() if c.id == child_id), None)
+        if child is None:
+            raise ValueError("Sub-habit not found in routine")
+
+        with self._hierarchy_lock:
+            parent.remove(child)
             self.repo.save(parent)
-        except NotImplementedError as e:
-            raise ValueError("Cannot add sub-habit to this habit type") from e
+            if self._hierarchy is not None:
+                self._hierarchy.unlink(parent_id, child_id)
+
+    def get_parents(self, habit_id: uuid.UUID) -> list[HabitComponent]:
+        parents = (self.repo.get(pid) for pid in self.repo.get_parent_ids(habit_id))
+        return sorted((p for p in parents if p), key=lambda p: str(p.id))
 
     def log_progress(
         self, habit_id: uuid.UUID, value: float, log_date: date | None = None
@@ -104,29 +238,306 @@ class HabitService:
 
         log = Log(habit_id=habit_id, date=log_date, value=value)
         self.repo.save_log(log)
+        self._refresh_leaderboards([habit_id])
         return log
 
-    def get_logs(self, habit_id: uuid.UUID) -> list[Log]:
-        return self.repo.get_logs(habit_id)
+    def log_progress_batch(
+        self, entries: Iterable[tuple[uuid.UUID, float, date | None]]
+    ) -> int:
+        today = date.today()
+        touched: set[uuid.UUID] = set()
+
+        def logs() -> Iterable[Log]:
+            for habit_id, value, log_date in entries:
+                touched.add(habit_id)
+                yield Log(habit_id=habit_id, date=log_date or today, value=value)
+
+        saved = self.repo.save_logs(logs())
+        self._refresh_leaderboards(touched)
+        return saved
+
+    def get_leaderboard(self, metric: str, limit: int) -> list[tuple[uuid.UUID, float]]:
+        with self._leaderboard_lock:
+            return self._leaderboard(metric).top(limit)
+
+    def get_rank(self, metric: str, habit_id: uuid.UUID) -> tuple[int, float] | None:
+        with self._leaderboard_lock:
+            board = self._leaderboard(metric)
+            rank, score = board.rank(habit_id), board.score(habit_id)
+        if rank is None or score is None:
+            return None
+        return rank, score
+
+    def _leaderboard(self, metric: str) -> Leaderboard:
+        if metric not in LEADERBOARD_STRATEGIES:
+            raise ValueError(f"Unknown leaderboard: {metric}")
+        with self._leaderboard_lock:
+            age = time.monotonic() - self._leaderboards_built
+            stale = self.repo.shared and age > LEADERBOARD_REFRESH_SECONDS
+            if self._leaderboards is None or stale:
+                boards = {name: Leaderboard() for name in LEADERBOARD_STRATEGIES}
+                self._leaderboards_built = time.monotonic()
+                habits = [h for h in self.repo.list_all() if isinstance(h, Habit)]
+                aggregates = self.repo.get_aggregates({h.id: h.goal for h in habits})
+                for habit_id, aggregate in aggregates.items():
+                    _rank(boards, habit_id, aggregate)
+                self._leaderboards = boards
+            return self._leaderboards[metric]
+
+    def _refresh_leaderboards(self, habit_ids: Iterable[uuid.UUID]) -> None:
+        with self._leaderboard_lock:
+            boards = self._leaderboards
+            if boards is None:
+                return
+            for habit_id in habit_ids:
+                habit = self.repo.get(habit_id)
+                if isinstance(habit, Habit):
+                    aggregate = self.repo.get_aggregate(habit_id, habit.goal)
+                    _rank(boards, habit_id, aggregate)
+                else:
+                    for board in boards.values():
+                        board.discard(habit_id)
+
+    def get_logs(
+        self,
+        habit_id: uuid.UUID,
+        start: date | None = None,
+        end: date | None = None,
+        limit: int | None = None,
+    ) -> list[Log]:
+        return self.repo.get_logs(habit_id, start, end, limit)
 
     def get_stats(self, habit_id: uuid.UUID, strategy_type: str) -> Any:
+        return self._stats_flight.do(
+            (habit_id, strategy_type),
+            partial(self._compute_stats, habit_id, strategy_type),
+        )
+
+    def _compute_stats(self, habit_id: uuid.UUID, strategy_type: str) -> Any:
         habit = self.repo.get(habit_id)
         if not habit:
             raise ValueError("Habit not found")
 
+        strategy = _strategy_for(strategy_type)
+        context = StatContext(strategy)
+        if isinstance(strategy, WindowStrategy):
+            if not isinstance(habit, Habit):
+                raise ValueError("Windowed stats are only available for habits")
+            return self.repo.get_window_stat(habit_id, habit.goal, strategy)
         if isinstance(habit, Routine):
-            return 0
+            _, aggregate = self._rollup(habit, frozenset())
+            return context.analyze_aggregate(aggregate)
+        goal = getattr(habit, "goal", 0.0)
+        return context.analyze_aggregate(self.repo.get_aggregate(habit_id, goal))
 
-        logs = self.repo.get_logs(habit_id)
+    def get_all_stats(
+        self, strategy_type: str, category: str | None = None
+    ) -> list[tuple[uuid.UUID, Any]]:
+        strategy = _strategy_for(strategy_type)
+        context = StatContext(strategy)
+        components = self.repo.find(HabitQuery(category=category))
+        if isinstance(strategy, WindowStrategy):
+            return [
+                (c.id, self.repo.get_window_stat(c.id, c.goal, strategy))
+                for c in sorted(components, key=lambda c: str(c.id))
+                if isinstance(c, Habit)
+            ]
+        goals = {c.id: c.goal for c in components if isinstance(c, Habit)}
+        aggregates = self.repo.get_aggregates(goals)
+        results: list[tuple[uuid.UUID, Any]] = []
+        for component in sorted(components, key=lambda c: str(c.id)):
+            aggregate = aggregates.get(component.id)
+            if aggregate is None:
+                _, aggregate = self._rollup(component, frozenset())
+            results.append((component.id, context.analyze_aggregate(aggregate)))
+        return results
 
-        strategy: StatStrategy
-        if strategy_type == "streak":
-            strategy = CurrentStreakStrategy()
-        elif strategy_type == "completion_rate":
-            strategy = CompletionRateStrategy()
+    def _rollup(
+        self, component: HabitComponent, path: frozenset[uuid.UUID]
+    ) -> tuple[Hashable, LogAggregate]:
+        version = self.repo.get_version(component.id)
+        if isinstance(component, Habit):
+            stamp: Hashable = (version, component.goal)
+            cached = self._rollups.get(component.id)
+            if cached is not None and cached[0] == stamp:
+                return cached
+            aggregate = LogAggregate.rollup(
+                [self.repo.get_aggregate(component.id, component.goal)]
+            )
         else:
-            strategy = TotalProgressStrategy()
+            path = path | {component.id}
+            parts = [
+                (child.id, *self._rollup(child, path))
+                for child in component.get_children()
+                if child.id not in path
+            ]
+            stamp = (version, tuple((child_id, s) for child_id, s, _ in parts))
+            cached = self._rollups.get(component.id)
+            if cached is not None and cached[0] == stamp:
+                return cached
+            aggregate = LogAggregate.rollup(part for _, _, part in parts)
+        self._rollups[component.id] = (stamp, aggregate)
+        return stamp, aggregate
 
-        context = StatContext(strategy)
-        goal = getattr(habit, "goal", 0.0)
-        return context.analyze(logs, goal)
+
+def _rank(
+    boards: dict[str, Leaderboard], habit_id: uuid.UUID, aggregate: LogAggregate
+) -> None:
+    for name, strategy in LEADERBOARD_STRATEGIES.items():
+        boards[name].update(habit_id, strategy.from_aggregate(aggregate))
+
+
+def _strategy_for(strategy_type: str) -> StatStrategy:
+    windowed = WINDOWED_STAT.fullmatch(strategy_type)
+    if windowed is not None:
+        metric, days = windowed.group(1), int(windowed.group(2))
+        if not 1 <= days <= MAX_WINDOW_DAYS:
+            raise ValueError(f"Window must be between 1 and {MAX_WINDOW_DAYS} days")
+        if metric == "total":
+            return RollingTotalStrategy(days)
+        return RollingCompletionRateStrategy(days)
+    if strategy_type == "longest_streak":
+        return LongestStreakStrategy()
+    if strategy_type == "streak":
+        return CurrentStreakStrategy()
+    if strategy_type == "completion_rate":
+        return CompletionRateStrategy()
+    return TotalProgressStrategy()
+
+
+class AsyncHabitService:
+    def __init__(
+        self, service: HabitService, reader: AsyncHabitRepository | None = None
+    ):
+        self.service = service
+        self.reader = reader or AsyncRepositoryAdapter(service.repo)
+
+    async def _call(self, fn: Callable[P, R], *args: P.args, **kwargs: P.kwargs) -> R:
+        if self.service.repo.blocking:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+
+    async def create_habit(
+        self,
+        name: str,
+        description: str,
+        category: str,
+        habit_type: HabitType,
+        goal: float,
+    ) -> Habit:
+        return await self._call(
+            self.service.create_habit, name, description, category, habit_type, goal
+        )
+
+    async def create_routine(
+        self, name: str, description: str, category: str
+    ) -> Routine:
+        return await self._call(
+            self.service.create_routine, name, description, category
+        )
+
+    async def get_habit(self, habit_id: uuid.UUID) -> HabitComponent | None:
+        return await self.reader.get(habit_id)
+
+    async def list_habits(self) -> list[HabitComponent]:
+        return await self.reader.list_all()
+
+    async def list_habits_page(
+        self, limit: int, after: uuid.UUID | None = None
+    ) -> list[HabitComponent]:
+        return await self.reader.list_page(limit, after)
+
+    async def find_habits(
+        self,
+        query: HabitQuery,
+        limit: int | None = None,
+        after: uuid.UUID | None = None,
+    ) -> list[HabitComponent]:
+        return await self.reader.find(query, limit, after)
+
+    async def delete_habit(self, habit_id: uuid.UUID) -> None:
+        await self._call(self.service.delete_habit, habit_id)
+
+    async def compact(self, limit: int = 1000) -> int:
+        return await self._call(self.service.compact, limit)
+
+    async def apply_retention(
+        self, policy: RetentionPolicy, today: date | None = None, limit: int = 1000
+    ) -> int:
+        return await self._call(self.service.apply_retention, policy, today, limit)
+
+    @property
+    def storage_id(self) -> str:
+        return self.service.storage_id
+
+    async def subtree_versions(self, component: HabitComponent) -> dict[uuid.UUID, int]:
+        return await self._call(self.service.subtree_versions, component)
+
+    async def habit_version(self, habit_id: uuid.UUID) -> str | None:
+        return await self._call(self.service.habit_version, habit_id)
+
+    async def collection_version(self) -> str:
+        return await self._call(self.service.collection_version)
+
+    async def update_habit(
+        self,
+        habit_id: uuid.UUID,
+        name: str | None = None,
+        description: str | None = None,
+        category: str | None = None,
+        goal: float | None = None,
+    ) -> HabitComponent | None:
+        return await self._call(
+            self.service.update_habit,
+            habit_id,
+            name=name,
+            description=description,
+            category=category,
+            goal=goal,
+        )
+
+    async def add_subhabit(self, parent_id: uuid.UUID, child_id: uuid.UUID) -> None:
+        await self._call(self.service.add_subhabit, parent_id, child_id)
+
+    async def remove_subhabit(self, parent_id: uuid.UUID, child_id: uuid.UUID) -> None:
+        await self._call(self.service.remove_subhabit, parent_id, child_id)
+
+    async def get_parents(self, habit_id: uuid.UUID) -> list[HabitComponent]:
+        return await self._call(self.service.get_parents, habit_id)
+
+    async def log_progress(
+        self, habit_id: uuid.UUID, value: float, log_date: date | None = None
+    ) -> Log:
+        return await self._call(self.service.log_progress, habit_id, value, log_date)
+
+    async def log_progress_batch(
+        self, entries: Iterable[tuple[uuid.UUID, float, date | None]]
+    ) -> int:
+        return await self._call(self.service.log_progress_batch, entries)
+
+    async def get_logs(
+        self,
+        habit_id: uuid.UUID,
+        start: date | None = None,
+        end: date | None = None,
+        limit: int | None = None,
+    ) -> list[Log]:
+        return await self.reader.get_logs(habit_id, start, end, limit)
+
+    async def get_stats(self, habit_id: uuid.UUID, strategy_type: str) -> Any:
+        return await self._call(self.service.get_stats, habit_id, strategy_type)
+
+    async def get_all_stats(
+        self, strategy_type: str, category: str | None = None
+    ) -> list[tuple[uuid.UUID, Any]]:
+        return await self._call(self.service.get_all_stats, strategy_type, category)
+
+    async def get_leaderboard(
+        self, metric: str, limit: int
+    ) -> list[tuple[uuid.UUID, float]]:
+        return await self._call(self.service.get_leaderboard, metric, limit)
+
+    async def get_rank(
+        self, metric: str, habit_id: uuid.UUID
+    ) -> tuple[int, float] | None:
+        return await self._call(self.service.get_rank, metric, habit_id)
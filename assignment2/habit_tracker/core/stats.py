@@ -1,21 +1,202 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import date, timedelta
 from typing import Any
 
 from .habits import Log
 
 
+@dataclass
+class LogAggregate:
+    goal: float
+    total: float = 0.0
+    compliant: int = 0
+    count: int = 0
+    streak: int = 0
+
+    @classmethod
+    def from_logs(cls, logs: list[Log], goal: float) -> LogAggregate:
+        return cls(
+            goal=goal,
+            total=TotalProgressStrategy().calculate(logs, goal),
+            compliant=sum(1 for log in logs if log.value >= goal),
+            count=len(logs),
+            streak=CurrentStreakStrategy().calculate(logs, goal),
+        )
+
+    @classmethod
+    def from_values(cls, values: Sequence[float], goal: float) -> LogAggregate:
+        aggregate = cls(goal=goal, total=sum(values), count=len(values))
+        aggregate.compliant = sum(1 for value in values if value >= goal)
+        for value in reversed(values):
+            if value < goal:
+                break
+            aggregate.streak += 1
+        return aggregate
+
+    @classmethod
+    def rollup(cls, parts: Iterable[LogAggregate]) -> LogAggregate:
+        combined = cls(goal=0.0)
+        streaks = []
+        for part in parts:
+            combined.total += part.total
+            combined.compliant += part.compliant
+            combined.count += part.count
+            streaks.append(part.streak)
+        combined.streak = min(streaks, default=0)
+        return combined
+
+    @classmethod
+    def chain(cls, older: LogAggregate, newer: LogAggregate) -> LogAggregate:
+        streak = newer.streak
+        if streak == newer.count:
+            streak += older.streak
+        return cls(
+            goal=newer.goal,
+            total=older.total + newer.total,
+            compliant=older.compliant + newer.compliant,
+            count=older.count + newer.count,
+            streak=streak,
+        )
+
+    def insert(self, value: float, newer: int) -> None:
+        compliant = value >= self.goal
+        self.total += value
+        self.count += 1
+        if compliant:
+            self.compliant += 1
+        if newer <= self.streak:
+            self.streak = self.streak + 1 if compliant else newer
+
+    def replace(self, old_value: float, new_value: float, newer: int) -> bool:
+        was_compliant = old_value >= self.goal
+        is_compliant = new_value >= self.goal
+        self.total += new_value - old_value
+        self.compliant += int(is_compliant) - int(was_compliant)
+        if was_compliant == is_compliant or newer > self.streak:
+            return True
+        if was_compliant:
+            self.streak = newer
+            return True
+        return False
+
+
+class LogWindowIndex:
+    def __init__(
+        self,
+        goal: float,
+        days: array[int] | None = None,
+        values: array[float] | None = None,
+    ) -> None:
+        self.goal = goal
+        self.days = array("i") if days is None else days
+        self.values = array("d") if values is None else values
+        self.total_prefix = array("d")
+        self.compliant_prefix = array("i")
+        self.current_run = 0
+        self.longest_run = 0
+        self._rebuild(0)
+
+    @classmethod
+    def from_logs(cls, logs: Iterable[Log], goal: float) -> LogWindowIndex:
+        ordered = sorted(logs, key=lambda entry: entry.date)
+        return cls(
+            goal,
+            array("i", (log.date.toordinal() for log in ordered)),
+            array("d", (log.value for log in ordered)),
+        )
+
+    def copy(self) -> LogWindowIndex:
+        index = LogWindowIndex(self.goal)
+        index.days = array("i", self.days)
+        index.values = array("d", self.values)
+        index.total_prefix = array("d", self.total_prefix)
+        index.compliant_prefix = array("i", self.compliant_prefix)
+        index.current_run = self.current_run
+        index.longest_run = self.longest_run
+        return index
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def upsert(self, day: date, value: float) -> None:
+        ordinal = day.toordinal()
+        position = bisect_left(self.days, ordinal)
+        if position < len(self.days) and self.days[position] == ordinal:
+            self.values[position] = value
+        else:
+            self.days.insert(position, ordinal)
+            self.values.insert(position, value)
+        self.refresh(day)
+
+    def refresh(self, day: date) -> None:
+        position = bisect_left(self.days, day.toordinal())
+        if position == len(self.total_prefix) == len(self.days) - 1:
+            self._append(position)
+        else:
+            self._rebuild(position)
+
+    def window(self, start: date, end: date) -> tuple[float, int, int]:
+        lo = bisect_left(self.days, start.toordinal())
+        hi = bisect_right(self.days, end.toordinal())
+        if hi <= lo:
+            return 0.0, 0, 0
+        total = self.total_prefix[hi - 1] - (self.total_prefix[lo - 1] if lo else 0.0)
+        compliant = self.compliant_prefix[hi - 1] - (
+            self.compliant_prefix[lo - 1] if lo else 0
+        )
+        return total, compliant, hi - lo
+
+    def _append(self, position: int) -> None:
+        value = self.values[position]
+        compliant = value >= self.goal
+        self.total_prefix.append(
+            (self.total_prefix[-1] if self.total_prefix else 0.0) + value
+        )
+        self.compliant_prefix.append(
+            (self.compliant_prefix[-1] if self.compliant_prefix else 0) + compliant
+        )
+        self.current_run = self.current_run + 1 if compliant else 0
+        self.longest_run = max(self.longest_run, self.current_run)
+
+    def _rebuild(self, position: int) -> None:
+        del self.total_prefix[position:]
+        del self.compliant_prefix[position:]
+        total = self.total_prefix[-1] if self.total_prefix else 0.0
+        compliant = self.compliant_prefix[-1] if self.compliant_prefix else 0
+        for value in self.values[position:]:
+            total += value
+            compliant += value >= self.goal
+            self.total_prefix.append(total)
+            self.compliant_prefix.append(compliant)
+        self.current_run = self.longest_run = 0
+        for value in self.values:
+            self.current_run = self.current_run + 1 if value >= self.goal else 0
+            self.longest_run = max(self.longest_run, self.current_run)
+
+
 class StatStrategy(ABC):
     @abstractmethod
     def calculate(self, logs: list[Log], goal: float) -> Any:
         pass
 
+    @abstractmethod
+    def from_aggregate(self, aggregate: LogAggregate) -> Any:
+        pass
+
 
 class TotalProgressStrategy(StatStrategy):
     def calculate(self, logs: list[Log], _goal: float) -> float:
         return sum(log.value for log in logs)
 
+    def from_aggregate(self, aggregate: LogAggregate) -> float:
+        return aggregate.total
+
 
 class CurrentStreakStrategy(StatStrategy):
     def calculate(self, logs: list[Log], goal: float) -> int:
@@ -32,6 +213,9 @@ class CurrentStreakStrategy(StatStrategy):
                 break
         return streak
 
+    def from_aggregate(self, aggregate: LogAggregate) -> int:
+        return aggregate.streak
+
 
 class CompletionRateStrategy(StatStrategy):
     def calculate(self, logs: list[Log], goal: float) -> float:
@@ -40,6 +224,64 @@ class CompletionRateStrategy(StatStrategy):
         compliant = sum(1 for log in logs if log.value >= goal)
         return (compliant / len(logs)) * 100.0
 
+    def from_aggregate(self, aggregate: LogAggregate) -> float:
+        if not aggregate.count:
+            return 0.0
+        return (aggregate.compliant / aggregate.count) * 100.0
+
+
+class WindowStrategy(StatStrategy):
+    def from_aggregate(self, _aggregate: LogAggregate) -> Any:
+        raise TypeError("Windowed stats require a log window index")
+
+    @abstractmethod
+    def from_window(self, index: LogWindowIndex) -> Any:
+        pass
+
+
+class RollingTotalStrategy(WindowStrategy):
+    def __init__(self, days: int, today: date | None = None):
+        self.days = days
+        self.today = today
+
+    def bounds(self) -> tuple[date, date]:
+        end = self.today or date.today()
+        return end - timedelta(days=self.days - 1), end
+
+    def calculate(self, logs: list[Log], _goal: float) -> float:
+        start, end = self.bounds()
+        return sum(log.value for log in logs if start <= log.date <= end)
+
+    def from_window(self, index: LogWindowIndex) -> float:
+        total, _, _ = index.window(*self.bounds())
+        return total
+
+
+class RollingCompletionRateStrategy(RollingTotalStrategy):
+    def calculate(self, logs: list[Log], goal: float) -> float:
+        start, end = self.bounds()
+        return CompletionRateStrategy().calculate(
+            [log for log in logs if start <= log.date <= end], goal
+        )
+
+    def from_window(self, index: LogWindowIndex) -> float:
+        _, compliant, count = index.window(*self.bounds())
+        if not count:
+            return 0.0
+        return (compliant / count) * 100.0
+
+
+class LongestStreakStrategy(WindowStrategy):
+    def calculate(self, logs: list[Log], goal: float) -> int:
+        longest = current = 0
+        for log in sorted(logs, key=lambda log_entry: log_entry.date):
+            current = current + 1 if log.value >= goal else 0
+            longest = max(longest, current)
+        return longest
+
+    def from_window(self, index: LogWindowIndex) -> int:
+        return index.longest_run
+
 
 class StatContext:
     def __init__(self, strategy: StatStrategy):
@@ -50,3 +292,6 @@ class StatContext:
 
     def analyze(self, logs: list[Log], goal: float) -> Any:
         return self._strategy.calculate(logs, goal)
+
+    def analyze_aggregate(self, aggregate: LogAggregate) -> Any:
+        return self._strategy.from_aggregate(aggregate)
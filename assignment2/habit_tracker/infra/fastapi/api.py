@@ -1,178 +1,507 @@
 from __future__ import annotations
 
+import base64
 import uuid
-from typing import Any
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import date, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
 
-from ...core.habits import Habit, HabitComponent, Routine
-from ...core.services import HabitService
-from .dependencies import get_habit_service
+from ...core.habits import HabitComponent, HabitType, Log
+from ...core.query import HabitQuery
+from ...core.retention import RetentionError
+from ...core.services import AsyncHabitService
+from ..metrics import registry
+from .cache import (
+    CachedResponse,
+    cached_json,
+    etag_matches,
+    not_modified,
+    quote_etag,
+    response_cache,
+)
+from .dependencies import get_async_habit_service
 from .schemas import (
+    BatchLogItem,
+    BatchLogRequest,
+    BatchLogResponse,
+    BulkStatResponse,
     CreateHabitRequest,
     CreateRoutineRequest,
     HabitResponse,
+    LeaderboardEntry,
+    LeaderboardResponse,
     LogRequest,
     LogResponse,
     StatResponse,
 )
+from .serialization import (
+    FastJSONResponse,
+    component_payload,
+    dumps,
+    tree_serializer,
+)
 
 router = APIRouter()
 
+STREAM_CHUNK_SIZE = 500
+EXPORT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 1000
+
 
-def to_response(component: HabitComponent) -> HabitResponse:
-    data: dict[str, Any] = {
-        "id": component.id,
-        "name": component.name,
-        "description": component.description,
-        "category": getattr(component, "category", ""),
-        "created_at": component.created_at,
-        "children": [],
-        "type": None,
-        "goal": None,
-    }
+def encode_cursor(key: str) -> str:
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
 
-    if isinstance(component, Habit):
-        data["type"] = component.type
-        data["goal"] = component.goal
 
-    if isinstance(component, Routine):
-        data["children"] = [to_response(child) for child in component.children]
+def decode_cursor(cursor: str) -> str:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return base64.urlsafe_b64decode(padded.encode()).decode()
 
-    return HabitResponse(**data)
+
+async def conditional_json(
+    request: Request,
+    key: str,
+    version: str,
+    render: Callable[[], Awaitable[tuple[bytes, dict[str, str]]]],
+) -> Response:
+    etag = quote_etag(version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    entry = response_cache.get(key, etag)
+    if entry is None:
+        body, headers = await render()
+        entry = CachedResponse(etag=etag, body=body, headers=headers)
+        response_cache.put(key, entry)
+    return cached_json(entry)
 
 
 @router.post(
     "/habits", response_model=HabitResponse, status_code=status.HTTP_201_CREATED
 )
-def create_habit(
+async def create_habit(
     request: CreateHabitRequest,
-    service: HabitService = Depends(get_habit_service),
-) -> HabitResponse:
-    habit = service.create_habit(
+    service: AsyncHabitService = Depends(get_async_habit_service),
+) -> Response:
+    habit = await service.create_habit(
         name=request.name,
         description=request.description,
         category=request.category,
         habit_type=request.type,
         goal=request.goal,
     )
-    return to_response(habit)
+    return FastJSONResponse(component_payload(habit), status_code=201)
 
 
 @router.post(
     "/routines", response_model=HabitResponse, status_code=status.HTTP_201_CREATED
 )
-def create_routine(
+async def create_routine(
     request: CreateRoutineRequest,
-    service: HabitService = Depends(get_habit_service),
-) -> HabitResponse:
-    routine = service.create_routine(
+    service: AsyncHabitService = Depends(get_async_habit_service),
+) -> Response:
+    routine = await service.create_routine(
         name=request.name,
         description=request.description,
         category=request.category,
     )
-    return to_response(routine)
+    return FastJSONResponse(component_payload(routine), status_code=201)
 
 
 @router.get("/habits", response_model=list[HabitResponse])
-def list_habits(
-    service: HabitService = Depends(get_habit_service),
-) -> list[HabitResponse]:
-    habits = service.list_habits()
-    return [to_response(h) for h in habits]
+async def list_habits(
+    request: Request,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    stream: bool = False,
+    category: str | None = None,
+    habit_type: HabitType | None = Query(None, alias="type"),
+    name_prefix: str | None = None,
+    service: AsyncHabitService = Depends(get_async_habit_service),
+) -> Response:
+    query = HabitQuery(category, habit_type, name_prefix)
+    if stream:
+        return StreamingResponse(
+            _export_habits(service, query), media_type="application/json"
+        )
+    after = None
+    if cursor is not None:
+        try:
+            after = uuid.UUID(decode_cursor(cursor))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+    async def render() -> tuple[bytes, dict[str, str]]:
+        headers: dict[str, str] = {}
+        if limit is None and cursor is None:
+            if query.filtered:
+                habits = await service.find_habits(query)
+            else:
+                habits = await service.list_habits()
+        else:
+            page_size = limit or MAX_PAGE_SIZE
+            habits = await _page_habits(service, query, page_size + 1, after)
+            if len(habits) > page_size:
+                habits = habits[:page_size]
+                headers["X-Next-Cursor"] = encode_cursor(str(habits[-1].id))
+        return dumps([component_payload(h) for h in habits]), headers
+
+    key = (
+        f"habits?limit={limit}&cursor={cursor}&category={category}"
+        f"&type={habit_type}&name_prefix={name_prefix}"
+    )
+    return await conditional_json(
+        request, key, await service.collection_version(), render
+    )
+
+
+async def _page_habits(
+    service: AsyncHabitService,
+    query: HabitQuery,
+    limit: int,
+    after: uuid.UUID | None,
+) -> list[HabitComponent]:
+    if query.filtered:
+        return await service.find_habits(query, limit, after)
+    return await service.list_habits_page(limit, after)
+
+
+async def _export_habits(
+    service: AsyncHabitService, query: HabitQuery
+) -> AsyncIterator[str]:
+    yield "["
+    after: uuid.UUID | None = None
+    separator = ""
+    while True:
+        page = await _page_habits(service, query, EXPORT_PAGE_SIZE, after)
+        for habit in page:
+            yield separator + dumps(component_payload(habit)).decode()
+            separator = ","
+        if len(page) < EXPORT_PAGE_SIZE:
+            break
+        after = page[-1].id
+    yield "]"
 
 
 @router.get("/habits/{habit_id}", response_model=HabitResponse)
-def get_habit(
+async def get_habit(
     habit_id: uuid.UUID,
-    service: HabitService = Depends(get_habit_service),
-) -> HabitResponse:
-    habit = service.get_habit(habit_id)
-    if not habit:
+    request: Request,
+    service: AsyncHabitService = Depends(get_async_habit_service),
+) -> Response:
+    version = await service.habit_version(habit_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Habit not found")
-    return to_response(habit)
+
+    async def render() -> tuple[bytes, dict[str, str]]:
+        habit = await service.get_habit(habit_id)
+        if not habit:
+            raise HTTPException(status_code=404, detail="Habit not found")
+        versions = await service.subtree_versions(habit)
+        return tree_serializer.render(habit, versions, service.storage_id), {}
+
+    return await conditional_json(request, f"habit:{habit_id}", version, render)
 
 
 @router.put("/habits/{habit_id}", response_model=HabitResponse)
-def update_habit(
+async def update_habit(
     habit_id: uuid.UUID,
     request: CreateHabitRequest,
-    service: HabitService = Depends(get_habit_service),
-) -> HabitResponse:
-    updated = service.update_habit(
-        habit_id,
-        name=request.name,
-        description=request.description,
-        category=request.category,
-        goal=request.goal,
-    )
+    service: AsyncHabitService = Depends(get_async_habit_service),
+) -> Response:
+    try:
+        updated = await service.update_habit(
+            habit_id,
+            name=request.name,
+            description=request.description,
+            category=request.category,
+            goal=request.goal,
+        )
+    except RetentionError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
     if not updated:
         raise HTTPException(status_code=404, detail="Habit not found")
-    return to_response(updated)
+    return FastJSONResponse(component_payload(updated))
 
 
 @router.delete("/habits/{habit_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_habit(
+async def delete_habit(
     habit_id: uuid.UUID,
-    service: HabitService = Depends(get_habit_service),
+    service: AsyncHabitService = Depends(get_async_habit_service),
 ) -> None:
-    service.delete_habit(habit_id)
+    await service.delete_habit(habit_id)
 
 
 @router.post("/habits/{habit_id}/subhabits", status_code=status.HTTP_200_OK)
-def add_subhabit(
+async def add_subhabit(
     habit_id: uuid.UUID,
     child_id: uuid.UUID,
-    service: HabitService = Depends(get_habit_service),
+    service: AsyncHabitService = Depends(get_async_habit_service),
 ) -> None:
     try:
-        service.add_subhabit(habit_id, child_id)
+        await service.add_subhabit(habit_id, child_id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
+@router.delete(
+    "/habits/{habit_id}/subhabits/{child_id}", status_code=status.HTTP_204_NO_CONTENT
+)
+async def remove_subhabit(
+    habit_id: uuid.UUID,
+    child_id: uuid.UUID,
+    service: AsyncHabitService = Depends(get_async_habit_service),
+) -> None:
+    try:
+        await service.remove_subhabit(habit_id, child_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+
+
+@router.get("/habits/{habit_id}/parents", response_model=list[HabitResponse])
+async def list_parents(
+    habit_id: uuid.UUID,
+    service: AsyncHabitService = Depends(get_async_habit_service),
+) -> Response:
+    parents = await service.get_parents(habit_id)
+    return FastJSONResponse([component_payload(parent) for parent in parents])
+
+
 @router.post(
     "/habits/{habit_id}/logs",
     response_model=LogResponse,
     status_code=status.HTTP_201_CREATED,
 )
-def log_progress(
+async def log_progress(
     habit_id: uuid.UUID,
     request: LogRequest,
-    service: HabitService = Depends(get_habit_service),
+    service: AsyncHabitService = Depends(get_async_habit_service),
 ) -> LogResponse:
-    from datetime import date as date_cls
-
     log_date = None
     if request.date:
-        log_date = date_cls.fromisoformat(request.date)
+        log_date = date.fromisoformat(request.date)
+
+    try:
+        log = await service.log_progress(habit_id, request.value, log_date)
+    except RetentionError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return _log_response(log)
+
+
+@router.post(
+    "/logs/batch",
+    response_model=BatchLogResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def log_progress_batch(
+    request: BatchLogRequest,
+    service: AsyncHabitService = Depends(get_async_habit_service),
+) -> BatchLogResponse:
+    try:
+        saved = await service.log_progress_batch(
+            (item.habit_id, item.value, item.date) for item in request.logs
+        )
+    except RetentionError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return BatchLogResponse(saved=saved)
 
-    log = service.log_progress(habit_id, request.value, log_date)
-    return LogResponse(habit_id=log.habit_id, date=log.date, value=log.value)
+
+@router.post(
+    "/logs/stream",
+    response_model=BatchLogResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def log_progress_stream(
+    request: Request,
+    service: AsyncHabitService = Depends(get_async_habit_service),
+) -> BatchLogResponse:
+    saved = 0
+    line_number = 0
+    chunk: list[tuple[uuid.UUID, float, date | None]] = []
+    buffer = b""
+    async for data in request.stream():
+        *lines, buffer = (buffer + data).split(b"\n")
+        for line in lines:
+            line_number += 1
+            entry = _parse_stream_line(line, line_number, saved)
+            if entry is not None:
+                chunk.append(entry)
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            saved += await _save_stream_chunk(service, chunk, saved)
+            chunk = []
+    entry = _parse_stream_line(buffer, line_number + 1, saved)
+    if entry is not None:
+        chunk.append(entry)
+    if chunk:
+        saved += await _save_stream_chunk(service, chunk, saved)
+    return BatchLogResponse(saved=saved)
+
+
+async def _save_stream_chunk(
+    service: AsyncHabitService,
+    chunk: list[tuple[uuid.UUID, float, date | None]],
+    saved: int,
+) -> int:
+    try:
+        return await service.log_progress_batch(chunk)
+    except RetentionError as e:
+        raise HTTPException(
+            status_code=409, detail={"saved": saved, "error": str(e)}
+        ) from e
+
+
+def _parse_stream_line(
+    line: bytes, line_number: int, saved: int
+) -> tuple[uuid.UUID, float, date | None] | None:
+    if not line.strip():
+        return None
+    try:
+        item = BatchLogItem.model_validate_json(line)
+    except ValidationError as e:
+        detail = {
+            "line": line_number,
+            "saved": saved,
+            "errors": e.errors(
+                include_url=False, include_context=False, include_input=False
+            ),
+        }
+        raise HTTPException(status_code=422, detail=detail) from e
+    return item.habit_id, item.value, item.date
 
 
 @router.get("/habits/{habit_id}/logs", response_model=list[LogResponse])
-def list_logs(
+async def list_logs(
     habit_id: uuid.UUID,
-    service: HabitService = Depends(get_habit_service),
-) -> list[LogResponse]:
-    logs = service.get_logs(habit_id)
-    return [
-        LogResponse(
-            habit_id=log_entry.habit_id, date=log_entry.date, value=log_entry.value
+    response: Response,
+    start: date | None = Query(None, alias="from"),
+    end: date | None = Query(None, alias="to"),
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    stream: bool = False,
+    service: AsyncHabitService = Depends(get_async_habit_service),
+) -> list[LogResponse] | Response:
+    if cursor is not None:
+        try:
+            after = date.fromisoformat(decode_cursor(cursor))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from e
+        next_day = after + timedelta(days=1)
+        start = next_day if start is None else max(start, next_day)
+    if stream:
+        return StreamingResponse(
+            _export_logs(service, habit_id, start, end),
+            media_type="application/json",
         )
-        for log_entry in logs
-    ]
+    if limit is None and cursor is None:
+        return [
+            _log_response(log) for log in await service.get_logs(habit_id, start, end)
+        ]
+
+    page_size = limit or MAX_PAGE_SIZE
+    logs = await service.get_logs(habit_id, start, end, page_size + 1)
+    if len(logs) > page_size:
+        logs = logs[:page_size]
+        response.headers["X-Next-Cursor"] = encode_cursor(logs[-1].date.isoformat())
+    return [_log_response(log) for log in logs]
+
+
+def _log_response(log: Log) -> LogResponse:
+    return LogResponse(habit_id=log.habit_id, date=log.date, value=log.value)
+
+
+async def _export_logs(
+    service: AsyncHabitService,
+    habit_id: uuid.UUID,
+    start: date | None,
+    end: date | None,
+) -> AsyncIterator[str]:
+    yield "["
+    separator = ""
+    while True:
+        page = await service.get_logs(habit_id, start, end, EXPORT_PAGE_SIZE)
+        for log in page:
+            yield separator + _log_response(log).model_dump_json()
+            separator = ","
+        if len(page) < EXPORT_PAGE_SIZE:
+            break
+        start = page[-1].date + timedelta(days=1)
+    yield "]"
 
 
 @router.get("/habits/{habit_id}/stats", response_model=StatResponse)
-def get_stats(
+async def get_stats(
     habit_id: uuid.UUID,
+    request: Request,
     stat_type: str = "total",
-    service: HabitService = Depends(get_habit_service),
-) -> StatResponse:
+    service: AsyncHabitService = Depends(get_async_habit_service),
+) -> Response:
+    async def render() -> tuple[bytes, dict[str, str]]:
+        try:
+            value = await service.get_stats(habit_id, stat_type)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+        return StatResponse(
+            stat_type=stat_type, value=value
+        ).model_dump_json().encode(), {}
+
+    version = await service.habit_version(habit_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Habit not found")
+    version = f"{version}-{date.today().isoformat()}"
+    key = f"stats:{habit_id}:{stat_type}"
+    return await conditional_json(request, key, version, render)
+
+
+@router.get("/stats", response_model=BulkStatResponse)
+async def get_all_stats(
+    stat_type: str = "total",
+    category: str | None = None,
+    service: AsyncHabitService = Depends(get_async_habit_service),
+) -> Response:
     try:
-        value = service.get_stats(habit_id, stat_type)
-        return StatResponse(stat_type=stat_type, value=value)
+        results = await service.get_all_stats(stat_type, category)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    stats = [{"habit_id": str(habit_id), "value": value} for habit_id, value in results]
+    return FastJSONResponse({"stat_type": stat_type, "stats": stats})
+
+
+@router.get("/leaderboards/{metric}", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    metric: str,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    service: AsyncHabitService = Depends(get_async_habit_service),
+) -> Response:
+    try:
+        top = await service.get_leaderboard(metric, limit)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
+    entries = [
+        {"habit_id": str(habit_id), "rank": rank, "value": value}
+        for rank, (habit_id, value) in enumerate(top, start=1)
+    ]
+    return FastJSONResponse({"metric": metric, "entries": entries})
+
+
+@router.get("/leaderboards/{metric}/habits/{habit_id}", response_model=LeaderboardEntry)
+async def get_leaderboard_rank(
+    metric: str,
+    habit_id: uuid.UUID,
+    service: AsyncHabitService = Depends(get_async_habit_service),
+) -> LeaderboardEntry:
+    try:
+        ranked = await service.get_rank(metric, habit_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    if ranked is None:
+        raise HTTPException(status_code=404, detail="Habit not found")
+    rank, value = ranked
+    return LeaderboardEntry(habit_id=habit_id, rank=rank, value=value)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
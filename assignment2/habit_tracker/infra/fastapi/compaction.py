@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager, suppress
+
+from ...core.retention import RetentionPolicy
+from ...core.services import AsyncHabitService, HabitService
+
+COMPACTION_INTERVAL = 30.0
+COMPACTION_CHUNK = 1000
+
+
+async def drain(step: Callable[[int], Awaitable[int]], limit: int) -> int:
+    processed = 0
+    while True:
+        chunk = await step(limit)
+        processed += chunk
+        if chunk < limit:
+            return processed
+        await asyncio.sleep(0)
+
+
+async def compact_once(
+    service: AsyncHabitService, limit: int = COMPACTION_CHUNK
+) -> int:
+    return await drain(service.compact, limit)
+
+
+async def roll_up_once(
+    service: AsyncHabitService,
+    policy: RetentionPolicy,
+    limit: int = COMPACTION_CHUNK,
+) -> int:
+    async def step(chunk: int) -> int:
+        return await service.apply_retention(policy, limit=chunk)
+
+    return await drain(step, limit)
+
+
+async def compaction_loop(
+    service: HabitService,
+    interval: float = COMPACTION_INTERVAL,
+    limit: int = COMPACTION_CHUNK,
+    retention: RetentionPolicy | None = None,
+) -> None:
+    async_service = AsyncHabitService(service)
+    while True:
+        await asyncio.sleep(interval)
+        if retention is not None:
+            await roll_up_once(async_service, retention, limit)
+        await compact_once(async_service, limit)
+
+
+@asynccontextmanager
+async def background_compaction(
+    service: HabitService,
+    interval: float = COMPACTION_INTERVAL,
+    limit: int = COMPACTION_CHUNK,
+    retention: RetentionPolicy | None = None,
+) -> AsyncIterator[None]:
+    task = asyncio.create_task(compaction_loop(service, interval, limit, retention))
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
@@ -1,10 +1,52 @@
 from __future__ import annotations
 
-from ...core.services import HabitService
+import os
+from functools import cache
+
+from fastapi import Depends
+
+from ...core.repository import HabitRepository
+from ...core.services import AsyncHabitService, HabitService
+from ...core.singleflight import SingleFlight
+from ...infra.in_memory.durable import DurableInMemoryHabitRepository
 from ...infra.in_memory.repository import InMemoryHabitRepository
+from ...infra.in_memory.sharded import ShardedInMemoryHabitRepository
+from ...infra.instrumented import InstrumentedHabitRepository
+from ...infra.metrics import stats_requests
+from ...infra.sqlite.repository import SqliteHabitRepository
+
+
+def create_repository(
+    backend: str | None = None, location: str | None = None
+) -> HabitRepository:
+    backend = backend or os.environ.get("HABIT_TRACKER_STORAGE", "sharded")
+    if backend == "sqlite":
+        path = location or os.environ.get("HABIT_TRACKER_DB_PATH", "habit_tracker.db")
+        return SqliteHabitRepository(path)
+    if backend == "durable":
+        directory = location or os.environ.get(
+            "HABIT_TRACKER_DATA_DIR", "habit_tracker_data"
+        )
+        return DurableInMemoryHabitRepository(directory)
+    if backend == "sharded":
+        shards = int(os.environ.get("HABIT_TRACKER_SHARDS", "16"))
+        return ShardedInMemoryHabitRepository(shards)
+    if backend != "memory":
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return InMemoryHabitRepository()
+
+
+@cache
+def default_service() -> HabitService:
+    flight = SingleFlight(lambda outcome: stats_requests.inc((outcome,)))
+    return HabitService(InstrumentedHabitRepository(create_repository()), flight)
+
 
-_repo = InMemoryHabitRepository()
+async def get_habit_service() -> HabitService:
+    return default_service()
 
 
-def get_habit_service() -> HabitService:
-    return HabitService(_repo)
+async def get_async_habit_service(
+    service: HabitService = Depends(get_habit_service),
+) -> AsyncHabitService:
+    return AsyncHabitService(service)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import datetime as dt
 import uuid
 from datetime import date
 
@@ -40,6 +41,20 @@ class LogRequest(BaseModel):
     date: str | None = None
 
 
+class BatchLogItem(BaseModel):
+    habit_id: uuid.UUID
+    value: float
+    date: dt.date | None = None
+
+
+class BatchLogRequest(BaseModel):
+    logs: list[BatchLogItem]
+
+
+class BatchLogResponse(BaseModel):
+    saved: int
+
+
 class LogResponse(BaseModel):
     habit_id: uuid.UUID
     date: date
@@ -49,3 +64,24 @@ class LogResponse(BaseModel):
 class StatResponse(BaseModel):
     stat_type: str
     value: float | int
+
+
+class HabitStat(BaseModel):
+    habit_id: uuid.UUID
+    value: float | int
+
+
+class BulkStatResponse(BaseModel):
+    stat_type: str
+    stats: list[HabitStat]
+
+
+class LeaderboardEntry(BaseModel):
+    habit_id: uuid.UUID
+    rank: int
+    value: float | int
+
+
+class LeaderboardResponse(BaseModel):
+    metric: str
+    entries: list[LeaderboardEntry]
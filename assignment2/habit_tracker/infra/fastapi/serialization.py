@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from ...core.habits import Habit, HabitComponent, Routine
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return bytes(orjson.dumps(content))
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _fields(component: HabitComponent) -> dict[str, Any]:
+    fields: dict[str, Any] = {
+        "id": str(component.id),
+        "name": component.name,
+        "description": component.description,
+        "category": getattr(component, "category", ""),
+        "created_at": component.created_at.isoformat(),
+        "type": None,
+        "goal": None,
+    }
+    if isinstance(component, Habit):
+        fields["type"] = component.type.value
+        fields["goal"] = component.goal
+    return fields
+
+
+def component_payload(component: HabitComponent) -> dict[str, Any]:
+    payload = _fields(component)
+    payload["children"] = (
+        [component_payload(child) for child in component.children]
+        if isinstance(component, Routine)
+        else []
+    )
+    return payload
+
+
+class TreeSerializer:
+    def __init__(self, max_entries: int = 4096) -> None:
+        self._fragments: OrderedDict[tuple[str, uuid.UUID, int], bytes] = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def render(
+        self,
+        component: HabitComponent,
+        versions: Mapping[uuid.UUID, int],
+        storage_id: str,
+    ) -> bytes:
+        head = self._fragment(
+            component, (storage_id, component.id, versions[component.id])
+        )
+        children = b",".join(
+            self.render(child, versions, storage_id)
+            for child in component.get_children()
+        )
+        return head + children + b"]}"
+
+    def _fragment(
+        self, component: HabitComponent, key: tuple[str, uuid.UUID, int]
+    ) -> bytes:
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self._fragments.move_to_end(key)
+                return fragment
+        fragment = dumps(_fields(component))[:-1] + b',"children":['
+        with self._lock:
+            self._fragments[key] = fragment
+            while len(self._fragments) > self._max_entries:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def clear(self) -> None:
+        with self._lock:
+            self._fragments.clear()
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+
+tree_serializer = TreeSerializer()
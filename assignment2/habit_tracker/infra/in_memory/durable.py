@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import uuid
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass, replace
+from datetime import date
+from functools import partial
+from pathlib import Path
+from typing import Any, ParamSpec, TypeVar
+
+from ...core.habits import Habit, HabitComponent, HabitType, Log, Routine
+from ...core.query import HabitQuery
+from ...core.retention import GRANULARITIES, Bucket
+from ...core.stats import LogAggregate, LogWindowIndex, WindowStrategy
+from .log_index import DailyLogIndex
+from .repository import InMemoryHabitRepository
+from .wal import WriteAheadLog
+
+OP_SAVE = 1
+OP_DELETE = 2
+OP_LOG = 3
+OP_ROLLUP = 4
+
+LOG_RECORD = struct.Struct("<B16sid")
+DELETE_RECORD = struct.Struct("<B16s")
+ROLLUP_RECORD = struct.Struct("<B16siB")
+SNAPSHOT_MAGIC = b"HTSNAP1\0"
+SNAPSHOT_HEADER = struct.Struct("<8sQ")
+SNAPSHOT_SERIES = struct.Struct("<16sI")
+SNAPSHOT_ARCHIVE = struct.Struct("<16siI")
+SNAPSHOT_BUCKET = struct.Struct("<iddqqq")
+SNAPSHOT_NAME = re.compile(r"snapshot-(\d{8})\.bin")
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+@dataclass
+class _SnapshotState:
+    habits: list[dict[str, Any]]
+    series: list[tuple[uuid.UUID, int, bytes, bytes]]
+    archives: list[tuple[uuid.UUID, int, list[Bucket]]]
+
+
+class DurableInMemoryHabitRepository(InMemoryHabitRepository):
+    blocking = True
+
+    def __init__(
+        self,
+        directory: str | Path,
+        snapshot_interval: int = 1_000_000,
+        segment_bytes: int = 64 * 1024 * 1024,
+        fsync: bool = True,
+    ) -> None:
+        super().__init__()
+        self.directory = Path(directory)
+        self._snapshot_interval = snapshot_interval
+        self._since_snapshot = 0
+        self._lock = threading.RLock()
+        self._checkpoint_lock = threading.Lock()
+        self._checkpointer: threading.Thread | None = None
+        self._wal = WriteAheadLog(self.directory, segment_bytes, fsync)
+        self._recover()
+
+    def save(self, habit: HabitComponent) -> None:
+        check = partial(self.check_goal, habit)
+        self._write([_encode_save(habit)], partial(self._store, habit), check)
+
+    def delete(self, habit_id: uuid.UUID) -> None:
+        record = DELETE_RECORD.pack(OP_DELETE, habit_id.bytes)
+        self._write([record], partial(InMemoryHabitRepository.delete, self, habit_id))
+
+    def save_log(self, log: Log) -> None:
+        apply = partial(InMemoryHabitRepository.save_log, self, log)
+        self._write([_encode_log(log)], apply, partial(self.check_horizons, [log]))
+
+    def save_logs(self, logs: Iterable[Log]) -> int:
+        batch = list(logs)
+        records = [_encode_log(log) for log in batch]
+        apply = partial(InMemoryHabitRepository.save_logs, self, batch)
+        self._write(records, apply, partial(self.check_horizons, batch))
+        return len(batch)
+
+    def roll_up(self, cutoff: date, granularity: str, limit: int = 1000) -> int:
+        code = GRANULARITIES.index(granularity)
+        ordinal = cutoff.toordinal()
+        with self._lock:
+            candidates = self._rollup_candidates(ordinal)[:limit]
+        for habit_id in candidates:
+            record = ROLLUP_RECORD.pack(OP_ROLLUP, habit_id.bytes, ordinal, code)
+            apply = partial(self._roll_up_habit, habit_id, ordinal, granularity)
+            self._write([record], apply)
+        return len(candidates)
+
+    def compact(
+        self,
+        limit: int = 1000,
+        exists: Callable[[uuid.UUID], bool] | None = None,
+    ) -> int:
+        return self._locked(super().compact, limit, exists)
+
+    def get(self, habit_id: uuid.UUID) -> HabitComponent | None:
+        return self._locked(super().get, habit_id)
+
+    def list_all(self) -> list[HabitComponent]:
+        return self._locked(super().list_all)
+
+    def list_page(
+        self, limit: int, after: uuid.UUID | None = None
+    ) -> list[HabitComponent]:
+        return self._locked(super().list_page, limit, after)
+
+    def find(
+        self,
+        query: HabitQuery,
+        limit: int | None = None,
+        after: uuid.UUID | None = None,
+    ) -> list[HabitComponent]:
+        return self._locked(super().find, query, limit, after)
+
+    def get_parent_ids(self, habit_id: uuid.UUID) -> set[uuid.UUID]:
+        return self._locked(super().get_parent_ids, habit_id)
+
+    def get_logs(
+        self,
+        habit_id: uuid.UUID,
+        start: date | None = None,
+        end: date | None = None,
+        limit: int | None = None,
+    ) -> list[Log]:
+        return self._locked(super().get_logs, habit_id, start, end, limit)
+
+    def get_log_index(self, habit_id: uuid.UUID) -> DailyLogIndex:
+        return self._locked(super().get_log_index, habit_id)
+
+    def get_rollups(self, habit_id: uuid.UUID) -> list[Bucket]:
+        return self._locked(super().get_rollups, habit_id)
+
+    def get_aggregate(self, habit_id: uuid.UUID, goal: float) -> LogAggregate:
+        return replace(self._locked(super().get_aggregate, habit_id, goal))
+
+    def get_aggregates(
+        self, goals: Mapping[uuid.UUID, float]
+    ) -> dict[uuid.UUID, LogAggregate]:
+        with self._lock:
+            return {
+                habit_id: replace(super().get_aggregate(habit_id, goal))
+                for habit_id, goal in goals.items()
+            }
+
+    def get_window_index(self, habit_id: uuid.UUID, goal: float) -> LogWindowIndex:
+        return self._locked(super().get_window_index, habit_id, goal).copy()
+
+    def get_window_stat(
+        self, habit_id: uuid.UUID, goal: float, strategy: WindowStrategy
+    ) -> Any:
+        with self._lock:
+            return strategy.from_window(super().get_window_index(habit_id, goal))
+
+    def checkpoint(self) -> None:
+        with self._checkpoint_lock:
+            with self._lock:
+                sequence = self._wal.rotate()
+                state = self._freeze()
+                self._since_snapshot = 0
+            self._write_snapshot(sequence, state)
+            self._wal.discard_before(sequence)
+            for existing in self._snapshots():
+                if existing < sequence:
+                    _snapshot_path(self.directory, existing).unlink()
+
+    def close(self) -> None:
+        with self._lock:
+            checkpointer = self._checkpointer
+        if checkpointer is not None:
+            checkpointer.join()
+        self._wal.close()
+
+    def _locked(self, fn: Callable[P, R], *args: P.args, **kwargs: P.kwargs) -> R:
+        with self._lock:
+            return fn(*args, **kwargs)
+
+    def _write(
+        self,
+        records: list[bytes],
+        apply: Callable[[], object],
+        check: Callable[[], None] | None = None,
+    ) -> None:
+        with self._lock:
+            if check is not None:
+                check()
+            lsn = 0
+            for record in records:
+                lsn = self._wal.append(record)
+            apply()
+            self._since_snapshot += len(records)
+            due = self._since_snapshot >= self._snapshot_interval
+        self._wal.sync(lsn)
+        if due:
+            self._checkpoint_in_background()
+
+    def _checkpoint_in_background(self) -> None:
+        with self._lock:
+            if self._checkpointer is not None and self._checkpointer.is_alive():
+                return
+            self._checkpointer = threading.Thread(target=self.checkpoint, daemon=True)
+            self._checkpointer.start()
+
+    def _freeze(self) -> _SnapshotState:
+        return _SnapshotState(
+            habits=[_component_record(c) for c in self._habits.values()],
+            series=[
+                (habit_id, len(index), index.days.tobytes(), index.values.tobytes())
+                for habit_id, index in self._logs.items()
+            ],
+            archives=[
+                (
+                    habit_id,
+                    self._horizons[habit_id],
+                    [(period, replace(aggregate)) for period, aggregate in archive],
+                )
+                for habit_id, archive in self._archives.items()
+            ],
+        )
+
+    def _recover(self) -> None:
+        children: dict[uuid.UUID, list[uuid.UUID]] = {}
+        snapshots = self._snapshots()
+        start = 0
+        if snapshots:
+            start = snapshots[-1]
+            self._load_snapshot(_snapshot_path(self.directory, start), children)
+        for record in self._wal.replay(start):
+            self._apply(record, children)
+        for routine_id, child_ids in children.items():
+            routine = self._habits.get(routine_id)
+            if isinstance(routine, Routine):
+                routine.children = [
+                    self._habits[child_id]
+                    for child_id in child_ids
+                    if child_id in self._habits
+                ]
+                self._link_children(routine)
+
+    def _apply(self, record: bytes, children: dict[uuid.UUID, list[uuid.UUID]]) -> None:
+        op = record[0]
+        if op == OP_LOG:
+            _, habit_id, day, value = LOG_RECORD.unpack(record)
+            log = Log(uuid.UUID(bytes=habit_id), date.fromordinal(day), value)
+            InMemoryHabitRepository.save_log(self, log)
+        elif op == OP_SAVE:
+            component = _decode_component(json.loads(record[1:]), children)
+            self._store(component)
+        elif op == OP_DELETE:
+            _, habit_id = DELETE_RECORD.unpack(record)
+            InMemoryHabitRepository.delete(self, uuid.UUID(bytes=habit_id))
+            children.pop(uuid.UUID(bytes=habit_id), None)
+        elif op == OP_ROLLUP:
+            _, habit_id, cutoff, code = ROLLUP_RECORD.unpack(record)
+            self._roll_up_habit(uuid.UUID(bytes=habit_id), cutoff, GRANULARITIES[code])
+
+    def _snapshots(self) -> list[int]:
+        found = (SNAPSHOT_NAME.fullmatch(p.name) for p in self.directory.iterdir())
+        return sorted(int(match.group(1)) for match in found if match)
+
+    def _write_snapshot(self, sequence: int, state: _SnapshotState) -> None:
+        path = _snapshot_path(self.directory, sequence)
+        temporary = path.with_suffix(".tmp")
+        habits = json.dumps(state.habits).encode()
+        with temporary.open("wb") as file:
+            file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(habits)))
+            file.write(habits)
+            file.write(struct.pack("<I", len(state.series)))
+            for habit_id, count, days, values in state.series:
+                file.write(SNAPSHOT_SERIES.pack(habit_id.bytes, count))
+                file.write(days)
+                file.write(values)
+            file.write(struct.pack("<I", len(state.archives)))
+            for habit_id, horizon, archive in state.archives:
+                file.write(SNAPSHOT_ARCHIVE.pack(habit_id.bytes, horizon, len(archive)))
+                for period, aggregate in archive:
+                    file.write(
+                        SNAPSHOT_BUCKET.pack(
+                            period.toordinal(),
+                            aggregate.goal,
+                            aggregate.total,
+                            aggregate.compliant,
+                            aggregate.count,
+                            aggregate.streak,
+                        )
+                    )
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+
+    def _load_snapshot(
+        self, path: Path, children: dict[uuid.UUID, list[uuid.UUID]]
+    ) -> None:
+        with (
+            path.open("rb") as file,
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+        ):
+            view = memoryview(mapped)
+            try:
+                magic, habits_length = SNAPSHOT_HEADER.unpack_from(view, 0)
+                if magic != SNAPSHOT_MAGIC:
+                    raise ValueError(f"Not a habit snapshot: {path}")
+                offset = SNAPSHOT_HEADER.size
+                records = json.loads(bytes(view[offset : offset + habits_length]))
+                for record in records:
+                    self._store(_decode_component(record, children))
+                offset += habits_length
+                (series,) = struct.unpack_from("<I", view, offset)
+                offset += 4
+                for _ in range(series):
+                    raw_id, count = SNAPSHOT_SERIES.unpack_from(view, offset)
+                    offset += SNAPSHOT_SERIES.size
+                    index = DailyLogIndex(uuid.UUID(bytes=raw_id))
+                    days_end = offset + count * index.days.itemsize
+                    values_end = days_end + count * index.values.itemsize
+                    index.days.frombytes(view[offset:days_end])
+                    index.values.frombytes(view[days_end:values_end])
+                    self._logs[index.habit_id] = index
+                    offset = values_end
+                if offset < len(view):
+                    self._load_archives(view, offset)
+            finally:
+                view.release()
+
+    def _load_archives(self, view: memoryview, offset: int) -> None:
+        (archives,) = struct.unpack_from("<I", view, offset)
+        offset += 4
+        for _ in range(archives):
+            raw_id, horizon, count = SNAPSHOT_ARCHIVE.unpack_from(view, offset)
+            offset += SNAPSHOT_ARCHIVE.size
+            habit_id = uuid.UUID(bytes=raw_id)
+            archive = self._archives[habit_id] = []
+            for _ in range(count):
+                period, goal, total, compliant, entries, streak = (
+                    SNAPSHOT_BUCKET.unpack_from(view, offset)
+                )
+                offset += SNAPSHOT_BUCKET.size
+                aggregate = LogAggregate(goal, total, compliant, entries, streak)
+                archive.append((date.fromordinal(period), aggregate))
+            self._horizons[habit_id] = horizon
+
+
+def _snapshot_path(directory: Path, sequence: int) -> Path:
+    return directory / f"snapshot-{sequence:08d}.bin"
+
+
+def _encode_log(log: Log) -> bytes:
+    return LOG_RECORD.pack(OP_LOG, log.habit_id.bytes, log.date.toordinal(), log.value)
+
+
+def _encode_save(component: HabitComponent) -> bytes:
+    return bytes([OP_SAVE]) + json.dumps(_component_record(component)).encode()
+
+
+def _component_record(component: HabitComponent) -> dict[str, Any]:
+    record: dict[str, Any] = {
+        "id": str(component.id),
+        "name": component.name,
+        "description": component.description,
+        "category": getattr(component, "category", ""),
+        "created_at": component.created_at.toordinal(),
+    }
+    if isinstance(component, Habit):
+        record["type"] = component.type.value
+        record["goal"] = component.goal
+    else:
+        record["children"] = [str(child.id) for child in component.get_children()]
+    return record
+
+
+def _decode_component(
+    record: dict[str, Any], children: dict[uuid.UUID, list[uuid.UUID]]
+) -> HabitComponent:
+    habit_id = uuid.UUID(record["id"])
+    created_at = date.fromordinal(record["created_at"])
+    if "type" in record:
+        return Habit(
+            id=habit_id,
+            name=record["name"],
+            description=record["description"],
+            category=record["category"],
+            created_at=created_at,
+            type=HabitType(record["type"]),
+            goal=record["goal"],
+        )
+    children[habit_id] = [uuid.UUID(child) for child in record["children"]]
+    return Routine(
+        id=habit_id,
+        name=record["name"],
+        description=record["description"],
+        category=record["category"],
+        created_at=created_at,
+    )
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import uuid
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from ...core.habits import Log
+
+
+class DailyLogIndex:
+    def __init__(self, habit_id: uuid.UUID) -> None:
+        self.habit_id = habit_id
+        self.days = array("i")
+        self.values = array("d")
+
+    def copy(self) -> DailyLogIndex:
+        index = DailyLogIndex(self.habit_id)
+        index.days = array("i", self.days)
+        index.values = array("d", self.values)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def upsert(self, day: date, value: float) -> tuple[float | None, int]:
+        ordinal = day.toordinal()
+        position = bisect_left(self.days, ordinal)
+        newer = len(self.days) - position
+        if position < len(self.days) and self.days[position] == ordinal:
+            previous = self.values[position]
+            self.values[position] = value
+            return previous, newer - 1
+        self.days.insert(position, ordinal)
+        self.values.insert(position, value)
+        return None, newer
+
+    def all(self) -> list[Log]:
+        return self._views(0, len(self.days))
+
+    def between(
+        self, start: date | None, end: date | None, limit: int | None = None
+    ) -> list[Log]:
+        lo = 0 if start is None else bisect_left(self.days, start.toordinal())
+        hi = len(self.days)
+        if end is not None:
+            hi = bisect_right(self.days, end.toordinal())
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return self._views(lo, hi)
+
+    def streak(self, goal: float) -> int:
+        streak = 0
+        for value in reversed(self.values):
+            if value < goal:
+                break
+            streak += 1
+        return streak
+
+    def _views(self, lo: int, hi: int) -> list[Log]:
+        habit_id = self.habit_id
+        from_ordinal = date.fromordinal
+        return [
+            Log(habit_id=habit_id, date=from_ordinal(day), value=value)
+            for day, value in zip(self.days[lo:hi], self.values[lo:hi], strict=True)
+        ]
@@ -1,18 +1,53 @@
 from __future__ import annotations
 
 import uuid
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Callable, Iterable
+from datetime import date
 
-from ...core.habits import HabitComponent, Log
+from ...core.habits import Habit, HabitComponent, HabitType, Log, Routine
+from ...core.query import HabitQuery, name_key
 from ...core.repository import HabitRepository
+from ...core.retention import (
+    Bucket,
+    RetentionError,
+    check_goal,
+    fold_buckets,
+    merge_buckets,
+    roll_up_values,
+)
+from ...core.stats import LogAggregate, LogWindowIndex
+from .log_index import DailyLogIndex
+
+IndexKeys = tuple[str, HabitType | None, str]
 
 
 class InMemoryHabitRepository(HabitRepository):
     def __init__(self) -> None:
         self._habits: dict[uuid.UUID, HabitComponent] = {}
-        self._logs: dict[uuid.UUID, list[Log]] = {}
+        self._ordered_ids: list[uuid.UUID] = []
+        self._logs: dict[uuid.UUID, DailyLogIndex] = {}
+        self._aggregates: dict[uuid.UUID, LogAggregate] = {}
+        self._windows: dict[uuid.UUID, LogWindowIndex] = {}
+        self._versions: dict[uuid.UUID, int] = {}
+        self._parents: dict[uuid.UUID, set[uuid.UUID]] = {}
+        self._child_ids: dict[uuid.UUID, set[uuid.UUID]] = {}
+        self._archives: dict[uuid.UUID, list[Bucket]] = {}
+        self._horizons: dict[uuid.UUID, int] = {}
+        self._by_category: dict[str, set[uuid.UUID]] = {}
+        self._by_type: dict[HabitType, set[uuid.UUID]] = {}
+        self._names: list[tuple[str, uuid.UUID]] = []
+        self._index_keys: dict[uuid.UUID, IndexKeys] = {}
+        self._collection_version = 0
+        self.storage_id = uuid.uuid4().hex
 
     def save(self, habit: HabitComponent) -> None:
-        self._habits[habit.id] = habit
+        self.check_goal(habit)
+        self._store(habit)
+
+    def check_goal(self, habit: HabitComponent) -> None:
+        if isinstance(habit, Habit):
+            check_goal(self._archives.get(habit.id, ()), habit.goal)
 
     def get(self, habit_id: uuid.UUID) -> HabitComponent | None:
         return self._habits.get(habit_id)
@@ -20,14 +55,280 @@ class InMemoryHabitRepository(HabitRepository):
     def list_all(self) -> list[HabitComponent]:
         return list(self._habits.values())
 
+    def list_page(
+        self, limit: int, after: uuid.UUID | None = None
+    ) -> list[HabitComponent]:
+        start = 0 if after is None else bisect_right(self._ordered_ids, after)
+        ids = self._ordered_ids[start : start + limit]
+        return [self._habits[habit_id] for habit_id in ids]
+
+    def find(
+        self,
+        query: HabitQuery,
+        limit: int | None = None,
+        after: uuid.UUID | None = None,
+    ) -> list[HabitComponent]:
+        candidates: list[set[uuid.UUID]] = []
+        if query.category is not None:
+            candidates.append(self._by_category.get(query.category, set()))
+        if query.type is not None:
+            candidates.append(self._by_type.get(query.type, set()))
+        if query.name_prefix:
+            low, high = query.name_range()
+            lo = bisect_left(self._names, (low,))
+            hi = bisect_left(self._names, (high,))
+            candidates.append({habit_id for _, habit_id in self._names[lo:hi]})
+        ids = self._ordered_ids
+        if candidates:
+            candidates.sort(key=len)
+            ids = sorted(candidates[0].intersection(*candidates[1:]))
+        start = 0 if after is None else bisect_right(ids, after)
+        end = len(ids) if limit is None else start + limit
+        return [self._habits[habit_id] for habit_id in ids[start:end]]
+
     def delete(self, habit_id: uuid.UUID) -> None:
-        if habit_id in self._habits:
-            del self._habits[habit_id]
+        if habit_id not in self._habits:
+            return
+        del self._habits[habit_id]
+        del self._ordered_ids[bisect_left(self._ordered_ids, habit_id)]
+        self._bump(habit_id)
+        self._collection_version += 1
+        self._unindex(habit_id)
+        self._logs.pop(habit_id, None)
+        self._aggregates.pop(habit_id, None)
+        self._windows.pop(habit_id, None)
+        self._archives.pop(habit_id, None)
+        self._horizons.pop(habit_id, None)
+        for child_id in self._child_ids.pop(habit_id, set()):
+            self._parents.get(child_id, set()).discard(habit_id)
+        self.unlink_child(habit_id)
+
+    def unlink_child(self, child_id: uuid.UUID) -> set[uuid.UUID]:
+        parent_ids = self._parents.pop(child_id, set())
+        for parent_id in parent_ids:
+            parent = self._habits.get(parent_id)
+            if isinstance(parent, Routine):
+                parent.children[:] = [c for c in parent.children if c.id != child_id]
+                self._bump(parent_id)
+            self._child_ids.get(parent_id, set()).discard(child_id)
+        return parent_ids
+
+    def get_parent_ids(self, habit_id: uuid.UUID) -> set[uuid.UUID]:
+        return set(self._parents.get(habit_id, ()))
+
+    def compact(
+        self,
+        limit: int = 1000,
+        exists: Callable[[uuid.UUID], bool] | None = None,
+    ) -> int:
+        exists = exists or self._habits.__contains__
+        removed = 0
+        tables = (
+            self._logs,
+            self._aggregates,
+            self._windows,
+            self._archives,
+            self._horizons,
+        )
+        for table in tables:
+            orphans = [key for key in list(table) if key not in self._habits]
+            for key in orphans[: limit - removed]:
+                del table[key]
+                removed += 1
+        for child_id in list(self._parents):
+            if removed >= limit:
+                break
+            if not exists(child_id):
+                self.unlink_child(child_id)
+                removed += 1
+        return removed
+
+    def roll_up(self, cutoff: date, granularity: str, limit: int = 1000) -> int:
+        ordinal = cutoff.toordinal()
+        candidates = self._rollup_candidates(ordinal)[:limit]
+        for habit_id in candidates:
+            self._roll_up_habit(habit_id, ordinal, granularity)
+        return len(candidates)
+
+    def get_rollups(self, habit_id: uuid.UUID) -> list[Bucket]:
+        return list(self._archives.get(habit_id, ()))
 
     def save_log(self, log: Log) -> None:
-        if log.habit_id not in self._logs:
-            self._logs[log.habit_id] = []
-        self._logs[log.habit_id].append(log)
+        self._check_horizon(log)
+        index = self._logs.get(log.habit_id)
+        if index is None:
+            index = self._logs[log.habit_id] = DailyLogIndex(log.habit_id)
+        previous, newer = index.upsert(log.date, log.value)
+        self._bump(log.habit_id)
+        window = self._windows.get(log.habit_id)
+        if window is not None:
+            window.refresh(log.date)
+        aggregate = self._aggregates.get(log.habit_id)
+        if aggregate is None:
+            return
+        if previous is None:
+            aggregate.insert(log.value, newer)
+        elif not aggregate.replace(previous, log.value, newer):
+            aggregate.streak = self._streak(index, aggregate.goal)
+
+    def save_logs(self, logs: Iterable[Log]) -> int:
+        batch = list(logs)
+        self.check_horizons(batch)
+        saved = 0
+        for log in batch:
+            self.save_log(log)
+            saved += 1
+        return saved
+
+    def check_horizons(self, logs: Iterable[Log]) -> None:
+        for log in logs:
+            self._check_horizon(log)
+
+    def get_logs(
+        self,
+        habit_id: uuid.UUID,
+        start: date | None = None,
+        end: date | None = None,
+        limit: int | None = None,
+    ) -> list[Log]:
+        index = self._logs.get(habit_id)
+        if index is None:
+            return []
+        if start is None and end is None and limit is None:
+            return index.all()
+        return index.between(start, end, limit)
+
+    def get_log_index(self, habit_id: uuid.UUID) -> DailyLogIndex:
+        index = self._logs.get(habit_id)
+        return DailyLogIndex(habit_id) if index is None else index.copy()
+
+    def get_aggregate(self, habit_id: uuid.UUID, goal: float) -> LogAggregate:
+        aggregate = self._aggregates.get(habit_id)
+        if aggregate is None or aggregate.goal != goal:
+            aggregate = self._rebuild_aggregate(habit_id, goal)
+        return aggregate
+
+    def get_window_index(self, habit_id: uuid.UUID, goal: float) -> LogWindowIndex:
+        window = self._windows.get(habit_id)
+        if window is not None and window.goal == goal:
+            return window
+        index = self._logs.get(habit_id)
+        if index is None:
+            return LogWindowIndex(goal)
+        window = LogWindowIndex(goal, index.days, index.values)
+        self._windows[habit_id] = window
+        return window
+
+    def get_version(self, habit_id: uuid.UUID) -> int:
+        return self._versions.get(habit_id, 0)
+
+    def collection_version(self) -> int:
+        return self._collection_version
+
+    def _store(self, habit: HabitComponent) -> None:
+        if habit.id not in self._habits:
+            insort(self._ordered_ids, habit.id)
+        self._habits[habit.id] = habit
+        self._bump(habit.id)
+        self._collection_version += 1
+        self._index(habit)
+        if isinstance(habit, Routine):
+            self._link_children(habit)
+        aggregate = self._aggregates.get(habit.id)
+        if isinstance(habit, Habit) and aggregate and aggregate.goal != habit.goal:
+            self._rebuild_aggregate(habit.id, habit.goal)
+
+    def _index(self, habit: HabitComponent) -> None:
+        habit_type = habit.type if isinstance(habit, Habit) else None
+        keys = (getattr(habit, "category", ""), habit_type, name_key(habit.name))
+        if self._index_keys.get(habit.id) == keys:
+            return
+        self._unindex(habit.id)
+        category, _, name = keys
+        self._by_category.setdefault(category, set()).add(habit.id)
+        if habit_type is not None:
+            self._by_type.setdefault(habit_type, set()).add(habit.id)
+        insort(self._names, (name, habit.id))
+        self._index_keys[habit.id] = keys
+
+    def _unindex(self, habit_id: uuid.UUID) -> None:
+        keys = self._index_keys.pop(habit_id, None)
+        if keys is None:
+            return
+        category, habit_type, name = keys
+        _discard(self._by_category, category, habit_id)
+        if habit_type is not None:
+            _discard(self._by_type, habit_type, habit_id)
+        del self._names[bisect_left(self._names, (name, habit_id))]
+
+    def _link_children(self, routine: Routine) -> None:
+        current = {child.id for child in routine.children}
+        previous = self._child_ids.get(routine.id, set())
+        for child_id in previous - current:
+            self._parents.get(child_id, set()).discard(routine.id)
+        for child_id in current - previous:
+            self._parents.setdefault(child_id, set()).add(routine.id)
+        self._child_ids[routine.id] = current
+
+    def _bump(self, habit_id: uuid.UUID) -> None:
+        self._versions[habit_id] = self._versions.get(habit_id, 0) + 1
+
+    def _check_horizon(self, log: Log) -> None:
+        horizon = self._horizons.get(log.habit_id)
+        if horizon is not None and log.date.toordinal() < horizon:
+            raise RetentionError(
+                f"Logs before {date.fromordinal(horizon)} have been rolled up"
+            )
+
+    def _rollup_candidates(self, cutoff: int) -> list[uuid.UUID]:
+        return [
+            habit_id
+            for habit_id, index in self._logs.items()
+            if index.days
+            and index.days[0] < cutoff
+            and isinstance(self._habits.get(habit_id), Habit)
+        ]
+
+    def _roll_up_habit(
+        self, habit_id: uuid.UUID, cutoff: int, granularity: str
+    ) -> None:
+        habit = self._habits.get(habit_id)
+        index = self._logs.get(habit_id)
+        if not isinstance(habit, Habit) or index is None:
+            return
+        split = bisect_left(index.days, cutoff)
+        buckets = roll_up_values(
+            index.days[:split], index.values[:split], habit.goal, granularity
+        )
+        merge_buckets(self._archives.setdefault(habit_id, []), buckets)
+        del index.days[:split]
+        del index.values[:split]
+        self._horizons[habit_id] = max(self._horizons.get(habit_id, cutoff), cutoff)
+        self._aggregates.pop(habit_id, None)
+        self._windows.pop(habit_id, None)
+        self._bump(habit_id)
+
+    def _streak(self, index: DailyLogIndex, goal: float) -> int:
+        streak = index.streak(goal)
+        archive = self._archives.get(index.habit_id)
+        if archive and streak == len(index):
+            streak += fold_buckets(archive, goal).streak
+        return streak
+
+    def _rebuild_aggregate(self, habit_id: uuid.UUID, goal: float) -> LogAggregate:
+        index = self._logs.get(habit_id)
+        values = index.values if index is not None else ()
+        aggregate = LogAggregate.from_values(values, goal)
+        archive = self._archives.get(habit_id)
+        if archive:
+            aggregate = LogAggregate.chain(fold_buckets(archive, goal), aggregate)
+        self._aggregates[habit_id] = aggregate
+        return aggregate
+
 
-    def get_logs(self, habit_id: uuid.UUID) -> list[Log]:
-        return self._logs.get(habit_id, [])
+def _discard[K](index: dict[K, set[uuid.UUID]], key: K, habit_id: uuid.UUID) -> None:
+    members = index.get(key)
+    if members is not None:
+        members.discard(habit_id)
+        if not members:
+            del index[key]
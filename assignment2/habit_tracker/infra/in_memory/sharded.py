@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import heapq
+import threading
+import uuid
+from collections.abc import Iterable, Mapping
+from contextlib import ExitStack
+from dataclasses import replace
+from datetime import date
+from typing import Any
+
+from ...core.habits import HabitComponent, Log
+from ...core.query import HabitQuery
+from ...core.repository import HabitRepository
+from ...core.retention import Bucket
+from ...core.stats import LogAggregate, LogWindowIndex, WindowStrategy
+from .log_index import DailyLogIndex
+from .repository import InMemoryHabitRepository
+
+
+class _Shard:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.repo = InMemoryHabitRepository()
+        self.habits_snapshot: tuple[HabitComponent, ...] | None = None
+        self.log_snapshots: dict[uuid.UUID, DailyLogIndex] = {}
+
+    def habits(self) -> tuple[HabitComponent, ...]:
+        snapshot = self.habits_snapshot
+        if snapshot is None:
+            with self.lock:
+                snapshot = self.habits_snapshot
+                if snapshot is None:
+                    snapshot = tuple(self.repo.list_all())
+                    self.habits_snapshot = snapshot
+        return snapshot
+
+    def logs(self, habit_id: uuid.UUID) -> DailyLogIndex:
+        snapshot = self.log_snapshots.get(habit_id)
+        if snapshot is None:
+            with self.lock:
+                snapshot = self.log_snapshots.get(habit_id)
+                if snapshot is None:
+                    snapshot = self.repo.get_log_index(habit_id)
+                    self.log_snapshots[habit_id] = snapshot
+        return snapshot
+
+
+class ShardedInMemoryHabitRepository(HabitRepository):
+    def __init__(self, shard_count: int = 16) -> None:
+        self._shards = [_Shard() for _ in range(shard_count)]
+        self.storage_id = uuid.uuid4().hex
+
+    def _shard(self, habit_id: uuid.UUID) -> _Shard:
+        return self._shards[hash(habit_id) % len(self._shards)]
+
+    def save(self, habit: HabitComponent) -> None:
+        shard = self._shard(habit.id)
+        with shard.lock:
+            shard.repo.save(habit)
+            shard.habits_snapshot = None
+
+    def get(self, habit_id: uuid.UUID) -> HabitComponent | None:
+        return self._shard(habit_id).repo.get(habit_id)
+
+    def _exists(self, habit_id: uuid.UUID) -> bool:
+        return self.get(habit_id) is not None
+
+    def list_all(self) -> list[HabitComponent]:
+        return [habit for shard in self._shards for habit in shard.habits()]
+
+    def list_page(
+        self, limit: int, after: uuid.UUID | None = None
+    ) -> list[HabitComponent]:
+        pages = []
+        for shard in self._shards:
+            with shard.lock:
+                pages.append(shard.repo.list_page(limit, after))
+        merged = heapq.merge(*pages, key=lambda habit: habit.id)
+        return [habit for _, habit in zip(range(limit), merged, strict=False)]
+
+    def find(
+        self,
+        query: HabitQuery,
+        limit: int | None = None,
+        after: uuid.UUID | None = None,
+    ) -> list[HabitComponent]:
+        matches = []
+        for shard in self._shards:
+            with shard.lock:
+                matches.append(shard.repo.find(query, limit, after))
+        merged = heapq.merge(*matches, key=lambda habit: habit.id)
+        if limit is None:
+            return list(merged)
+        return [habit for _, habit in zip(range(limit), merged, strict=False)]
+
+    def delete(self, habit_id: uuid.UUID) -> None:
+        shard = self._shard(habit_id)
+        with shard.lock:
+            shard.repo.delete(habit_id)
+            shard.habits_snapshot = None
+            shard.log_snapshots.pop(habit_id, None)
+        for other in self._shards:
+            if other is shard:
+                continue
+            with other.lock:
+                other.repo.unlink_child(habit_id)
+
+    def roll_up(self, cutoff: date, granularity: str, limit: int = 1000) -> int:
+        rolled = 0
+        for shard in self._shards:
+            if rolled >= limit:
+                break
+            with shard.lock:
+                shard_rolled = shard.repo.roll_up(cutoff, granularity, limit - rolled)
+                if shard_rolled:
+                    shard.log_snapshots = {}
+            rolled += shard_rolled
+        return rolled
+
+    def get_rollups(self, habit_id: uuid.UUID) -> list[Bucket]:
+        shard = self._shard(habit_id)
+        with shard.lock:
+            return shard.repo.get_rollups(habit_id)
+
+    def compact(self, limit: int = 1000) -> int:
+        removed = 0
+        for shard in self._shards:
+            if removed >= limit:
+                break
+            with shard.lock:
+                removed += shard.repo.compact(limit - removed, self._exists)
+                stale = [key for key in shard.log_snapshots if not shard.repo.get(key)]
+                for key in stale:
+                    del shard.log_snapshots[key]
+        return removed
+
+    def get_parent_ids(self, habit_id: uuid.UUID) -> set[uuid.UUID]:
+        parent_ids: set[uuid.UUID] = set()
+        for shard in self._shards:
+            with shard.lock:
+                parent_ids |= shard.repo.get_parent_ids(habit_id)
+        return parent_ids
+
+    def save_log(self, log: Log) -> None:
+        shard = self._shard(log.habit_id)
+        with shard.lock:
+            shard.repo.save_log(log)
+            shard.log_snapshots.pop(log.habit_id, None)
+
+    def save_logs(self, logs: Iterable[Log]) -> int:
+        grouped: dict[int, list[Log]] = {}
+        for log in logs:
+            grouped.setdefault(hash(log.habit_id) % len(self._shards), []).append(log)
+        shards = [
+            (self._shards[position], grouped[position]) for position in sorted(grouped)
+        ]
+        with ExitStack() as stack:
+            for shard, _ in shards:
+                stack.enter_context(shard.lock)
+            for shard, shard_logs in shards:
+                shard.repo.check_horizons(shard_logs)
+            for shard, shard_logs in shards:
+                shard.repo.save_logs(shard_logs)
+                for log in shard_logs:
+                    shard.log_snapshots.pop(log.habit_id, None)
+        return sum(len(shard_logs) for shard_logs in grouped.values())
+
+    def get_logs(
+        self,
+        habit_id: uuid.UUID,
+        start: date | None = None,
+        end: date | None = None,
+        limit: int | None = None,
+    ) -> list[Log]:
+        snapshot = self._shard(habit_id).logs(habit_id)
+        if start is None and end is None and limit is None:
+            return snapshot.all()
+        return snapshot.between(start, end, limit)
+
+    def get_aggregate(self, habit_id: uuid.UUID, goal: float) -> LogAggregate:
+        shard = self._shard(habit_id)
+        with shard.lock:
+            return replace(shard.repo.get_aggregate(habit_id, goal))
+
+    def get_aggregates(
+        self, goals: Mapping[uuid.UUID, float]
+    ) -> dict[uuid.UUID, LogAggregate]:
+        grouped: dict[int, dict[uuid.UUID, float]] = {}
+        for habit_id, goal in goals.items():
+            grouped.setdefault(hash(habit_id) % len(self._shards), {})[habit_id] = goal
+        aggregates: dict[uuid.UUID, LogAggregate] = {}
+        for position, shard_goals in grouped.items():
+            shard = self._shards[position]
+            with shard.lock:
+                found = shard.repo.get_aggregates(shard_goals)
+                for habit_id, aggregate in found.items():
+                    aggregates[habit_id] = replace(aggregate)
+        return aggregates
+
+    def get_window_index(self, habit_id: uuid.UUID, goal: float) -> LogWindowIndex:
+        shard = self._shard(habit_id)
+        with shard.lock:
+            return shard.repo.get_window_index(habit_id, goal).copy()
+
+    def get_window_stat(
+        self, habit_id: uuid.UUID, goal: float, strategy: WindowStrategy
+    ) -> Any:
+        shard = self._shard(habit_id)
+        with shard.lock:
+            return shard.repo.get_window_stat(habit_id, goal, strategy)
+
+    def get_version(self, habit_id: uuid.UUID) -> int:
+        return self._shard(habit_id).repo.get_version(habit_id)
+
+    def collection_version(self) -> int:
+        return sum(shard.repo.collection_version() for shard in self._shards)
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import os
+import re
+import struct
+import threading
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+FRAME = struct.Struct("<II")
+SEGMENT_NAME = re.compile(r"wal-(\d{8})\.log")
+
+
+def segment_path(directory: Path, sequence: int) -> Path:
+    return directory / f"wal-{sequence:08d}.log"
+
+
+class WriteAheadLog:
+    def __init__(
+        self,
+        directory: str | Path,
+        segment_bytes: int = 64 * 1024 * 1024,
+        fsync: bool = True,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._segment_bytes = segment_bytes
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        self._sync_condition = threading.Condition()
+        self._syncing = False
+        self._written = 0
+        self._synced = 0
+        existing = self.segments()
+        self.sequence = existing[-1] if existing else 0
+        if existing:
+            _truncate_torn_tail(segment_path(self.directory, self.sequence), fsync)
+        self._file = self._open(self.sequence)
+
+    def segments(self) -> list[int]:
+        found = (SEGMENT_NAME.fullmatch(p.name) for p in self.directory.iterdir())
+        return sorted(int(match.group(1)) for match in found if match)
+
+    def append(self, payload: bytes) -> int:
+        frame = FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            if self._file.tell() + len(frame) > self._segment_bytes:
+                self._rotate()
+            self._file.write(frame)
+            self._written += 1
+            return self._written
+
+    def sync(self, lsn: int) -> None:
+        with self._sync_condition:
+            while self._synced < lsn:
+                if self._syncing:
+                    self._sync_condition.wait()
+                    continue
+                self._syncing = True
+                self._sync_condition.release()
+                try:
+                    target = self._flush()
+                finally:
+                    self._sync_condition.acquire()
+                    self._syncing = False
+                self._synced = max(self._synced, target)
+                self._sync_condition.notify_all()
+
+    def rotate(self) -> int:
+        with self._lock:
+            self._rotate()
+            return self.sequence
+
+    def replay(self, start: int = 0) -> Iterator[bytes]:
+        for sequence in self.segments():
+            if sequence >= start:
+                yield from _read_frames(segment_path(self.directory, sequence))
+
+    def discard_before(self, sequence: int) -> None:
+        for existing in self.segments():
+            if existing < sequence:
+                segment_path(self.directory, existing).unlink()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            if self._fsync:
+                os.fsync(self._file.fileno())
+            self._file.close()
+
+    def _flush(self) -> int:
+        with self._lock:
+            self._file.flush()
+            target = self._written
+            descriptor = os.dup(self._file.fileno())
+        try:
+            if self._fsync:
+                os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+        return target
+
+    def _rotate(self) -> None:
+        self._file.flush()
+        if self._fsync:
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self.sequence += 1
+        self._file = self._open(self.sequence)
+
+    def _open(self, sequence: int) -> BinaryIO:
+        return segment_path(self.directory, sequence).open("ab")
+
+
+def _read_frames(path: Path) -> Iterator[bytes]:
+    for payload, _ in _frames(path.read_bytes()):
+        yield payload
+
+
+def _frames(data: bytes) -> Iterator[tuple[bytes, int]]:
+    offset = 0
+    while offset + FRAME.size <= len(data):
+        length, checksum = FRAME.unpack_from(data, offset)
+        start = offset + FRAME.size
+        payload = data[start : start + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return
+        offset = start + length
+        yield payload, offset
+
+
+def _truncate_torn_tail(path: Path, fsync: bool) -> None:
+    data = path.read_bytes()
+    end = max((offset for _, offset in _frames(data)), default=0)
+    if end < len(data):
+        with path.open("r+b") as file:
+            file.truncate(end)
+            if fsync:
+                os.fsync(file.fileno())
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import time
+import uuid
+from collections.abc import Callable, Iterable, Mapping
+from datetime import date
+from typing import Any, ParamSpec, TypeVar
+
+from ..core.habits import HabitComponent, Log
+from ..core.query import HabitQuery
+from ..core.repository import HabitRepository
+from ..core.retention import Bucket
+from ..core.stats import LogAggregate, LogWindowIndex, WindowStrategy
+from .metrics import repository_latency, repository_log_sizes, repository_operations
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+class InstrumentedHabitRepository(HabitRepository):
+    def __init__(self, inner: HabitRepository) -> None:
+        self.inner = inner
+        self.blocking = inner.blocking
+        self.shared = inner.shared
+        self.storage_id = inner.storage_id
+
+    def _timed(
+        self, operation: str, fn: Callable[P, R], *args: P.args, **kwargs: P.kwargs
+    ) -> R:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = fn(*args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            repository_latency.observe(time.perf_counter() - started, (operation,))
+            repository_operations.inc((operation, outcome))
+
+    def save(self, habit: HabitComponent) -> None:
+        self._timed("save", self.inner.save, habit)
+
+    def get(self, habit_id: uuid.UUID) -> HabitComponent | None:
+        return self._timed("get", self.inner.get, habit_id)
+
+    def list_all(self) -> list[HabitComponent]:
+        return self._timed("list_all", self.inner.list_all)
+
+    def list_page(
+        self, limit: int, after: uuid.UUID | None = None
+    ) -> list[HabitComponent]:
+        return self._timed("list_page", self.inner.list_page, limit, after)
+
+    def find(
+        self,
+        query: HabitQuery,
+        limit: int | None = None,
+        after: uuid.UUID | None = None,
+    ) -> list[HabitComponent]:
+        return self._timed("find", self.inner.find, query, limit, after)
+
+    def delete(self, habit_id: uuid.UUID) -> None:
+        self._timed("delete", self.inner.delete, habit_id)
+
+    def get_parent_ids(self, habit_id: uuid.UUID) -> set[uuid.UUID]:
+        return self._timed("get_parent_ids", self.inner.get_parent_ids, habit_id)
+
+    def save_log(self, log: Log) -> None:
+        self._timed("save_log", self.inner.save_log, log)
+
+    def save_logs(self, logs: Iterable[Log]) -> int:
+        return self._timed("save_logs", self.inner.save_logs, logs)
+
+    def get_logs(
+        self,
+        habit_id: uuid.UUID,
+        start: date | None = None,
+        end: date | None = None,
+        limit: int | None = None,
+    ) -> list[Log]:
+        logs = self._timed("get_logs", self.inner.get_logs, habit_id, start, end, limit)
+        repository_log_sizes.observe(len(logs))
+        return logs
+
+    def get_aggregate(self, habit_id: uuid.UUID, goal: float) -> LogAggregate:
+        return self._timed("get_aggregate", self.inner.get_aggregate, habit_id, goal)
+
+    def get_aggregates(
+        self, goals: Mapping[uuid.UUID, float]
+    ) -> dict[uuid.UUID, LogAggregate]:
+        return self._timed("get_aggregates", self.inner.get_aggregates, goals)
+
+    def get_window_index(self, habit_id: uuid.UUID, goal: float) -> LogWindowIndex:
+        return self._timed(
+            "get_window_index", self.inner.get_window_index, habit_id, goal
+        )
+
+    def get_window_stat(
+        self, habit_id: uuid.UUID, goal: float, strategy: WindowStrategy
+    ) -> Any:
+        return self._timed(
+            "get_window_stat", self.inner.get_window_stat, habit_id, goal, strategy
+        )
+
+    def roll_up(self, cutoff: date, granularity: str, limit: int = 1000) -> int:
+        return self._timed("roll_up", self.inner.roll_up, cutoff, granularity, limit)
+
+    def get_rollups(self, habit_id: uuid.UUID) -> list[Bucket]:
+        return self._timed("get_rollups", self.inner.get_rollups, habit_id)
+
+    def compact(self, limit: int = 1000) -> int:
+        return self._timed("compact", self.inner.compact, limit)
+
+    def get_version(self, habit_id: uuid.UUID) -> int:
+        return self._timed("get_version", self.inner.get_version, habit_id)
+
+    def collection_version(self) -> int:
+        return self._timed("collection_version", self.inner.collection_version)
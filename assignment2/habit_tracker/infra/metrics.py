@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from collections.abc import Iterator
+
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+SIZE_BUCKETS = (0, 1, 10, 100, 1_000, 10_000, 100_000)
+
+Labels = tuple[str, ...]
+
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, description: str, label_names: Labels) -> None:
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self._lock = threading.Lock()
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self._samples()
+
+    def _samples(self) -> Iterator[str]:
+        return iter(())
+
+    def _format(self, labels: Labels, extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"'
+            for name, value in zip(self.label_names, labels, strict=True)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, label_names: Labels = ()) -> None:
+        super().__init__(name, description, label_names)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{self._format(labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: Labels = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, description, label_names)
+        self.buckets = buckets
+        self._series: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][slot] += 1
+            series[1][0] += value
+
+    def count(self, labels: Labels = ()) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            snapshot = sorted(
+                (labels, list(counts), total[0])
+                for labels, (counts, total) in self._series.items()
+            )
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts, strict=False):
+                cumulative += count
+                bucket = self._format(labels, f'le="{_number(bound)}"')
+                yield f"{self.name}_bucket{bucket} {cumulative}"
+            cumulative += counts[-1]
+            yield f"{self.name}_bucket{self._format(labels, 'le="+Inf"')} {cumulative}"
+            yield f"{self.name}_sum{self._format(labels)} {_number(total)}"
+            yield f"{self.name}_count{self._format(labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._families: list[_Family] = []
+
+    def register[F: _Family](self, family: F) -> F:
+        self._families.append(family)
+        return family
+
+    def render(self) -> str:
+        lines = [line for family in self._families for line in family.render()]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.register(
+    Counter(
+        "habit_http_requests_total",
+        "HTTP requests by route, method and status.",
+        ("method", "route", "status"),
+    )
+)
+http_latency = registry.register(
+    Histogram(
+        "habit_http_request_duration_seconds",
+        "HTTP request latency by route.",
+        ("method", "route"),
+    )
+)
+http_in_flight = registry.register(
+    Gauge("habit_http_requests_in_flight", "HTTP requests currently being served.")
+)
+repository_operations = registry.register(
+    Counter(
+        "habit_repository_operations_total",
+        "Repository calls by operation and outcome.",
+        ("operation", "outcome"),
+    )
+)
+repository_latency = registry.register(
+    Histogram(
+        "habit_repository_operation_duration_seconds",
+        "Repository call latency by operation.",
+        ("operation",),
+    )
+)
+repository_log_sizes = registry.register(
+    Histogram(
+        "habit_repository_logs_returned",
+        "Number of logs returned by get_logs.",
+        buckets=SIZE_BUCKETS,
+    )
+)
+stats_requests = registry.register(
+    Counter(
+        "habit_stats_requests_total",
+        "Stats queries that were computed or coalesced onto an in-flight one.",
+        ("outcome",),
+    )
+)
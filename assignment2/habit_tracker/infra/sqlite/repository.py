@@ -0,0 +1,679 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import uuid
+from collections.abc import Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from datetime import date
+
+from ...core.habits import Habit, HabitComponent, HabitType, Log, Routine
+from ...core.hierarchy import HierarchyCycleError
+from ...core.query import HabitQuery, name_key
+from ...core.repository import HabitRepository
+from ...core.retention import (
+    Bucket,
+    RetentionError,
+    fold_buckets,
+    merge_buckets,
+    roll_up_values,
+)
+from ...core.stats import LogAggregate
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS habits (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    category TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    type TEXT,
+    goal REAL,
+    name_key TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS routine_children (
+    parent_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    child_id TEXT NOT NULL,
+    PRIMARY KEY (parent_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_routine_children_child ON routine_children (child_id);
+CREATE TABLE IF NOT EXISTS logs (
+    habit_id TEXT NOT NULL,
+    date INTEGER NOT NULL,
+    value REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_logs_habit_date ON logs (habit_id, date);
+CREATE TABLE IF NOT EXISTS versions (
+    key TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS habit_stats (
+    habit_id TEXT PRIMARY KEY,
+    goal REAL NOT NULL,
+    total REAL NOT NULL,
+    compliant INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    streak INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS log_rollups (
+    habit_id TEXT NOT NULL,
+    period INTEGER NOT NULL,
+    goal REAL NOT NULL,
+    total REAL NOT NULL,
+    compliant INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    streak INTEGER NOT NULL,
+    PRIMARY KEY (habit_id, period)
+);
+CREATE TABLE IF NOT EXISTS log_horizons (
+    habit_id TEXT PRIMARY KEY,
+    horizon INTEGER NOT NULL
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_habits_category ON habits (category);
+CREATE INDEX IF NOT EXISTS idx_habits_type ON habits (type);
+CREATE INDEX IF NOT EXISTS idx_habits_name_key ON habits (name_key);
+"""
+
+UPSERT_HABIT = """
+INSERT INTO habits (
+    id, kind, name, description, category, created_at, type, goal, name_key
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    kind = excluded.kind,
+    name = excluded.name,
+    description = excluded.description,
+    category = excluded.category,
+    created_at = excluded.created_at,
+    type = excluded.type,
+    goal = excluded.goal,
+    name_key = excluded.name_key
+"""
+SELECT_HABIT = (
+    "SELECT id, kind, name, description, category, created_at, type, goal "
+    "FROM habits WHERE id = ?"
+)
+SELECT_ALL_HABITS = (
+    "SELECT id, kind, name, description, category, created_at, type, goal "
+    "FROM habits ORDER BY rowid"
+)
+SELECT_HABIT_PAGE = (
+    "SELECT id, kind, name, description, category, created_at, type, goal "
+    "FROM habits WHERE id > ? ORDER BY id LIMIT ?"
+)
+FIND_HABITS = (
+    "SELECT id, kind, name, description, category, created_at, type, goal "
+    "FROM habits WHERE id > ?"
+)
+CATEGORY_FILTER = " AND category = ?"
+TYPE_FILTER = " AND type = ?"
+NAME_PREFIX_FILTER = " AND name_key >= ? AND name_key < ?"
+LIST_LOG_INDEXES = "PRAGMA index_list('logs')"
+UNIQUE_LOG_INDEX_MIGRATION = """
+DELETE FROM logs WHERE rowid NOT IN (
+    SELECT MAX(rowid) FROM logs GROUP BY habit_id, date
+);
+DROP INDEX idx_logs_habit_date;
+CREATE UNIQUE INDEX idx_logs_habit_date ON logs (habit_id, date);
+DELETE FROM habit_stats;
+"""
+SELECT_HABIT_COLUMNS = "SELECT name FROM pragma_table_info('habits')"
+ADD_NAME_KEY = "ALTER TABLE habits ADD COLUMN name_key TEXT NOT NULL DEFAULT ''"
+SELECT_HABIT_NAMES = "SELECT id, name FROM habits"
+UPDATE_NAME_KEY = "UPDATE habits SET name_key = ? WHERE id = ?"
+DELETE_HABIT = "DELETE FROM habits WHERE id = ?"
+SELECT_CHILDREN = (
+    "SELECT child_id FROM routine_children WHERE parent_id = ? ORDER BY position"
+)
+DELETE_CHILDREN = "DELETE FROM routine_children WHERE parent_id = ?"
+SELECT_PARENTS = "SELECT DISTINCT parent_id FROM routine_children WHERE child_id = ?"
+DELETE_CHILD_LINKS = "DELETE FROM routine_children WHERE child_id = ?"
+SELECT_CYCLE = """
+WITH RECURSIVE reachable(id) AS (
+    SELECT child_id FROM routine_children WHERE parent_id = ?
+    UNION
+    SELECT link.child_id FROM routine_children AS link
+    JOIN reachable ON link.parent_id = reachable.id
+)
+SELECT 1 FROM reachable WHERE id = ? LIMIT 1
+"""
+DELETE_LOGS = "DELETE FROM logs WHERE habit_id = ?"
+DELETE_STATS = "DELETE FROM habit_stats WHERE habit_id = ?"
+DELETE_ROLLUPS = "DELETE FROM log_rollups WHERE habit_id = ?"
+SELECT_GOAL_CHANGE = (
+    "SELECT 1 FROM log_rollups WHERE habit_id = ? AND goal != ? LIMIT 1"
+)
+DELETE_HORIZON = "DELETE FROM log_horizons WHERE habit_id = ?"
+COMPACT_STATEMENTS = (
+    "DELETE FROM logs WHERE rowid IN (SELECT rowid FROM logs "
+    "WHERE habit_id NOT IN (SELECT id FROM habits) LIMIT ?)",
+    "DELETE FROM habit_stats WHERE rowid IN (SELECT rowid FROM habit_stats "
+    "WHERE habit_id NOT IN (SELECT id FROM habits) LIMIT ?)",
+    "DELETE FROM routine_children WHERE rowid IN (SELECT rowid FROM routine_children "
+    "WHERE parent_id NOT IN (SELECT id FROM habits) "
+    "OR child_id NOT IN (SELECT id FROM habits) LIMIT ?)",
+    "DELETE FROM log_rollups WHERE rowid IN (SELECT rowid FROM log_rollups "
+    "WHERE habit_id NOT IN (SELECT id FROM habits) LIMIT ?)",
+    "DELETE FROM log_horizons WHERE rowid IN (SELECT rowid FROM log_horizons "
+    "WHERE habit_id NOT IN (SELECT id FROM habits) LIMIT ?)",
+)
+SELECT_ROLLUP_CANDIDATES = """
+SELECT DISTINCT logs.habit_id, habits.goal FROM logs
+JOIN habits ON habits.id = logs.habit_id
+WHERE logs.date < ? AND habits.kind = 'habit'
+LIMIT ?
+"""
+SELECT_LOGS_BEFORE = (
+    "SELECT date, value FROM logs WHERE habit_id = ? AND date < ? ORDER BY date"
+)
+DELETE_LOGS_BEFORE = "DELETE FROM logs WHERE habit_id = ? AND date < ?"
+SELECT_ROLLUPS = (
+    "SELECT period, goal, total, compliant, count, streak FROM log_rollups "
+    "WHERE habit_id = ? ORDER BY period"
+)
+UPSERT_ROLLUP = """
+INSERT INTO log_rollups (habit_id, period, goal, total, compliant, count, streak)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (habit_id, period) DO UPDATE SET
+    goal = excluded.goal,
+    total = excluded.total,
+    compliant = excluded.compliant,
+    count = excluded.count,
+    streak = excluded.streak
+"""
+SELECT_HORIZON = "SELECT horizon FROM log_horizons WHERE habit_id = ?"
+UPSERT_HORIZON = """
+INSERT INTO log_horizons (habit_id, horizon) VALUES (?, ?)
+ON CONFLICT (habit_id) DO UPDATE SET horizon = MAX(horizon, excluded.horizon)
+"""
+INSERT_CHILD = (
+    "INSERT INTO routine_children (parent_id, position, child_id) VALUES (?, ?, ?)"
+)
+UPSERT_LOG = """
+INSERT INTO logs (habit_id, date, value) VALUES (?, ?, ?)
+ON CONFLICT (habit_id, date) DO UPDATE SET value = excluded.value
+"""
+SELECT_LOG_VALUE = "SELECT value FROM logs WHERE habit_id = ? AND date = ?"
+COUNT_NEWER_LOGS = "SELECT COUNT(*) FROM logs WHERE habit_id = ? AND date > ?"
+SELECT_LOGS = "SELECT date, value FROM logs WHERE habit_id = ? ORDER BY date"
+SELECT_LOGS_BETWEEN = (
+    "SELECT date, value FROM logs WHERE habit_id = ? AND date BETWEEN ? AND ? "
+    "ORDER BY date LIMIT ?"
+)
+SELECT_STATS = (
+    "SELECT goal, total, compliant, count, streak FROM habit_stats WHERE habit_id = ?"
+)
+SELECT_ALL_STATS = (
+    "SELECT habit_id, goal, total, compliant, count, streak FROM habit_stats"
+)
+UPSERT_STATS = """
+INSERT INTO habit_stats (habit_id, goal, total, compliant, count, streak)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (habit_id) DO UPDATE SET
+    goal = excluded.goal,
+    total = excluded.total,
+    compliant = excluded.compliant,
+    count = excluded.count,
+    streak = excluded.streak
+"""
+SUMMARIZE_LOGS = """
+SELECT COALESCE(SUM(value), 0.0), COALESCE(SUM(value >= ?), 0), COUNT(*)
+FROM logs WHERE habit_id = ?
+"""
+SELECT_VALUES_NEWEST_FIRST = (
+    "SELECT value FROM logs WHERE habit_id = ? ORDER BY date DESC"
+)
+BUMP_VERSION = """
+INSERT INTO versions (key, version) VALUES (?, 1)
+ON CONFLICT (key) DO UPDATE SET version = version + 1
+"""
+SELECT_VERSION = "SELECT version FROM versions WHERE key = ?"
+INSERT_META = "INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)"
+SELECT_META = "SELECT value FROM meta WHERE key = ?"
+COLLECTION_KEY = "*"
+MIN_DAY = date.min.toordinal()
+MAX_DAY = date.max.toordinal()
+
+Row = tuple[str, str, str, str, str, int, str | None, float | None]
+
+
+class SqliteHabitRepository(HabitRepository):
+    blocking = True
+    shared = True
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+            conn.execute(INSERT_META, ("storage_id", uuid.uuid4().hex))
+            (self.storage_id,) = conn.execute(SELECT_META, ("storage_id",)).fetchone()
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        columns = {name for (name,) in conn.execute(SELECT_HABIT_COLUMNS)}
+        if "name_key" not in columns:
+            conn.execute(ADD_NAME_KEY)
+            names = conn.execute(SELECT_HABIT_NAMES).fetchall()
+            conn.executemany(
+                UPDATE_NAME_KEY,
+                [(name_key(name), habit_id) for habit_id, name in names],
+            )
+        unique = {name: flag for _, name, flag, *_ in conn.execute(LIST_LOG_INDEXES)}
+        if not unique.get("idx_logs_habit_date", 1):
+            conn.executescript(UNIQUE_LOG_INDEX_MIGRATION)
+        conn.executescript(INDEXES)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self._path, cached_statements=64, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _write_transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def save(self, habit: HabitComponent) -> None:
+        with self._write_transaction() as conn:
+            conn.execute(UPSERT_HABIT, (*_to_row(habit), name_key(habit.name)))
+            conn.execute(BUMP_VERSION, (str(habit.id),))
+            conn.execute(BUMP_VERSION, (COLLECTION_KEY,))
+            if isinstance(habit, Habit):
+                if conn.execute(
+                    SELECT_GOAL_CHANGE, (str(habit.id), habit.goal)
+                ).fetchone():
+                    raise RetentionError(
+                        "Goal cannot change once logs have been rolled up"
+                    )
+                aggregate = self._read_aggregate(conn, str(habit.id))
+                if aggregate is not None and aggregate.goal != habit.goal:
+                    self._rebuild_aggregate(conn, str(habit.id), habit.goal)
+            if isinstance(habit, Routine):
+                parent_id = str(habit.id)
+                conn.execute(DELETE_CHILDREN, (parent_id,))
+                conn.executemany(
+                    INSERT_CHILD,
+                    [
+                        (parent_id, position, str(child.id))
+                        for position, child in enumerate(habit.children)
+                    ],
+                )
+                if conn.execute(SELECT_CYCLE, (parent_id, parent_id)).fetchone():
+                    raise HierarchyCycleError("Sub-habit would create a cycle")
+
+    def get(self, habit_id: uuid.UUID) -> HabitComponent | None:
+        return self._load(str(habit_id), {})
+
+    def list_all(self) -> list[HabitComponent]:
+        conn = self._connection()
+        loaded: dict[str, HabitComponent] = {}
+        rows = conn.execute(SELECT_ALL_HABITS).fetchall()
+        return [self._build(row, loaded) for row in rows]
+
+    def list_page(
+        self, limit: int, after: uuid.UUID | None = None
+    ) -> list[HabitComponent]:
+        conn = self._connection()
+        loaded: dict[str, HabitComponent] = {}
+        cursor = "" if after is None else str(after)
+        rows = conn.execute(SELECT_HABIT_PAGE, (cursor, limit)).fetchall()
+        return [self._build(row, loaded) for row in rows]
+
+    def find(
+        self,
+        query: HabitQuery,
+        limit: int | None = None,
+        after: uuid.UUID | None = None,
+    ) -> list[HabitComponent]:
+        sql = FIND_HABITS
+        params: list[object] = ["" if after is None else str(after)]
+        if query.category is not None:
+            sql += CATEGORY_FILTER
+            params.append(query.category)
+        if query.type is not None:
+            sql += TYPE_FILTER
+            params.append(query.type.value)
+        if query.name_prefix:
+            sql += NAME_PREFIX_FILTER
+            params.extend(query.name_range())
+        params.append(-1 if limit is None else limit)
+        loaded: dict[str, HabitComponent] = {}
+        rows = self._connection().execute(sql + " ORDER BY id LIMIT ?", params)
+        return [self._build(row, loaded) for row in rows.fetchall()]
+
+    def delete(self, habit_id: uuid.UUID) -> None:
+        key = str(habit_id)
+        with self._write_transaction() as conn:
+            parents = conn.execute(SELECT_PARENTS, (key,)).fetchall()
+            conn.execute(DELETE_HABIT, (key,))
+            conn.execute(DELETE_CHILDREN, (key,))
+            conn.execute(DELETE_CHILD_LINKS, (key,))
+            conn.execute(DELETE_LOGS, (key,))
+            conn.execute(DELETE_STATS, (key,))
+            conn.execute(DELETE_ROLLUPS, (key,))
+            conn.execute(DELETE_HORIZON, (key,))
+            conn.executemany(BUMP_VERSION, parents)
+            conn.execute(BUMP_VERSION, (key,))
+            conn.execute(BUMP_VERSION, (COLLECTION_KEY,))
+
+    def get_parent_ids(self, habit_id: uuid.UUID) -> set[uuid.UUID]:
+        rows = self._connection().execute(SELECT_PARENTS, (str(habit_id),))
+        return {uuid.UUID(parent_id) for (parent_id,) in rows}
+
+    def compact(self, limit: int = 1000) -> int:
+        removed = 0
+        with self._write_transaction() as conn:
+            for statement in COMPACT_STATEMENTS:
+                if removed >= limit:
+                    break
+                removed += conn.execute(statement, (limit - removed,)).rowcount
+        return removed
+
+    def roll_up(self, cutoff: date, granularity: str, limit: int = 1000) -> int:
+        ordinal = cutoff.toordinal()
+        with self._write_transaction() as conn:
+            candidates = conn.execute(
+                SELECT_ROLLUP_CANDIDATES, (ordinal, limit)
+            ).fetchall()
+            for habit_id, goal in candidates:
+                rows = conn.execute(SELECT_LOGS_BEFORE, (habit_id, ordinal)).fetchall()
+                buckets = roll_up_values(
+                    [day for day, _ in rows],
+                    [value for _, value in rows],
+                    goal,
+                    granularity,
+                )
+                archive = self._read_rollups(conn, habit_id)[-1:]
+                merge_buckets(archive, buckets)
+                conn.executemany(
+                    UPSERT_ROLLUP,
+                    [
+                        (
+                            habit_id,
+                            period.toordinal(),
+                            aggregate.goal,
+                            aggregate.total,
+                            aggregate.compliant,
+                            aggregate.count,
+                            aggregate.streak,
+                        )
+                        for period, aggregate in archive
+                    ],
+                )
+                conn.execute(DELETE_LOGS_BEFORE, (habit_id, ordinal))
+                conn.execute(UPSERT_HORIZON, (habit_id, ordinal))
+                conn.execute(DELETE_STATS, (habit_id,))
+                conn.execute(BUMP_VERSION, (habit_id,))
+        return len(candidates)
+
+    def get_rollups(self, habit_id: uuid.UUID) -> list[Bucket]:
+        return self._read_rollups(self._connection(), str(habit_id))
+
+    def save_log(self, log: Log) -> None:
+        with self._write_transaction() as conn:
+            self._save_log(conn, log)
+
+    def save_logs(self, logs: Iterable[Log]) -> int:
+        saved = 0
+        with self._write_transaction() as conn:
+            for log in logs:
+                self._save_log(conn, log)
+                saved += 1
+        return saved
+
+    def get_logs(
+        self,
+        habit_id: uuid.UUID,
+        start: date | None = None,
+        end: date | None = None,
+        limit: int | None = None,
+    ) -> list[Log]:
+        conn = self._connection()
+        if start is None and end is None and limit is None:
+            rows = conn.execute(SELECT_LOGS, (str(habit_id),))
+        else:
+            lo = start.toordinal() if start else MIN_DAY
+            hi = end.toordinal() if end else MAX_DAY
+            rows = conn.execute(
+                SELECT_LOGS_BETWEEN,
+                (str(habit_id), lo, hi, -1 if limit is None else limit),
+            )
+        return [
+            Log(habit_id=habit_id, date=date.fromordinal(day), value=value)
+            for day, value in rows
+        ]
+
+    def _save_log(self, conn: sqlite3.Connection, log: Log) -> None:
+        habit_id = str(log.habit_id)
+        day = log.date.toordinal()
+        horizon = conn.execute(SELECT_HORIZON, (habit_id,)).fetchone()
+        if horizon is not None and day < horizon[0]:
+            raise RetentionError(
+                f"Logs before {date.fromordinal(horizon[0])} have been rolled up"
+            )
+        previous = conn.execute(SELECT_LOG_VALUE, (habit_id, day)).fetchone()
+        conn.execute(UPSERT_LOG, (habit_id, day, log.value))
+        conn.execute(BUMP_VERSION, (habit_id,))
+        aggregate = self._read_aggregate(conn, habit_id)
+        if aggregate is None:
+            return
+        (newer,) = conn.execute(COUNT_NEWER_LOGS, (habit_id, day)).fetchone()
+        if previous is None:
+            aggregate.insert(log.value, newer)
+        elif not aggregate.replace(previous[0], log.value, newer):
+            aggregate.streak = self._streak(conn, habit_id, aggregate.goal)
+        self._write_aggregate(conn, habit_id, aggregate)
+
+    def get_aggregate(self, habit_id: uuid.UUID, goal: float) -> LogAggregate:
+        aggregate = self._read_aggregate(self._connection(), str(habit_id))
+        if aggregate is not None and aggregate.goal == goal:
+            return aggregate
+        with self._write_transaction() as conn:
+            aggregate = self._read_aggregate(conn, str(habit_id))
+            if aggregate is not None and aggregate.goal == goal:
+                return aggregate
+            return self._rebuild_aggregate(conn, str(habit_id), goal)
+
+    def get_aggregates(
+        self, goals: Mapping[uuid.UUID, float]
+    ) -> dict[uuid.UUID, LogAggregate]:
+        conn = self._connection()
+        stored = {
+            habit_id: LogAggregate(
+                goal=goal, total=total, compliant=compliant, count=count, streak=streak
+            )
+            for habit_id, goal, total, compliant, count, streak in conn.execute(
+                SELECT_ALL_STATS
+            )
+        }
+        aggregates: dict[uuid.UUID, LogAggregate] = {}
+        stale: list[uuid.UUID] = []
+        for habit_id, goal in goals.items():
+            aggregate = stored.get(str(habit_id))
+            if aggregate is not None and aggregate.goal == goal:
+                aggregates[habit_id] = aggregate
+            else:
+                stale.append(habit_id)
+        if stale:
+            with self._write_transaction() as conn:
+                for habit_id in stale:
+                    aggregates[habit_id] = self._rebuild_aggregate(
+                        conn, str(habit_id), goals[habit_id]
+                    )
+        return aggregates
+
+    def get_version(self, habit_id: uuid.UUID) -> int:
+        return self._read_version(str(habit_id))
+
+    def collection_version(self) -> int:
+        return self._read_version(COLLECTION_KEY)
+
+    def _read_version(self, key: str) -> int:
+        row = self._connection().execute(SELECT_VERSION, (key,)).fetchone()
+        return 0 if row is None else int(row[0])
+
+    def _read_aggregate(
+        self, conn: sqlite3.Connection, habit_id: str
+    ) -> LogAggregate | None:
+        row = conn.execute(SELECT_STATS, (habit_id,)).fetchone()
+        if row is None:
+            return None
+        goal, total, compliant, count, streak = row
+        return LogAggregate(
+            goal=goal, total=total, compliant=compliant, count=count, streak=streak
+        )
+
+    def _write_aggregate(
+        self, conn: sqlite3.Connection, habit_id: str, aggregate: LogAggregate
+    ) -> None:
+        conn.execute(
+            UPSERT_STATS,
+            (
+                habit_id,
+                aggregate.goal,
+                aggregate.total,
+                aggregate.compliant,
+                aggregate.count,
+                aggregate.streak,
+            ),
+        )
+
+    def _rebuild_aggregate(
+        self, conn: sqlite3.Connection, habit_id: str, goal: float
+    ) -> LogAggregate:
+        total, compliant, count = conn.execute(
+            SUMMARIZE_LOGS, (goal, habit_id)
+        ).fetchone()
+        archived = fold_buckets(self._read_rollups(conn, habit_id), goal)
+        aggregate = LogAggregate(
+            goal=goal,
+            total=total + archived.total,
+            compliant=compliant + archived.compliant,
+            count=count + archived.count,
+            streak=self._streak(conn, habit_id, goal),
+        )
+        self._write_aggregate(conn, habit_id, aggregate)
+        return aggregate
+
+    def _streak(self, conn: sqlite3.Connection, habit_id: str, goal: float) -> int:
+        streak = 0
+        for (value,) in conn.execute(SELECT_VALUES_NEWEST_FIRST, (habit_id,)):
+            if value < goal:
+                return streak
+            streak += 1
+        return streak + fold_buckets(self._read_rollups(conn, habit_id), goal).streak
+
+    def _read_rollups(self, conn: sqlite3.Connection, habit_id: str) -> list[Bucket]:
+        return [
+            (
+                date.fromordinal(period),
+                LogAggregate(
+                    goal=goal,
+                    total=total,
+                    compliant=compliant,
+                    count=count,
+                    streak=streak,
+                ),
+            )
+            for period, goal, total, compliant, count, streak in conn.execute(
+                SELECT_ROLLUPS, (habit_id,)
+            )
+        ]
+
+    def _load(
+        self, habit_id: str, loaded: dict[str, HabitComponent]
+    ) -> HabitComponent | None:
+        if habit_id in loaded:
+            return loaded[habit_id]
+        row = self._connection().execute(SELECT_HABIT, (habit_id,)).fetchone()
+        if row is None:
+            return None
+        return self._build(row, loaded)
+
+    def _build(self, row: Row, loaded: dict[str, HabitComponent]) -> HabitComponent:
+        if row[0] in loaded:
+            return loaded[row[0]]
+        component = _from_row(row)
+        loaded[row[0]] = component
+        if isinstance(component, Routine):
+            children = self._connection().execute(SELECT_CHILDREN, (row[0],))
+            for (child_id,) in children.fetchall():
+                child = self._load(child_id, loaded)
+                if child is not None:
+                    component.children.append(child)
+        return component
+
+
+def _to_row(habit: HabitComponent) -> Row:
+    if isinstance(habit, Habit):
+        return (
+            str(habit.id),
+            "habit",
+            habit.name,
+            habit.description,
+            habit.category,
+            habit.created_at.toordinal(),
+            habit.type.value,
+            habit.goal,
+        )
+    return (
+        str(habit.id),
+        "routine",
+        habit.name,
+        habit.description,
+        getattr(habit, "category", ""),
+        habit.created_at.toordinal(),
+        None,
+        None,
+    )
+
+
+def _from_row(row: Row) -> HabitComponent:
+    habit_id, kind, name, description, category, created_at, habit_type, goal = row
+    if kind == "habit":
+        return Habit(
+            id=uuid.UUID(habit_id),
+            name=name,
+            description=description,
+            category=category,
+            created_at=date.fromordinal(created_at),
+            type=HabitType(habit_type),
+            goal=goal if goal is not None else 0.0,
+        )
+    return Routine(
+        id=uuid.UUID(habit_id),
+        name=name,
+        description=description,
+        category=category,
+        created_at=date.fromordinal(created_at),
+    )
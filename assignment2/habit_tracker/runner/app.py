@@ -1,15 +1,73 @@
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import typer
 import uvicorn
 from fastapi import FastAPI
 
+from ..core.retention import RetentionPolicy
 from ..infra.fastapi.api import router
+from ..infra.fastapi.compaction import background_compaction
+from ..infra.fastapi.dependencies import default_service
+from ..infra.fastapi.metrics import MetricsMiddleware
+
+SHARED_BACKENDS = ("sqlite",)
+
+
+def retention_policy() -> RetentionPolicy | None:
+    keep_days = os.environ.get("HABIT_TRACKER_RETENTION_DAYS")
+    if keep_days is None:
+        return None
+    granularity = os.environ.get("HABIT_TRACKER_ROLLUP_GRANULARITY", "month")
+    return RetentionPolicy(int(keep_days), granularity)
+
 
-app = FastAPI(title="Smart Habit Tracker API")
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    interval = float(os.environ.get("HABIT_TRACKER_COMPACTION_INTERVAL", "30"))
+    async with background_compaction(
+        default_service(), interval, retention=retention_policy()
+    ):
+        yield
 
+
+app = FastAPI(title="Smart Habit Tracker API", lifespan=lifespan)
+
+app.add_middleware(MetricsMiddleware)
 app.include_router(router)
 
 
+def serve(
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    workers: int = typer.Option(1, min=1),
+    storage: str | None = typer.Option(None, envvar="HABIT_TRACKER_STORAGE"),
+    db_path: str | None = typer.Option(None, envvar="HABIT_TRACKER_DB_PATH"),
+) -> None:
+    if workers > 1:
+        storage = storage or "sqlite"
+        if storage not in SHARED_BACKENDS:
+            raise typer.BadParameter(
+                f"--workers {workers} needs a shared backend "
+                f"({', '.join(SHARED_BACKENDS)}), not {storage}",
+                param_hint="--storage",
+            )
+    if storage is not None:
+        os.environ["HABIT_TRACKER_STORAGE"] = storage
+    if db_path is not None:
+        os.environ["HABIT_TRACKER_DB_PATH"] = db_path
+
+    if workers == 1:
+        uvicorn.run(app, host=host, port=port)
+    else:
+        uvicorn.run(
+            "habit_tracker.runner.app:app", host=host, port=port, workers=workers
+        )
+
+
 def main() -> None:
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    typer.run(serve)
 
 
 if __name__ == "__main__":
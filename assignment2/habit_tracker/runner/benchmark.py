@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+import httpx
+import typer
+from fastapi import FastAPI
+
+from ..core.habits import HabitType
+from ..core.services import HabitService
+from ..infra.fastapi.api import router
+from ..infra.fastapi.dependencies import create_repository, get_habit_service
+
+BACKENDS = ("memory", "sharded", "sqlite", "durable")
+HISTORY_START = date(2020, 1, 1)
+
+Operation = Callable[[httpx.AsyncClient], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class WorkloadMix:
+    create: float = 0.05
+    log: float = 0.55
+    listing: float = 0.1
+    stats: float = 0.25
+    routine: float = 0.05
+
+    def choices(self) -> tuple[list[str], list[float]]:
+        weights = asdict(self)
+        return list(weights), list(weights.values())
+
+
+@dataclass(frozen=True)
+class BenchmarkConfig:
+    habits: int = 10_000
+    logs: int = 10_000_000
+    requests: int = 20_000
+    concurrency: int = 32
+    seed: int = 7
+    mix: WorkloadMix = field(default_factory=WorkloadMix)
+
+
+@dataclass
+class EndpointResult:
+    count: int
+    errors: int
+    throughput: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+@dataclass
+class BackendResult:
+    backend: str
+    seed_seconds: float
+    run_seconds: float
+    throughput: float
+    endpoints: dict[str, EndpointResult]
+
+
+class LatencyRecorder:
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    async def timed(
+        self, endpoint: str, request: Awaitable[httpx.Response]
+    ) -> httpx.Response:
+        started = time.perf_counter()
+        response = await request
+        elapsed = (time.perf_counter() - started) * 1000.0
+        self.samples.setdefault(endpoint, []).append(elapsed)
+        if response.is_error:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        return response
+
+    def summarize(self, seconds: float) -> dict[str, EndpointResult]:
+        return {
+            endpoint: _summarize(samples, self.errors.get(endpoint, 0), seconds)
+            for endpoint, samples in sorted(self.samples.items())
+        }
+
+
+def _summarize(samples: list[float], errors: int, seconds: float) -> EndpointResult:
+    ordered = sorted(samples)
+    if len(ordered) > 1:
+        cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+        p50, p90, p99 = cuts[49], cuts[89], cuts[98]
+    else:
+        p50 = p90 = p99 = ordered[0]
+    return EndpointResult(
+        count=len(ordered),
+        errors=errors,
+        throughput=len(ordered) / seconds if seconds else 0.0,
+        p50_ms=p50,
+        p90_ms=p90,
+        p99_ms=p99,
+        max_ms=ordered[-1],
+    )
+
+
+def seed_service(
+    service: HabitService, config: BenchmarkConfig, rng: random.Random
+) -> list[uuid.UUID]:
+    habit_ids = [
+        service.create_habit(
+            f"Habit {i}", "", f"Category {i % 10}", HabitType.NUMERIC, 5.0
+        ).id
+        for i in range(config.habits)
+    ]
+    if not habit_ids:
+        return habit_ids
+    per_habit, remainder = divmod(config.logs, len(habit_ids))
+    for position, habit_id in enumerate(habit_ids):
+        count = per_habit + (1 if position < remainder else 0)
+        service.log_progress_batch(
+            (habit_id, float(rng.randint(0, 10)), HISTORY_START + timedelta(days=day))
+            for day in range(count)
+        )
+    return habit_ids
+
+
+def build_operations(
+    config: BenchmarkConfig,
+    habit_ids: list[uuid.UUID],
+    recorder: LatencyRecorder,
+    rng: random.Random,
+) -> list[Operation]:
+    names, weights = config.mix.choices()
+    operations: list[Operation] = []
+    for kind in rng.choices(names, weights, k=config.requests):
+        habit_id = rng.choice(habit_ids) if habit_ids else uuid.uuid4()
+        if kind == "create":
+            operations.append(_create(recorder, rng.randrange(10)))
+        elif kind == "log":
+            day = HISTORY_START + timedelta(days=rng.randrange(3650))
+            operations.append(_log(recorder, habit_id, day, rng.random() * 10))
+        elif kind == "listing":
+            operations.append(_list(recorder, rng.choice([None, 50, 500])))
+        elif kind == "stats":
+            stat = rng.choice(["total", "streak", "completion_rate", "total_30d"])
+            operations.append(_stats(recorder, habit_id, stat))
+        else:
+            children = rng.sample(habit_ids, min(3, len(habit_ids)))
+            operations.append(_routine(recorder, children))
+    return operations
+
+
+def _create(recorder: LatencyRecorder, category: int) -> Operation:
+    payload = {
+        "name": "Bench",
+        "description": "",
+        "category": f"Category {category}",
+        "type": "numeric",
+        "goal": 5.0,
+    }
+
+    async def run(client: httpx.AsyncClient) -> None:
+        await recorder.timed("POST /habits", client.post("/habits", json=payload))
+
+    return run
+
+
+def _log(
+    recorder: LatencyRecorder, habit_id: uuid.UUID, day: date, value: float
+) -> Operation:
+    payload = {"value": value, "date": day.isoformat()}
+
+    async def run(client: httpx.AsyncClient) -> None:
+        request = client.post(f"/habits/{habit_id}/logs", json=payload)
+        await recorder.timed("POST /habits/{id}/logs", request)
+
+    return run
+
+
+def _list(recorder: LatencyRecorder, limit: int | None) -> Operation:
+    params = {} if limit is None else {"limit": limit}
+
+    async def run(client: httpx.AsyncClient) -> None:
+        await recorder.timed("GET /habits", client.get("/habits", params=params))
+
+    return run
+
+
+def _stats(recorder: LatencyRecorder, habit_id: uuid.UUID, stat: str) -> Operation:
+    async def run(client: httpx.AsyncClient) -> None:
+        request = client.get(f"/habits/{habit_id}/stats", params={"stat_type": stat})
+        await recorder.timed("GET /habits/{id}/stats", request)
+
+    return run
+
+
+def _routine(recorder: LatencyRecorder, children: list[uuid.UUID]) -> Operation:
+    async def run(client: httpx.AsyncClient) -> None:
+        payload = {"name": "Bench routine", "description": "", "category": ""}
+        response = await recorder.timed(
+            "POST /routines", client.post("/routines", json=payload)
+        )
+        routine_id = response.json()["id"]
+        for child in children:
+            request = client.post(
+                f"/habits/{routine_id}/subhabits", params={"child_id": str(child)}
+            )
+            await recorder.timed("POST /habits/{id}/subhabits", request)
+        await recorder.timed("GET /habits/{id}", client.get(f"/habits/{routine_id}"))
+
+    return run
+
+
+async def drive(app: FastAPI, operations: list[Operation], concurrency: int) -> None:
+    queue = iter(operations)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def worker() -> None:
+            for operation in queue:
+                await operation(client)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+def run_backend(
+    backend: str, config: BenchmarkConfig, workdir: Path | None = None
+) -> BackendResult:
+    with tempfile.TemporaryDirectory(dir=workdir) as scratch:
+        location = str(Path(scratch) / ("habits.db" if backend == "sqlite" else "data"))
+        repo = create_repository(backend, location)
+        service = HabitService(repo)
+        rng = random.Random(config.seed)
+        started = time.perf_counter()
+        habit_ids = seed_service(service, config, rng)
+        seed_seconds = time.perf_counter() - started
+
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_habit_service] = lambda: service
+        recorder = LatencyRecorder()
+        operations = build_operations(config, habit_ids, recorder, rng)
+        started = time.perf_counter()
+        asyncio.run(drive(app, operations, config.concurrency))
+        run_seconds = time.perf_counter() - started
+        close = getattr(repo, "close", None)
+        if close is not None:
+            close()
+
+    total = sum(len(samples) for samples in recorder.samples.values())
+    return BackendResult(
+        backend=backend,
+        seed_seconds=seed_seconds,
+        run_seconds=run_seconds,
+        throughput=total / run_seconds if run_seconds else 0.0,
+        endpoints=recorder.summarize(run_seconds),
+    )
+
+
+def run_benchmark(
+    backends: list[str], config: BenchmarkConfig, workdir: Path | None = None
+) -> dict[str, Any]:
+    return {
+        "config": asdict(config),
+        "results": {
+            backend: asdict(run_backend(backend, config, workdir))
+            for backend in backends
+        },
+    }
+
+
+def compare_results(
+    baseline: dict[str, Any], current: dict[str, Any], tolerance: float = 0.2
+) -> list[str]:
+    regressions = []
+    for backend, result in current["results"].items():
+        previous = baseline["results"].get(backend)
+        if previous is None:
+            continue
+        for endpoint, stats in result["endpoints"].items():
+            before = previous["endpoints"].get(endpoint)
+            if before is None:
+                continue
+            for metric in ("p50_ms", "p99_ms"):
+                if stats[metric] > before[metric] * (1 + tolerance):
+                    regressions.append(
+                        f"{backend} {endpoint} {metric}: "
+                        f"{before[metric]:.2f} -> {stats[metric]:.2f}"
+                    )
+    return regressions
+
+
+cli = typer.Typer()
+
+
+@cli.command()
+def main(
+    backend: list[str] = typer.Option(["memory", "sharded", "sqlite"]),
+    habits: int = 10_000,
+    logs: int = 10_000_000,
+    requests: int = 20_000,
+    concurrency: int = 32,
+    seed: int = 7,
+    output: Path = Path("benchmark.json"),
+    baseline: Path | None = None,
+    tolerance: float = 0.2,
+) -> None:
+    unknown = sorted(set(backend) - set(BACKENDS))
+    if unknown:
+        raise typer.BadParameter(f"Unknown backends: {', '.join(unknown)}")
+    config = BenchmarkConfig(habits, logs, requests, concurrency, seed)
+    report = run_benchmark(backend, config)
+    output.write_text(json.dumps(report, indent=2))
+
+    for name, result in report["results"].items():
+        typer.echo(f"{name}: {result['throughput']:.0f} req/s")
+        for endpoint, stats in result["endpoints"].items():
+            typer.echo(
+                f"  {endpoint:<30} n={stats['count']:<6} "
+                f"p50={stats['p50_ms']:.2f}ms p99={stats['p99_ms']:.2f}ms"
+            )
+
+    if baseline is not None:
+        regressions = compare_results(
+            json.loads(baseline.read_text()), report, tolerance
+        )
+        for regression in regressions:
+            typer.echo(f"REGRESSION {regression}", err=True)
+        if regressions:
+            raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    cli()
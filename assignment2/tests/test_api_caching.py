@@ -0,0 +1,116 @@
+from fastapi.testclient import TestClient
+
+from habit_tracker.core.services import HabitService
+from habit_tracker.infra.fastapi.cache import CachedResponse, ResponseCache
+from habit_tracker.infra.fastapi.dependencies import get_habit_service
+from habit_tracker.infra.in_memory.repository import InMemoryHabitRepository
+from habit_tracker.runner.app import app
+
+HABIT = {
+    "name": "Read",
+    "description": "Books",
+    "category": "Learning",
+    "type": "numeric",
+    "goal": 10.0,
+}
+
+
+def create_habit(client: TestClient) -> str:
+    response = client.post("/habits", json=HABIT)
+    habit_id: str = response.json()["id"]
+    return habit_id
+
+
+def test_should_return_not_modified_for_matching_etag(client: TestClient) -> None:
+    habit_id = create_habit(client)
+    first = client.get(f"/habits/{habit_id}")
+    etag = first.headers["ETag"]
+
+    second = client.get(f"/habits/{habit_id}", headers={"If-None-Match": etag})
+
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert second.content == b""
+
+
+def test_should_change_etag_after_update(client: TestClient) -> None:
+    habit_id = create_habit(client)
+    etag = client.get(f"/habits/{habit_id}").headers["ETag"]
+
+    client.put(f"/habits/{habit_id}", json={**HABIT, "name": "Read more"})
+    response = client.get(f"/habits/{habit_id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "Read more"
+    assert response.headers["ETag"] != etag
+
+
+def test_should_change_stats_etag_after_log(client: TestClient) -> None:
+    habit_id = create_habit(client)
+    first = client.get(f"/habits/{habit_id}/stats")
+    client.post(f"/habits/{habit_id}/logs", json={"value": 4.0})
+
+    second = client.get(
+        f"/habits/{habit_id}/stats", headers={"If-None-Match": first.headers["ETag"]}
+    )
+
+    assert second.status_code == 200
+    assert second.json()["value"] == 4.0
+
+
+def test_should_change_routine_etag_when_child_changes(client: TestClient) -> None:
+    routine = client.post(
+        "/routines", json={"name": "Morning", "description": "", "category": ""}
+    ).json()
+    child_id = create_habit(client)
+    client.post(f"/habits/{routine['id']}/subhabits", params={"child_id": child_id})
+    etag = client.get(f"/habits/{routine['id']}").headers["ETag"]
+
+    client.put(f"/habits/{child_id}", json={**HABIT, "goal": 20.0})
+    response = client.get(f"/habits/{routine['id']}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.json()["children"][0]["goal"] == 20.0
+
+
+def test_should_change_list_etag_after_create(client: TestClient) -> None:
+    create_habit(client)
+    first = client.get("/habits")
+    assert (
+        client.get(
+            "/habits", headers={"If-None-Match": first.headers["ETag"]}
+        ).status_code
+        == 304
+    )
+
+    create_habit(client)
+    second = client.get("/habits", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 200
+    assert len(second.json()) == 2
+
+
+def test_should_not_share_cached_bodies_between_repositories(
+    client: TestClient,
+) -> None:
+    create_habit(client)
+    assert len(client.get("/habits").json()) == 1
+
+    other = HabitService(InMemoryHabitRepository())
+    app.dependency_overrides[get_habit_service] = lambda: other
+
+    assert client.get("/habits").json() == []
+
+
+def test_should_evict_least_recently_used_entries() -> None:
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", CachedResponse(etag='"1"', body=b"a"))
+    cache.put("b", CachedResponse(etag='"1"', body=b"b"))
+    assert cache.get("a", '"1"') is not None
+
+    cache.put("c", CachedResponse(etag='"1"', body=b"c"))
+
+    assert cache.get("b", '"1"') is None
+    assert cache.get("a", '"1"') is not None
+    assert cache.get("a", '"2"') is None
+    assert len(cache) == 1
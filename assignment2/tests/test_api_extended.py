@@ -177,7 +177,7 @@ def test_should_retrieve_logs(client: TestClient, water_habit: dict[str, Any]) -
     habit_id = habit_resp.json()["id"]
 
     client.post(f"/habits/{habit_id}/logs", json={"value": 6.0})
-    client.post(f"/habits/{habit_id}/logs", json={"value": 7.0})
+    client.post(f"/habits/{habit_id}/logs", json={"value": 7.0, "date": "2025-01-01"})
 
     response = client.get(f"/habits/{habit_id}/logs")
     assert response.status_code == 200
@@ -185,6 +185,36 @@ def test_should_retrieve_logs(client: TestClient, water_habit: dict[str, Any]) -
     assert len(logs) == 2
 
 
+def test_should_replace_log_for_same_day(
+    client: TestClient, water_habit: dict[str, Any]
+) -> None:
+    habit_resp = client.post("/habits", json=water_habit)
+    habit_id = habit_resp.json()["id"]
+
+    client.post(f"/habits/{habit_id}/logs", json={"value": 6.0})
+    client.post(f"/habits/{habit_id}/logs", json={"value": 9.0})
+
+    logs = client.get(f"/habits/{habit_id}/logs").json()
+    assert [log["value"] for log in logs] == [9.0]
+    stats = client.get(f"/habits/{habit_id}/stats?stat_type=total").json()
+    assert stats["value"] == 9.0
+
+
+def test_should_filter_logs_by_date_range(
+    client: TestClient, water_habit: dict[str, Any]
+) -> None:
+    habit_resp = client.post("/habits", json=water_habit)
+    habit_id = habit_resp.json()["id"]
+    for day in ("2025-01-03", "2025-01-01", "2025-01-05", "2025-01-02"):
+        client.post(f"/habits/{habit_id}/logs", json={"value": 1.0, "date": day})
+
+    response = client.get(
+        f"/habits/{habit_id}/logs", params={"from": "2025-01-02", "to": "2025-01-03"}
+    )
+    assert response.status_code == 200
+    assert [log["date"] for log in response.json()] == ["2025-01-02", "2025-01-03"]
+
+
 def test_should_return_empty_logs(
     client: TestClient, water_habit: dict[str, Any]
 ) -> None:
@@ -0,0 +1,95 @@
+import json
+import uuid
+from typing import Any
+
+import pytest
+from starlette.testclient import TestClient
+
+from habit_tracker.infra.fastapi import api
+
+
+@pytest.fixture
+def habit_ids(client: TestClient) -> list[str]:
+    ids = []
+    for name in ("Water", "Steps"):
+        response = client.post(
+            "/habits",
+            json={
+                "name": name,
+                "description": "Daily",
+                "category": "Health",
+                "type": "numeric",
+                "goal": 5.0,
+            },
+        )
+        ids.append(response.json()["id"])
+    return ids
+
+
+def make_entries(habit_ids: list[str], days: int) -> list[dict[str, Any]]:
+    return [
+        {"habit_id": habit_id, "value": float(day), "date": f"2025-01-{day:02d}"}
+        for habit_id in habit_ids
+        for day in range(1, days + 1)
+    ]
+
+
+def test_should_save_batch_across_habits(
+    client: TestClient, habit_ids: list[str]
+) -> None:
+    response = client.post("/logs/batch", json={"logs": make_entries(habit_ids, 10)})
+    assert response.status_code == 201
+    assert response.json() == {"saved": 20}
+
+    for habit_id in habit_ids:
+        logs = client.get(f"/habits/{habit_id}/logs").json()
+        assert len(logs) == 10
+        stats = client.get(f"/habits/{habit_id}/stats?stat_type=total").json()
+        assert stats["value"] == 55.0
+
+
+def test_should_reject_invalid_batch(client: TestClient) -> None:
+    response = client.post("/logs/batch", json={"logs": [{"value": 1.0}]})
+    assert response.status_code == 422
+
+
+def test_should_ingest_ndjson_stream_in_chunks(
+    client: TestClient, habit_ids: list[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(api, "STREAM_CHUNK_SIZE", 7)
+    lines = [json.dumps(entry) for entry in make_entries(habit_ids, 25)]
+    body = "\n".join(lines).encode()
+
+    def chunks() -> Any:
+        for start in range(0, len(body), 64):
+            yield body[start : start + 64]
+
+    response = client.post(
+        "/logs/stream",
+        content=chunks(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 201
+    assert response.json() == {"saved": 50}
+    assert len(client.get(f"/habits/{habit_ids[1]}/logs").json()) == 25
+
+
+def test_should_report_invalid_stream_line(
+    client: TestClient, habit_ids: list[str]
+) -> None:
+    valid = json.dumps({"habit_id": habit_ids[0], "value": 1.0})
+    invalid = json.dumps({"habit_id": str(uuid.uuid4()), "value": "many"})
+    response = client.post("/logs/stream", content=f"{valid}\n\n{invalid}\n")
+    assert response.status_code == 422
+    assert response.json()["detail"]["line"] == 3
+    assert response.json()["detail"]["saved"] == 0
+
+
+def test_should_report_malformed_json_stream_line(
+    client: TestClient, habit_ids: list[str]
+) -> None:
+    valid = json.dumps({"habit_id": habit_ids[0], "value": 1.0})
+    response = client.post("/logs/stream", content=f"{valid}\n{{bad\n")
+    assert response.status_code == 422
+    assert response.json()["detail"]["line"] == 2
+    assert response.json()["detail"]["errors"][0]["type"] == "json_invalid"
@@ -0,0 +1,105 @@
+import uuid
+
+import pytest
+from starlette.testclient import TestClient
+
+from habit_tracker.core.habits import HabitComponent
+from habit_tracker.core.services import HabitService
+from habit_tracker.infra.fastapi import api
+
+
+def create_habits(client: TestClient, count: int) -> list[str]:
+    ids = []
+    for i in range(count):
+        response = client.post(
+            "/habits",
+            json={
+                "name": f"Habit {i}",
+                "description": "D",
+                "category": "C",
+                "type": "numeric",
+                "goal": 1.0,
+            },
+        )
+        ids.append(response.json()["id"])
+    return ids
+
+
+def test_should_page_through_habits_with_cursor(client: TestClient) -> None:
+    ids = create_habits(client, 7)
+    seen: list[str] = []
+    params: dict[str, str | int] = {"limit": 3}
+    while True:
+        response = client.get("/habits", params=params)
+        assert response.status_code == 200
+        seen.extend(h["id"] for h in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params = {"limit": 3, "cursor": cursor}
+    assert seen == sorted(ids)
+
+
+def test_should_reject_invalid_cursor(client: TestClient) -> None:
+    response = client.get("/habits", params={"limit": 2, "cursor": "@@@"})
+    assert response.status_code == 400
+
+
+def test_should_page_through_logs_with_cursor(client: TestClient) -> None:
+    (habit_id,) = create_habits(client, 1)
+    for day in range(1, 11):
+        client.post(
+            f"/habits/{habit_id}/logs",
+            json={"value": float(day), "date": f"2025-01-{day:02d}"},
+        )
+    first = client.get(f"/habits/{habit_id}/logs", params={"limit": 4})
+    assert [log["value"] for log in first.json()] == [1.0, 2.0, 3.0, 4.0]
+
+    second = client.get(
+        f"/habits/{habit_id}/logs",
+        params={"limit": 4, "cursor": first.headers["X-Next-Cursor"]},
+    )
+    assert [log["value"] for log in second.json()] == [5.0, 6.0, 7.0, 8.0]
+
+
+def test_should_stream_full_exports(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(api, "EXPORT_PAGE_SIZE", 2)
+    ids = create_habits(client, 5)
+    habit_id = ids[0]
+    for day in range(1, 6):
+        client.post(
+            f"/habits/{habit_id}/logs",
+            json={"value": 1.0, "date": f"2025-02-{day:02d}"},
+        )
+
+    habits = client.get("/habits", params={"stream": True})
+    assert habits.headers["content-type"] == "application/json"
+    assert sorted(h["id"] for h in habits.json()) == sorted(ids)
+
+    logs = client.get(f"/habits/{habit_id}/logs", params={"stream": True})
+    assert [log["date"] for log in logs.json()] == [
+        f"2025-02-{day:02d}" for day in range(1, 6)
+    ]
+
+
+def test_should_page_unfiltered_listings_by_id(
+    client: TestClient, service: HabitService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    ids = create_habits(client, 4)
+    calls: list[int] = []
+    list_page = service.repo.list_page
+
+    def record(limit: int, after: uuid.UUID | None = None) -> list[HabitComponent]:
+        calls.append(limit)
+        return list_page(limit, after)
+
+    monkeypatch.setattr(service.repo, "list_page", record)
+
+    response = client.get("/habits", params={"limit": 3})
+    exported = client.get("/habits", params={"stream": "true"})
+
+    assert [h["id"] for h in response.json()] == sorted(ids)[:3]
+    assert [h["id"] for h in exported.json()] == sorted(ids)
+    assert calls == [4, api.EXPORT_PAGE_SIZE]
@@ -0,0 +1,70 @@
+from fastapi.testclient import TestClient
+
+
+def create_habit(client: TestClient, name: str, category: str, goal: float) -> str:
+    response = client.post(
+        "/habits",
+        json={
+            "name": name,
+            "description": "",
+            "category": category,
+            "type": "numeric",
+            "goal": goal,
+        },
+    )
+    habit_id: str = response.json()["id"]
+    return habit_id
+
+
+def test_should_compute_stats_for_all_habits(client: TestClient) -> None:
+    run = create_habit(client, "Run", "Health", 5.0)
+    read = create_habit(client, "Read", "Learning", 10.0)
+    for day, value in (("2025-01-01", 6.0), ("2025-01-02", 2.0)):
+        client.post(f"/habits/{run}/logs", json={"value": value, "date": day})
+    client.post(f"/habits/{read}/logs", json={"value": 12.0, "date": "2025-01-01"})
+
+    response = client.get("/stats", params={"stat_type": "completion_rate"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["stat_type"] == "completion_rate"
+    values = {item["habit_id"]: item["value"] for item in body["stats"]}
+    assert values == {run: 50.0, read: 100.0}
+
+
+def test_should_filter_bulk_stats_by_category(client: TestClient) -> None:
+    run = create_habit(client, "Run", "Health", 5.0)
+    create_habit(client, "Read", "Learning", 10.0)
+    client.post(f"/habits/{run}/logs", json={"value": 7.0, "date": "2025-01-01"})
+
+    response = client.get("/stats", params={"stat_type": "total", "category": "Health"})
+
+    assert response.json()["stats"] == [{"habit_id": run, "value": 7.0}]
+
+
+def test_should_include_routine_rollups_in_bulk_stats(client: TestClient) -> None:
+    routine = client.post(
+        "/routines", json={"name": "Day", "description": "", "category": "Health"}
+    ).json()["id"]
+    run = create_habit(client, "Run", "Health", 5.0)
+    client.post(f"/habits/{routine}/subhabits", params={"child_id": run})
+    client.post(f"/habits/{run}/logs", json={"value": 7.0, "date": "2025-01-01"})
+
+    stats = client.get("/stats", params={"category": "Health"}).json()["stats"]
+
+    assert {item["habit_id"]: item["value"] for item in stats} == {
+        routine: 7.0,
+        run: 7.0,
+    }
+
+
+def test_should_reject_out_of_range_stat_windows(client: TestClient) -> None:
+    habit_id = create_habit(client, "Run", "Health", 5.0)
+
+    single = client.get(
+        f"/habits/{habit_id}/stats", params={"stat_type": "total_99999999d"}
+    )
+    bulk = client.get("/stats", params={"stat_type": "total_99999999d"})
+
+    assert 400 <= single.status_code < 500
+    assert bulk.status_code == 400
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import uuid
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+from habit_tracker.core.habits import HabitComponent, HabitType
+from habit_tracker.core.repository import AsyncRepositoryAdapter
+from habit_tracker.core.services import AsyncHabitService, HabitService
+from habit_tracker.infra.in_memory.repository import InMemoryHabitRepository
+from habit_tracker.infra.sqlite.repository import SqliteHabitRepository
+
+
+class ThreadRecordingRepository(InMemoryHabitRepository):
+    def __init__(self) -> None:
+        super().__init__()
+        self.threads: set[int] = set()
+
+    def save(self, habit: Any) -> None:
+        self.threads.add(threading.get_ident())
+        super().save(habit)
+
+
+class RecordingAsyncRepository(AsyncRepositoryAdapter):
+    def __init__(self, repo: InMemoryHabitRepository) -> None:
+        super().__init__(repo)
+        self.reads = 0
+
+    async def get(self, habit_id: uuid.UUID) -> HabitComponent | None:
+        self.reads += 1
+        await asyncio.sleep(0)
+        return self.repo.get(habit_id)
+
+
+async def exercise(service: AsyncHabitService) -> tuple[Any, ...]:
+    habit = await service.create_habit("Run", "Km", "Fitness", HabitType.NUMERIC, 5.0)
+    await service.log_progress(habit.id, 6.0, date(2025, 1, 1))
+    await service.log_progress_batch([(habit.id, 7.0, date(2025, 1, 2))])
+    logs = await service.get_logs(habit.id)
+    streak = await service.get_stats(habit.id, "streak")
+    await service.delete_habit(habit.id)
+    missing = await service.get_habit(habit.id)
+    return len(logs), streak, missing
+
+
+def test_should_run_non_blocking_repository_on_event_loop() -> None:
+    repo = ThreadRecordingRepository()
+    service = AsyncHabitService(HabitService(repo))
+    assert asyncio.run(exercise(service)) == (2, 2, None)
+    assert repo.threads == {threading.get_ident()}
+
+
+def test_should_offload_blocking_repository(tmp_path: Path) -> None:
+    repo = SqliteHabitRepository(str(tmp_path / "habits.db"))
+    service = AsyncHabitService(HabitService(repo))
+    assert asyncio.run(exercise(service)) == (2, 2, None)
+    assert asyncio.run(service.get_habit(uuid.uuid4())) is None
+    repo.close()
+
+
+def test_should_serve_concurrent_requests() -> None:
+    service = AsyncHabitService(HabitService(InMemoryHabitRepository()))
+
+    async def run_many() -> list[tuple[Any, ...]]:
+        return list(await asyncio.gather(*(exercise(service) for _ in range(200))))
+
+    assert asyncio.run(run_many()) == [(2, 2, None)] * 200
+
+
+def test_should_serve_reads_from_native_async_repository() -> None:
+    repo = InMemoryHabitRepository()
+    reader = RecordingAsyncRepository(repo)
+    service = AsyncHabitService(HabitService(repo), reader)
+    assert asyncio.run(exercise(service)) == (2, 2, None)
+    assert reader.reads == 1
@@ -0,0 +1,38 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from habit_tracker.runner.benchmark import (
+    BenchmarkConfig,
+    compare_results,
+    run_benchmark,
+)
+
+SMALL = BenchmarkConfig(habits=20, logs=400, requests=150, concurrency=4, seed=3)
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite", "durable"])
+def test_should_report_latency_per_endpoint(backend: str, tmp_path: Path) -> None:
+    report = run_benchmark([backend], SMALL, tmp_path)
+
+    result = report["results"][backend]
+    assert result["throughput"] > 0
+    endpoints = result["endpoints"]
+    assert {"POST /habits/{id}/logs", "GET /habits/{id}/stats"} <= set(endpoints)
+    for stats in endpoints.values():
+        assert stats["errors"] == 0
+        assert stats["p50_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+    assert json.loads(json.dumps(report))["config"]["seed"] == 3
+
+
+def test_should_flag_latency_regressions(tmp_path: Path) -> None:
+    baseline = run_benchmark(["memory"], SMALL, tmp_path)
+    current = json.loads(json.dumps(baseline))
+    stats = current["results"]["memory"]["endpoints"]["GET /habits/{id}/stats"]
+    stats["p99_ms"] *= 3
+
+    assert compare_results(baseline, baseline) == []
+    regressions = compare_results(baseline, current)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("memory GET /habits/{id}/stats p99_ms")
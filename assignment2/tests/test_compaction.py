@@ -0,0 +1,48 @@
+import asyncio
+import uuid
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from habit_tracker.core.habits import HabitType, Log
+from habit_tracker.core.services import AsyncHabitService, HabitService
+from habit_tracker.infra.fastapi.compaction import background_compaction, compact_once
+
+
+def test_should_drop_deleted_child_from_routine_response(
+    client: TestClient, service: HabitService
+) -> None:
+    habit = service.create_habit("Read", "", "", HabitType.NUMERIC, 1.0)
+    routine = service.create_routine("Morning", "", "")
+    service.add_subhabit(routine.id, habit.id)
+    service.get_stats(routine.id, "total")
+
+    assert client.delete(f"/habits/{habit.id}").status_code == 204
+
+    response = client.get(f"/habits/{routine.id}")
+    assert response.json()["children"] == []
+    assert service.get_stats(routine.id, "total") == 0.0
+
+
+def test_should_compact_in_chunks_until_drained(service: HabitService) -> None:
+    orphan = uuid.uuid4()
+    for day in range(1, 6):
+        service.repo.save_log(Log(orphan, date(2025, 1, 1), float(day)))
+        service.repo.get_aggregate(uuid.uuid4(), 1.0)
+
+    removed = asyncio.run(compact_once(AsyncHabitService(service), limit=2))
+
+    assert removed == 6
+    assert service.compact() == 0
+
+
+def test_should_run_compaction_in_background(service: HabitService) -> None:
+    service.repo.save_log(Log(uuid.uuid4(), date(2025, 1, 1), 1.0))
+
+    async def run() -> None:
+        async with background_compaction(service, interval=0.01):
+            await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+
+    assert service.compact() == 0
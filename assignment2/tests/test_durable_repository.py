@@ -0,0 +1,271 @@
+import threading
+import uuid
+from collections.abc import Iterator
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from habit_tracker.core.habits import Habit, HabitType, Log, Routine
+from habit_tracker.core.services import HabitService
+from habit_tracker.core.stats import LogAggregate
+from habit_tracker.infra.in_memory.durable import DurableInMemoryHabitRepository
+from habit_tracker.infra.in_memory.wal import segment_path
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path) -> Path:
+    return tmp_path / "data"
+
+
+@pytest.fixture
+def repository(data_dir: Path) -> Iterator[DurableInMemoryHabitRepository]:
+    repo = DurableInMemoryHabitRepository(data_dir, fsync=False)
+    yield repo
+    repo.close()
+
+
+def make_habit(name: str = "Run", goal: float = 5.0) -> Habit:
+    return Habit(
+        name=name, description="", category="Health", type=HabitType.NUMERIC, goal=goal
+    )
+
+
+def reopen(
+    repo: DurableInMemoryHabitRepository, data_dir: Path
+) -> DurableInMemoryHabitRepository:
+    repo.close()
+    return DurableInMemoryHabitRepository(data_dir, fsync=False)
+
+
+def test_should_replay_mutations_after_restart(
+    repository: DurableInMemoryHabitRepository, data_dir: Path
+) -> None:
+    kept, dropped = make_habit("Run"), make_habit("Swim")
+    repository.save(kept)
+    repository.save(dropped)
+    repository.save_log(Log(kept.id, date(2024, 1, 2), 6.0))
+    repository.save_logs([Log(kept.id, date(2024, 1, 1), 3.0)])
+    repository.save_log(Log(kept.id, date(2024, 1, 2), 7.0))
+    repository.delete(dropped.id)
+
+    restored = reopen(repository, data_dir)
+    try:
+        assert restored.get(dropped.id) is None
+        assert restored.get(kept.id) == kept
+        assert [log.value for log in restored.get_logs(kept.id)] == [3.0, 7.0]
+        assert restored.get_aggregate(kept.id, 5.0).total == 10.0
+    finally:
+        restored.close()
+
+
+def test_should_relink_routine_children_on_restart(data_dir: Path) -> None:
+    service = HabitService(DurableInMemoryHabitRepository(data_dir, fsync=False))
+    routine = service.create_routine("Morning", "", "")
+    habit = service.create_habit("Run", "", "", HabitType.NUMERIC, 5.0)
+    service.add_subhabit(routine.id, habit.id)
+    service.update_habit(habit.id, goal=8.0)
+    repo = service.repo
+    assert isinstance(repo, DurableInMemoryHabitRepository)
+
+    restored = reopen(repo, data_dir)
+    try:
+        loaded = restored.get(routine.id)
+        assert isinstance(loaded, Routine)
+        assert loaded.children == [restored.get(habit.id)]
+        child = loaded.children[0]
+        assert isinstance(child, Habit)
+        assert child.goal == 8.0
+    finally:
+        restored.close()
+
+
+def test_should_cascade_delete_to_routines_after_restart(data_dir: Path) -> None:
+    repo = DurableInMemoryHabitRepository(data_dir, fsync=False)
+    service = HabitService(repo)
+    routine = service.create_routine("Morning", "", "")
+    habit = service.create_habit("Run", "", "", HabitType.NUMERIC, 5.0)
+    service.add_subhabit(routine.id, habit.id)
+    repo.checkpoint()
+
+    restored = reopen(repo, data_dir)
+    assert restored.get_parent_ids(habit.id) == {routine.id}
+    HabitService(restored).delete_habit(habit.id)
+    loaded = restored.get(routine.id)
+    assert isinstance(loaded, Routine)
+    assert loaded.children == []
+
+    reopened = reopen(restored, data_dir)
+    try:
+        loaded = reopened.get(routine.id)
+        assert isinstance(loaded, Routine)
+        assert loaded.children == []
+    finally:
+        reopened.close()
+
+
+def test_should_load_snapshot_and_replay_only_tail(
+    repository: DurableInMemoryHabitRepository, data_dir: Path
+) -> None:
+    habit = make_habit()
+    repository.save(habit)
+    start = date(2024, 1, 1)
+    repository.save_logs(
+        Log(habit.id, start + timedelta(days=i), float(i)) for i in range(100)
+    )
+    repository.checkpoint()
+    repository.save_log(Log(habit.id, start + timedelta(days=100), 100.0))
+
+    assert sorted(p.name for p in data_dir.iterdir()) == [
+        "snapshot-00000001.bin",
+        "wal-00000001.log",
+    ]
+    restored = reopen(repository, data_dir)
+    try:
+        logs = restored.get_logs(habit.id)
+        assert len(logs) == 101
+        assert logs[-1] == Log(habit.id, start + timedelta(days=100), 100.0)
+        assert restored.get(habit.id) == habit
+    finally:
+        restored.close()
+
+
+def test_should_ignore_torn_tail_record(
+    repository: DurableInMemoryHabitRepository, data_dir: Path
+) -> None:
+    habit = make_habit()
+    repository.save(habit)
+    repository.save_log(Log(habit.id, date(2024, 1, 1), 1.0))
+    repository.save_log(Log(habit.id, date(2024, 1, 2), 2.0))
+    repository.close()
+    segment = segment_path(data_dir, 0)
+    segment.write_bytes(segment.read_bytes()[:-3])
+
+    restored = DurableInMemoryHabitRepository(data_dir, fsync=False)
+    try:
+        assert [log.value for log in restored.get_logs(habit.id)] == [1.0]
+    finally:
+        restored.close()
+
+
+def test_should_keep_writes_acknowledged_after_torn_tail(
+    repository: DurableInMemoryHabitRepository, data_dir: Path
+) -> None:
+    habit = make_habit()
+    repository.save(habit)
+    repository.save_log(Log(habit.id, date(2024, 1, 1), 1.0))
+    repository.save_log(Log(habit.id, date(2024, 1, 2), 2.0))
+    repository.close()
+    segment = segment_path(data_dir, 0)
+    segment.write_bytes(segment.read_bytes()[:-3])
+
+    restored = DurableInMemoryHabitRepository(data_dir, fsync=False)
+    restored.save_log(Log(habit.id, date(2024, 1, 3), 3.0))
+    reopened = reopen(restored, data_dir)
+    try:
+        assert [log.value for log in reopened.get_logs(habit.id)] == [1.0, 3.0]
+    finally:
+        reopened.close()
+
+
+def test_should_group_commit_concurrent_writers(data_dir: Path) -> None:
+    repo = DurableInMemoryHabitRepository(data_dir, segment_bytes=4096)
+    habit_ids = [uuid.uuid4() for _ in range(8)]
+
+    def write(habit_id: uuid.UUID) -> None:
+        for day in range(50):
+            repo.save_log(Log(habit_id, date(2024, 1, 1) + timedelta(days=day), 1.0))
+
+    threads = [threading.Thread(target=write, args=(h,)) for h in habit_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    restored = reopen(repo, data_dir)
+    try:
+        assert len(list(data_dir.glob("wal-*.log"))) > 1
+        assert all(len(restored.get_logs(h)) == 50 for h in habit_ids)
+    finally:
+        restored.close()
+
+
+def test_should_serve_consistent_reads_during_back_dated_writes(
+    repository: DurableInMemoryHabitRepository,
+) -> None:
+    service = HabitService(repository)
+    habit = service.create_habit("Run", "", "Health", HabitType.NUMERIC, 1.0)
+    today = date.today()
+    repository.save_log(Log(habit.id, today, 1.0))
+    errors: list[BaseException] = []
+
+    def write() -> None:
+        for day in range(1, 1000):
+            repository.save_log(Log(habit.id, today - timedelta(days=day), 1.0))
+
+    def read() -> None:
+        try:
+            for _ in range(1000):
+                service.get_stats(habit.id, "total_3650d")
+                repository.get_window_index(habit.id, 1.0).window(today, today)
+        except BaseException as e:  # pragma: no cover - surfaced below
+            errors.append(e)
+
+    threads = [threading.Thread(target=write), threading.Thread(target=read)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert service.get_stats(habit.id, "total_3650d") == 1000.0
+
+
+def test_should_return_aggregate_snapshots(
+    repository: DurableInMemoryHabitRepository,
+) -> None:
+    habit_id = uuid.uuid4()
+    repository.save_log(Log(habit_id, date(2025, 1, 1), 2.0))
+    aggregate = repository.get_aggregate(habit_id, 1.0)
+    repository.save_log(Log(habit_id, date(2025, 1, 2), 3.0))
+    assert aggregate == LogAggregate(
+        goal=1.0, total=2.0, compliant=1, count=1, streak=1
+    )
+    assert repository.get_aggregate(habit_id, 1.0).total == 5.0
+
+
+class ObservedSnapshotRepository(DurableInMemoryHabitRepository):
+    def __init__(self, directory: Path, **kwargs: Any) -> None:
+        self.lock_free_during_write: list[bool] = []
+        super().__init__(directory, **kwargs)
+
+    def _write_snapshot(self, *args: Any) -> None:
+        probe = threading.Thread(
+            target=lambda: self.lock_free_during_write.append(
+                self.get(uuid.uuid4()) is None
+            )
+        )
+        probe.start()
+        probe.join(timeout=5)
+        self.lock_free_during_write.append(not probe.is_alive())
+        super()._write_snapshot(*args)
+
+
+def test_should_write_snapshots_in_background_without_blocking_reads(
+    data_dir: Path,
+) -> None:
+    repo = ObservedSnapshotRepository(data_dir, snapshot_interval=10, fsync=False)
+    habit = make_habit()
+    repo.save(habit)
+    repo.save_logs(
+        Log(habit.id, date(2024, 1, 1) + timedelta(days=i), 1.0) for i in range(20)
+    )
+
+    restored = reopen(repo, data_dir)
+    try:
+        assert list(data_dir.glob("snapshot-*.bin"))
+        assert repo.lock_free_during_write == [True, True]
+        assert len(restored.get_logs(habit.id)) == 20
+    finally:
+        restored.close()
@@ -0,0 +1,144 @@
+import sqlite3
+import uuid
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from habit_tracker.core.habits import Habit, HabitType, Routine
+from habit_tracker.core.query import HabitQuery
+from habit_tracker.core.repository import HabitRepository
+from habit_tracker.core.services import HabitService
+from habit_tracker.infra.fastapi.dependencies import create_repository
+from habit_tracker.infra.sqlite.repository import SqliteHabitRepository
+
+
+@pytest.fixture(params=["memory", "sharded", "sqlite", "durable"])
+def repository(
+    request: pytest.FixtureRequest, tmp_path: Path
+) -> Iterator[HabitRepository]:
+    location = str(tmp_path / ("habits.db" if request.param == "sqlite" else "data"))
+    repo = create_repository(request.param, location)
+    yield repo
+    close: Callable[[], None] | None = getattr(repo, "close", None)
+    if close is not None:
+        close()
+
+
+def make_habit(name: str, category: str, habit_type: HabitType) -> Habit:
+    return Habit(
+        name=name, description="", category=category, type=habit_type, goal=1.0
+    )
+
+
+@pytest.fixture
+def components(repository: HabitRepository) -> list[Habit | Routine]:
+    saved: list[Habit | Routine] = [
+        make_habit("Running", "Health", HabitType.NUMERIC),
+        make_habit("reading", "Learning", HabitType.NUMERIC),
+        make_habit("Rowing", "Health", HabitType.BOOLEAN),
+        make_habit("Meditate", "Health", HabitType.BOOLEAN),
+        Routine(name="Routine", description="", category="Health"),
+    ]
+    for component in saved:
+        repository.save(component)
+    return saved
+
+
+QUERIES = [
+    HabitQuery(category="Health"),
+    HabitQuery(type=HabitType.BOOLEAN),
+    HabitQuery(name_prefix="r"),
+    HabitQuery(name_prefix="RO"),
+    HabitQuery(category="Health", type=HabitType.NUMERIC, name_prefix="ru"),
+    HabitQuery(category="Missing"),
+    HabitQuery(),
+]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_should_find_habits_matching_query(
+    repository: HabitRepository,
+    components: list[Habit | Routine],
+    query: HabitQuery,
+) -> None:
+    expected = sorted((c for c in components if query.matches(c)), key=lambda c: c.id)
+
+    found = repository.find(query)
+
+    assert [c.id for c in found] == [c.id for c in expected]
+
+
+def test_should_page_filtered_results(
+    repository: HabitRepository, components: list[Habit | Routine]
+) -> None:
+    query = HabitQuery(category="Health")
+    expected = [
+        c.id for c in sorted(components, key=lambda c: c.id) if query.matches(c)
+    ]
+
+    first = repository.find(query, limit=2)
+    rest = repository.find(query, after=first[-1].id)
+
+    assert [c.id for c in first + rest] == expected
+
+
+def test_should_reindex_on_update_and_delete(
+    repository: HabitRepository, components: list[Habit | Routine]
+) -> None:
+    service = HabitService(repository)
+    running = components[0]
+
+    service.update_habit(running.id, name="Jogging", category="Cardio")
+    service.delete_habit(components[2].id)
+
+    assert [c.id for c in repository.find(HabitQuery(category="Cardio"))] == [
+        running.id
+    ]
+    assert repository.find(HabitQuery(name_prefix="run")) == []
+    assert [c.name for c in repository.find(HabitQuery(name_prefix="ro"))] == [
+        "Routine"
+    ]
+
+
+def test_should_add_name_key_to_existing_database(tmp_path: Path) -> None:
+    path = str(tmp_path / "legacy.db")
+    habit_id = str(uuid.uuid4())
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE habits (id TEXT PRIMARY KEY, kind TEXT NOT NULL, "
+            "name TEXT NOT NULL, description TEXT NOT NULL, category TEXT NOT NULL, "
+            "created_at INTEGER NOT NULL, type TEXT, goal REAL)"
+        )
+        conn.execute(
+            "INSERT INTO habits VALUES (?, 'habit', 'Swim', '', 'Health', 1, "
+            "'numeric', 1.0)",
+            (habit_id,),
+        )
+    conn.close()
+
+    repo = SqliteHabitRepository(path)
+    try:
+        found = repo.find(HabitQuery(name_prefix="sw"))
+        assert [str(c.id) for c in found] == [habit_id]
+    finally:
+        repo.close()
+
+
+def test_should_filter_habits_over_api(
+    client: TestClient, service: HabitService
+) -> None:
+    water = service.create_habit("Water", "", "Health", HabitType.NUMERIC, 8.0)
+    service.create_habit("Walk", "", "Health", HabitType.BOOLEAN, 1.0)
+    service.create_habit("Wordle", "", "Games", HabitType.BOOLEAN, 1.0)
+
+    response = client.get(
+        "/habits", params={"category": "Health", "type": "numeric", "name_prefix": "w"}
+    )
+    paged = client.get("/habits", params={"name_prefix": "W", "limit": 2})
+
+    assert [h["id"] for h in response.json()] == [str(water.id)]
+    assert len(paged.json()) == 2
+    assert "X-Next-Cursor" in paged.headers
+    assert len(client.get("/habits").json()) == 3
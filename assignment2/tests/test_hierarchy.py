@@ -0,0 +1,89 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from habit_tracker.core.habits import HabitType
+from habit_tracker.core.hierarchy import ClosureIndex, HierarchyCycleError
+from habit_tracker.core.services import HabitService
+
+
+def test_should_track_transitive_ancestors() -> None:
+    a, b, c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    index = ClosureIndex()
+    index.link(a, b)
+    index.link(b, c)
+
+    assert index.is_ancestor(a, c)
+    assert not index.is_ancestor(c, a)
+    assert index.parents(c) == {b}
+    assert index.ancestors(c) == {a, b}
+    assert index.descendants(a) == {b, c}
+
+
+def test_should_reject_cycles() -> None:
+    a, b, c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    index = ClosureIndex()
+    index.link(a, b)
+    index.link(b, c)
+
+    with pytest.raises(HierarchyCycleError):
+        index.link(c, a)
+    with pytest.raises(HierarchyCycleError):
+        index.link(b, b)
+
+
+def test_should_keep_ancestor_reachable_through_other_path() -> None:
+    root, left, right, leaf = (uuid.uuid4() for _ in range(4))
+    index = ClosureIndex()
+    for parent, child in ((root, left), (root, right), (left, leaf), (right, leaf)):
+        index.link(parent, child)
+
+    index.unlink(left, leaf)
+    assert index.is_ancestor(root, leaf)
+    assert index.parents(leaf) == {right}
+
+    index.discard(right)
+    assert not index.is_ancestor(root, leaf)
+    assert index.parents(leaf) == set()
+
+
+def test_should_reject_routine_under_its_descendant(service: HabitService) -> None:
+    outer = service.create_routine("Outer", "Desc", "Cat")
+    inner = service.create_routine("Inner", "Desc", "Cat")
+    service.add_subhabit(outer.id, inner.id)
+
+    with pytest.raises(ValueError, match="cycle"):
+        service.add_subhabit(inner.id, outer.id)
+    with pytest.raises(ValueError, match="cycle"):
+        service.add_subhabit(outer.id, outer.id)
+    assert inner.get_children() == []
+
+
+def test_should_list_parents_and_remove_subhabit(client: TestClient) -> None:
+    routine = client.post(
+        "/routines", json={"name": "Morning", "description": "", "category": ""}
+    ).json()
+    habit = client.post(
+        "/habits",
+        json={
+            "name": "Run",
+            "description": "",
+            "category": "",
+            "type": HabitType.NUMERIC.value,
+            "goal": 1.0,
+        },
+    ).json()
+    client.post(f"/habits/{routine['id']}/subhabits", params={"child_id": habit["id"]})
+
+    parents = client.get(f"/habits/{habit['id']}/parents").json()
+    assert [p["id"] for p in parents] == [routine["id"]]
+    cycle = client.post(
+        f"/habits/{habit['id']}/subhabits", params={"child_id": routine["id"]}
+    )
+    assert cycle.status_code == 400
+
+    removed = client.delete(f"/habits/{routine['id']}/subhabits/{habit['id']}")
+    assert removed.status_code == 204
+    assert client.get(f"/habits/{habit['id']}/parents").json() == []
+    assert client.get(f"/habits/{routine['id']}").json()["children"] == []
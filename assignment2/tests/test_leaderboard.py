@@ -0,0 +1,73 @@
+import random
+import uuid
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from habit_tracker.core.habits import HabitType
+from habit_tracker.core.leaderboard import Leaderboard
+from habit_tracker.core.services import HabitService
+
+
+def test_should_order_by_score_then_id() -> None:
+    board = Leaderboard()
+    ids = sorted(uuid.uuid4() for _ in range(3))
+    board.update(ids[2], 5.0)
+    board.update(ids[1], 5.0)
+    board.update(ids[0], 1.0)
+
+    assert board.top(2) == [(ids[1], 5.0), (ids[2], 5.0)]
+    assert [board.rank(habit_id) for habit_id in ids] == [3, 1, 2]
+
+    board.update(ids[0], 9.0)
+    board.discard(ids[1])
+
+    assert board.top(10) == [(ids[0], 9.0), (ids[2], 5.0)]
+    assert board.rank(ids[1]) is None
+    assert len(board) == 2
+
+
+def test_should_keep_leaderboards_in_sync_with_stats(service: HabitService) -> None:
+    rng = random.Random(11)
+    habits = [
+        service.create_habit(f"H{i}", "", "", HabitType.NUMERIC, 5.0) for i in range(20)
+    ]
+    service.get_leaderboard("streak", 1)
+    start = date(2025, 1, 1)
+    for step in range(300):
+        habit = rng.choice(habits)
+        day = start + timedelta(days=rng.randrange(30))
+        if step % 3:
+            service.log_progress(habit.id, float(rng.randint(0, 9)), day)
+        else:
+            service.log_progress_batch([(habit.id, float(rng.randint(0, 9)), day)])
+    service.update_habit(habits[0].id, goal=1.0)
+    service.delete_habit(habits[1].id)
+
+    for metric in ("streak", "completion_rate"):
+        expected = sorted(
+            service.get_all_stats(metric), key=lambda item: (-item[1], str(item[0]))
+        )
+        assert service.get_leaderboard(metric, 100) == expected
+        habit_id, value = expected[7]
+        assert service.get_rank(metric, habit_id) == (8, value)
+
+
+def test_should_serve_leaderboards_over_api(
+    client: TestClient, service: HabitService
+) -> None:
+    steady = service.create_habit("Steady", "", "", HabitType.NUMERIC, 1.0)
+    idle = service.create_habit("Idle", "", "", HabitType.NUMERIC, 1.0)
+    service.log_progress(steady.id, 2.0, date(2025, 1, 1))
+    service.log_progress(steady.id, 2.0, date(2025, 1, 2))
+
+    top = client.get("/leaderboards/streak", params={"limit": 1})
+    rank = client.get(f"/leaderboards/streak/habits/{idle.id}")
+
+    assert top.json() == {
+        "metric": "streak",
+        "entries": [{"habit_id": str(steady.id), "rank": 1, "value": 2}],
+    }
+    assert rank.json() == {"habit_id": str(idle.id), "rank": 2, "value": 0}
+    assert client.get("/leaderboards/total").status_code == 404
+    assert client.get(f"/leaderboards/streak/habits/{uuid.uuid4()}").status_code == 404
@@ -0,0 +1,60 @@
+import uuid
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from habit_tracker.core.habits import Log
+from habit_tracker.infra.in_memory.repository import InMemoryHabitRepository
+from habit_tracker.infra.instrumented import InstrumentedHabitRepository
+from habit_tracker.infra.metrics import (
+    Histogram,
+    http_latency,
+    repository_log_sizes,
+    repository_operations,
+)
+
+
+def test_should_render_cumulative_histogram_buckets() -> None:
+    histogram = Histogram("latency", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, ("/habits",))
+
+    lines = list(histogram.render())
+
+    assert lines[:2] == ["# HELP latency Latency.", "# TYPE latency histogram"]
+    assert 'latency_bucket{route="/habits",le="0.1"} 1' in lines
+    assert 'latency_bucket{route="/habits",le="1"} 3' in lines
+    assert 'latency_bucket{route="/habits",le="+Inf"} 4' in lines
+    assert 'latency_count{route="/habits"} 4' in lines
+    assert 'latency_sum{route="/habits"} 4.25' in lines
+
+
+def test_should_count_repository_operations_and_log_sizes() -> None:
+    repo = InstrumentedHabitRepository(InMemoryHabitRepository())
+    habit_id = uuid.uuid4()
+    saves = repository_operations.value(("save_log", "ok"))
+    sizes = repository_log_sizes.count()
+
+    repo.save_logs([])
+    repo.save_log(Log(habit_id, date(2024, 1, 1), 1.0))
+    assert len(repo.get_logs(habit_id)) == 1
+
+    assert repository_operations.value(("save_log", "ok")) == saves + 1
+    assert repository_log_sizes.count() == sizes + 1
+    assert repo.storage_id == repo.inner.storage_id
+
+
+def test_should_expose_route_metrics(client: TestClient) -> None:
+    before = http_latency.count(("GET", "/habits/{habit_id}"))
+    client.get(f"/habits/{uuid.uuid4()}")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert http_latency.count(("GET", "/habits/{habit_id}")) == before + 1
+    assert (
+        'habit_http_requests_total{method="GET",route="/habits/{habit_id}",status="404"}'
+        in response.text
+    )
+    assert "habit_http_requests_in_flight 1" in response.text
@@ -1,4 +1,5 @@
 import uuid
+from datetime import date, timedelta
 
 import pytest
 
@@ -93,8 +94,6 @@ def test_should_update_habit(
 
 
 def test_should_save_log(repository: InMemoryHabitRepository) -> None:
-    from datetime import date
-
     habit_id = uuid.uuid4()
     log = Log(habit_id=habit_id, date=date.today(), value=5.0)
     repository.save_log(log)
@@ -110,3 +109,115 @@ def test_should_return_empty_logs_for_unknown_habit(
     assert repository.get_logs(unknown_id) == []
 
 
+def test_should_keep_one_log_per_day_in_date_order(
+    repository: InMemoryHabitRepository,
+) -> None:
+    habit_id = uuid.uuid4()
+    for day, value in ((3, 1.0), (1, 2.0), (2, 3.0), (1, 4.0)):
+        repository.save_log(Log(habit_id, date(2025, 1, day), value))
+    logs = repository.get_logs(habit_id)
+    assert [(log.date.day, log.value) for log in logs] == [
+        (1, 4.0),
+        (2, 3.0),
+        (3, 1.0),
+    ]
+    window = repository.get_logs(habit_id, date(2025, 1, 2), None)
+    assert [log.date.day for log in window] == [2, 3]
+    assert repository.get_logs(habit_id, None, date(2024, 12, 31)) == []
+
+
+def test_should_save_logs_in_bulk(repository: InMemoryHabitRepository) -> None:
+    habit_id = uuid.uuid4()
+    start = date(2025, 1, 1)
+    saved = repository.save_logs(
+        Log(habit_id, start + timedelta(days=day), 1.0) for day in range(5)
+    )
+    assert saved == 5
+    assert len(repository.get_logs(habit_id)) == 5
+
+
+def test_should_page_habits_by_id(repository: InMemoryHabitRepository) -> None:
+    habits = [
+        Habit(
+            name=f"H{i}",
+            description="D",
+            category="C",
+            type=HabitType.BOOLEAN,
+            goal=1.0,
+        )
+        for i in range(5)
+    ]
+    for habit in habits:
+        repository.save(habit)
+    repository.delete(habits[2].id)
+    expected = sorted(habit.id for habit in habits if habit is not habits[2])
+    first = repository.list_page(2)
+    rest = repository.list_page(10, first[-1].id)
+    assert [h.id for h in first + rest] == expected
+
+
+def test_should_store_logs_as_typed_columns(
+    repository: InMemoryHabitRepository,
+) -> None:
+    habit_id = uuid.uuid4()
+    for day, value in ((3, 3.0), (1, 1.0), (2, 2.0), (1, 5.0)):
+        repository.save_log(
+            Log(habit_id=habit_id, date=date(2024, 1, day), value=value)
+        )
+
+    index = repository.get_log_index(habit_id)
+
+    assert index.days.typecode == "i"
+    assert index.values.typecode == "d"
+    assert list(index.values) == [5.0, 2.0, 3.0]
+    assert repository.get_logs(habit_id)[0] == Log(habit_id, date(2024, 1, 1), 5.0)
+    index.values[0] = 0.0
+    assert repository.get_logs(habit_id)[0].value == 5.0
+
+
+def test_should_cascade_delete_to_logs_and_parents(
+    repository: InMemoryHabitRepository,
+    sample_habit: Habit,
+    sample_routine: Routine,
+) -> None:
+    sample_routine.add(sample_habit)
+    repository.save(sample_habit)
+    repository.save(sample_routine)
+    repository.save_log(Log(sample_habit.id, date(2025, 1, 1), 9.0))
+    repository.get_aggregate(sample_habit.id, 8.0)
+    routine_version = repository.get_version(sample_routine.id)
+
+    repository.delete(sample_habit.id)
+
+    assert sample_routine.get_children() == []
+    assert repository.get_version(sample_routine.id) == routine_version + 1
+    assert repository.get_logs(sample_habit.id) == []
+    assert repository.compact() == 0
+
+
+def test_should_compact_orphaned_logs(
+    repository: InMemoryHabitRepository, sample_habit: Habit
+) -> None:
+    orphan = uuid.uuid4()
+    repository.save(sample_habit)
+    repository.save_log(Log(orphan, date(2025, 1, 1), 1.0))
+    repository.save_log(Log(sample_habit.id, date(2025, 1, 1), 1.0))
+    repository.get_aggregate(orphan, 1.0)
+
+    assert repository.compact(limit=1) == 1
+    assert repository.compact() == 1
+    assert repository.get_logs(orphan) == []
+    assert len(repository.get_logs(sample_habit.id)) == 1
+
+
+def test_should_build_window_index_on_log_columns(
+    repository: InMemoryHabitRepository,
+) -> None:
+    habit_id = uuid.uuid4()
+    repository.save_log(Log(habit_id, date(2025, 1, 2), 2.0))
+    window = repository.get_window_index(habit_id, 1.0)
+    repository.save_log(Log(habit_id, date(2025, 1, 1), 3.0))
+    repository.save_log(Log(habit_id, date(2025, 1, 3), 4.0))
+
+    assert len(window) == 3
+    assert window.window(date(2025, 1, 1), date(2025, 1, 3)) == (9.0, 3, 3)
@@ -0,0 +1,222 @@
+import json
+import random
+from collections.abc import Callable, Iterator
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from habit_tracker.core.habits import Habit, HabitType, Log
+from habit_tracker.core.repository import HabitRepository
+from habit_tracker.core.retention import RetentionError, RetentionPolicy
+from habit_tracker.core.services import HabitService
+from habit_tracker.core.stats import LogAggregate
+from habit_tracker.infra.fastapi.dependencies import create_repository
+from habit_tracker.infra.in_memory.durable import DurableInMemoryHabitRepository
+
+TODAY = date(2025, 6, 15)
+START = TODAY - timedelta(days=699)
+STATS = ("total", "completion_rate", "streak")
+
+
+@pytest.fixture(params=["memory", "sharded", "sqlite", "durable"])
+def repository(
+    request: pytest.FixtureRequest, tmp_path: Path
+) -> Iterator[HabitRepository]:
+    location = str(tmp_path / ("habits.db" if request.param == "sqlite" else "data"))
+    repo = create_repository(request.param, location)
+    yield repo
+    close: Callable[[], None] | None = getattr(repo, "close", None)
+    if close is not None:
+        close()
+
+
+def seed(service: HabitService, values: list[float]) -> Habit:
+    habit = service.create_habit("Run", "", "Health", HabitType.NUMERIC, 5.0)
+    service.log_progress_batch(
+        (habit.id, value, START + timedelta(days=day))
+        for day, value in enumerate(values)
+    )
+    return habit
+
+
+def expected(values: list[float], goal: float) -> list[float]:
+    aggregate = LogAggregate.from_values(values, goal)
+    rate = aggregate.compliant / aggregate.count * 100.0
+    return [aggregate.total, rate, aggregate.streak]
+
+
+def test_should_keep_stats_after_rolling_up_old_logs(
+    repository: HabitRepository,
+) -> None:
+    service = HabitService(repository)
+    rng = random.Random(3)
+    values = [float(rng.randint(3, 9)) for _ in range(700)]
+    values[-200:] = [6.0] * 200
+    habit = seed(service, values)
+    policy = RetentionPolicy(keep_days=90, granularity="week")
+
+    assert service.apply_retention(policy, TODAY) == 1
+    assert service.apply_retention(policy, TODAY) == 0
+
+    assert [service.get_stats(habit.id, stat) for stat in STATS] == pytest.approx(
+        expected(values, 5.0)
+    )
+    cutoff = policy.cutoff(TODAY)
+    assert min(log.date for log in service.get_logs(habit.id)) >= cutoff
+    assert all(period < cutoff for period, _ in repository.get_rollups(habit.id))
+
+    service.log_progress(habit.id, 2.0, TODAY + timedelta(days=1))
+    assert service.get_stats(habit.id, "streak") == 0
+    assert service.get_stats(habit.id, "total") == pytest.approx(sum(values) + 2.0)
+
+
+def test_should_reject_logs_inside_rolled_up_periods(
+    repository: HabitRepository,
+) -> None:
+    service = HabitService(repository)
+    habit = seed(service, [6.0] * 400)
+    service.apply_retention(RetentionPolicy(keep_days=30), TODAY)
+
+    with pytest.raises(RetentionError):
+        service.log_progress(habit.id, 1.0, START)
+    with pytest.raises(RetentionError):
+        service.log_progress_batch([(habit.id, 1.0, TODAY), (habit.id, 1.0, START)])
+    assert service.get_stats(habit.id, "total") == 2400.0
+
+
+def test_should_not_write_any_batch_entry_when_one_is_rolled_up(
+    repository: HabitRepository,
+) -> None:
+    service = HabitService(repository)
+    habit = seed(service, [6.0] * 400)
+    service.apply_retention(RetentionPolicy(keep_days=30), TODAY)
+    others = [
+        service.create_habit(f"Other {i}", "", "Health", HabitType.NUMERIC, 5.0)
+        for i in range(16)
+    ]
+
+    with pytest.raises(RetentionError):
+        service.log_progress_batch(
+            [*((other.id, 1.0, TODAY) for other in others), (habit.id, 1.0, START)]
+        )
+    assert all(repository.get_logs(other.id) == [] for other in others)
+
+
+def test_should_refuse_goal_changes_after_roll_up(
+    repository: HabitRepository,
+) -> None:
+    service = HabitService(repository)
+    values = [1.0, 3.0, 2.0, 2.0, 2.0, 2.0] * 20
+    habit = seed(service, values)
+    service.apply_retention(RetentionPolicy(keep_days=30), TODAY)
+    before = [service.get_stats(habit.id, stat) for stat in STATS]
+
+    with pytest.raises(RetentionError):
+        service.update_habit(habit.id, name="Jog", goal=2.0)
+    stale = Habit(
+        id=habit.id,
+        name=habit.name,
+        description="",
+        category="Health",
+        type=HabitType.NUMERIC,
+        goal=2.0,
+    )
+    with pytest.raises(RetentionError):
+        repository.save(stale)
+
+    stored = service.get_habit(habit.id)
+    assert isinstance(stored, Habit)
+    assert (stored.name, stored.goal) == ("Run", 5.0)
+    assert [service.get_stats(habit.id, stat) for stat in STATS] == before
+    assert service.update_habit(habit.id, name="Jog", goal=5.0) is not None
+
+
+def test_should_roll_up_habits_in_chunks(repository: HabitRepository) -> None:
+    service = HabitService(repository)
+    habits = [seed(service, [6.0] * 40) for _ in range(5)]
+    policy = RetentionPolicy(keep_days=0, granularity="day")
+
+    assert service.apply_retention(policy, TODAY, limit=2) == 2
+    assert service.apply_retention(policy, TODAY, limit=2) == 2
+    assert service.apply_retention(policy, TODAY, limit=2) == 1
+    assert all(len(repository.get_rollups(h.id)) == 40 for h in habits)
+
+
+def test_should_restore_rollups_after_restart(tmp_path: Path) -> None:
+    directory = tmp_path / "data"
+    repo = DurableInMemoryHabitRepository(directory, fsync=False)
+    service = HabitService(repo)
+    habit = seed(service, [6.0, 1.0, 7.0] * 100)
+    service.apply_retention(RetentionPolicy(keep_days=30), TODAY)
+    rollups = repo.get_rollups(habit.id)
+    repo.close()
+
+    replayed = DurableInMemoryHabitRepository(directory, fsync=False)
+    assert replayed.get_rollups(habit.id) == rollups
+    replayed.checkpoint()
+    replayed.close()
+
+    restored = DurableInMemoryHabitRepository(directory, fsync=False)
+    try:
+        assert restored.get_rollups(habit.id) == rollups
+        assert restored.get_aggregate(habit.id, 5.0).total == 1400.0
+        with pytest.raises(RetentionError):
+            restored.save_log(Log(habit.id, START, 1.0))
+    finally:
+        restored.close()
+
+
+def test_should_align_cutoff_to_period_start() -> None:
+    assert RetentionPolicy(10, "month").cutoff(TODAY) == date(2025, 6, 1)
+    assert RetentionPolicy(0, "week").cutoff(TODAY) == date(2025, 6, 9)
+    assert RetentionPolicy(365, "day").cutoff(TODAY) == date(2024, 6, 15)
+    with pytest.raises(ValueError):
+        RetentionPolicy(30, "year")
+
+
+def test_should_return_409_for_rolled_up_log(
+    client: TestClient, service: HabitService
+) -> None:
+    habit = seed(service, [6.0] * 10)
+    service.apply_retention(RetentionPolicy(keep_days=0), TODAY)
+
+    response = client.post(
+        f"/habits/{habit.id}/logs", json={"value": 1.0, "date": START.isoformat()}
+    )
+
+    assert response.status_code == 409
+
+
+def test_should_return_409_for_rolled_up_stream_line(
+    client: TestClient, service: HabitService
+) -> None:
+    habit = seed(service, [6.0] * 10)
+    service.apply_retention(RetentionPolicy(keep_days=0), TODAY)
+    line = json.dumps({"habit_id": str(habit.id), "value": 1.0, "date": str(START)})
+
+    response = client.post("/logs/stream", content=f"{line}\n")
+
+    assert response.status_code == 409
+    assert response.json()["detail"]["saved"] == 0
+
+
+def test_should_return_409_for_goal_change_after_roll_up(
+    client: TestClient, service: HabitService
+) -> None:
+    habit = seed(service, [6.0] * 10)
+    service.apply_retention(RetentionPolicy(keep_days=0), TODAY)
+
+    response = client.put(
+        f"/habits/{habit.id}",
+        json={
+            "name": "Run",
+            "description": "",
+            "category": "Health",
+            "type": "numeric",
+            "goal": 2.0,
+        },
+    )
+
+    assert response.status_code == 409
@@ -0,0 +1,66 @@
+import json
+import uuid
+
+from habit_tracker.core.habits import Habit, HabitComponent, HabitType, Routine
+from habit_tracker.infra.fastapi.schemas import HabitResponse
+from habit_tracker.infra.fastapi.serialization import (
+    TreeSerializer,
+    component_payload,
+    dumps,
+)
+
+
+def build_tree() -> Routine:
+    leaf = Habit(
+        name="Stretch",
+        description="10 min",
+        category="Health",
+        type=HabitType.NUMERIC,
+        goal=10.0,
+    )
+    inner = Routine(name="Warmup", description="", category="Health")
+    inner.add(leaf)
+    root = Routine(name="Morning", description="Start", category="Daily")
+    root.add(inner)
+    root.add(
+        Habit(
+            name="Journal",
+            description="",
+            category="Mind",
+            type=HabitType.BOOLEAN,
+            goal=1.0,
+        )
+    )
+    return root
+
+
+def versions_of(component: HabitComponent, version: int = 1) -> dict[uuid.UUID, int]:
+    versions = {component.id: version}
+    for child in component.get_children():
+        versions.update(versions_of(child, version))
+    return versions
+
+
+def test_should_match_pydantic_serialization() -> None:
+    root = build_tree()
+    expected = HabitResponse.model_validate(component_payload(root))
+
+    assert dumps(component_payload(root)) == expected.model_dump_json().encode()
+    rendered = TreeSerializer().render(root, versions_of(root), "store")
+    assert json.loads(rendered) == json.loads(expected.model_dump_json())
+
+
+def test_should_reuse_fragments_until_version_changes() -> None:
+    root = build_tree()
+    serializer = TreeSerializer()
+    versions = versions_of(root)
+    first = serializer.render(root, versions, "store")
+    cached = len(serializer)
+
+    root.name = "Evening"
+    assert serializer.render(root, versions, "store") == first
+
+    versions[root.id] += 1
+    updated = serializer.render(root, versions, "store")
+    assert json.loads(updated)["name"] == "Evening"
+    assert len(serializer) == cached + 1
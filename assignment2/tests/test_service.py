@@ -1,10 +1,11 @@
 import uuid
-from datetime import date
+from datetime import date, timedelta
 
 import pytest
 
 from habit_tracker.core.habits import Habit, HabitType, Routine
 from habit_tracker.core.services import HabitService
+from habit_tracker.core.stats import LogAggregate
 from habit_tracker.infra.in_memory.repository import InMemoryHabitRepository
 
 
@@ -147,7 +148,7 @@ def test_should_default_log_date_to_today(service: HabitService) -> None:
 def test_should_retrieve_logs(service: HabitService) -> None:
     habit = service.create_habit("Habit", "Desc", "Cat", HabitType.NUMERIC, 8.0)
     service.log_progress(habit.id, 5.0)
-    service.log_progress(habit.id, 7.0)
+    service.log_progress(habit.id, 7.0, date(2025, 1, 1))
     logs = service.get_logs(habit.id)
     assert len(logs) == 2
 
@@ -159,3 +160,83 @@ def test_should_return_empty_logs_for_habit_without_logs(
     assert service.get_logs(habit.id) == []
 
 
+def test_should_rederive_stats_when_goal_changes(service: HabitService) -> None:
+    habit = service.create_habit("Habit", "Desc", "Cat", HabitType.NUMERIC, 5.0)
+    for day, value in ((1, 6.0), (2, 4.0), (3, 8.0)):
+        service.log_progress(habit.id, value, date(2025, 1, day))
+    assert service.get_stats(habit.id, "streak") == 1
+    assert service.get_stats(habit.id, "completion_rate") == pytest.approx(200 / 3)
+
+    service.update_habit(habit.id, goal=4.0)
+    assert service.get_stats(habit.id, "streak") == 3
+    assert service.get_stats(habit.id, "completion_rate") == 100.0
+    assert service.get_stats(habit.id, "total") == 18.0
+
+
+def test_should_roll_up_stats_across_routine_tree(service: HabitService) -> None:
+    outer = service.create_routine("Day", "Desc", "Cat")
+    inner = service.create_routine("Morning", "Desc", "Cat")
+    run = service.create_habit("Run", "Desc", "Cat", HabitType.NUMERIC, 5.0)
+    read = service.create_habit("Read", "Desc", "Cat", HabitType.NUMERIC, 10.0)
+    service.add_subhabit(inner.id, run.id)
+    service.add_subhabit(outer.id, inner.id)
+    service.add_subhabit(outer.id, read.id)
+    for day, value in ((1, 6.0), (2, 7.0)):
+        service.log_progress(run.id, value, date(2025, 1, day))
+    for day, value in ((1, 4.0), (2, 12.0)):
+        service.log_progress(read.id, value, date(2025, 1, day))
+
+    assert service.get_stats(outer.id, "total") == 29.0
+    assert service.get_stats(outer.id, "completion_rate") == 75.0
+    assert service.get_stats(outer.id, "streak") == 1
+    assert service.get_stats(inner.id, "streak") == 2
+
+
+def test_should_recompute_only_changed_routine_branch(
+    service: HabitService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    routine = service.create_routine("Day", "Desc", "Cat")
+    habits = [
+        service.create_habit(f"H{i}", "Desc", "Cat", HabitType.NUMERIC, 1.0)
+        for i in range(3)
+    ]
+    for habit in habits:
+        service.add_subhabit(routine.id, habit.id)
+        service.log_progress(habit.id, 1.0, date(2025, 1, 1))
+    assert service.get_stats(routine.id, "total") == 3.0
+
+    loaded: list[uuid.UUID] = []
+    get_aggregate = service.repo.get_aggregate
+
+    def spy(habit_id: uuid.UUID, goal: float) -> LogAggregate:
+        loaded.append(habit_id)
+        return get_aggregate(habit_id, goal)
+
+    monkeypatch.setattr(service.repo, "get_aggregate", spy)
+    assert service.get_stats(routine.id, "total") == 3.0
+    assert loaded == []
+
+    service.log_progress(habits[1].id, 4.0, date(2025, 1, 2))
+    assert service.get_stats(routine.id, "total") == 7.0
+    assert loaded == [habits[1].id]
+
+
+def test_should_compute_windowed_stats(service: HabitService) -> None:
+    habit = service.create_habit("Habit", "Desc", "Cat", HabitType.NUMERIC, 5.0)
+    today = date.today()
+    for days_ago, value in ((40, 9.0), (10, 6.0), (9, 7.0), (3, 1.0), (0, 5.0)):
+        service.log_progress(habit.id, value, today - timedelta(days=days_ago))
+
+    assert service.get_stats(habit.id, "total_7d") == 6.0
+    assert service.get_stats(habit.id, "total_30d") == 19.0
+    assert service.get_stats(habit.id, "completion_rate_30d") == 75.0
+    assert service.get_stats(habit.id, "longest_streak") == 3
+    assert service.get_stats(habit.id, "streak") == 1
+
+    routine = service.create_routine("Routine", "Desc", "Cat")
+    with pytest.raises(ValueError, match="only available for habits"):
+        service.get_stats(routine.id, "total_7d")
+    with pytest.raises(ValueError, match="Window must be"):
+        service.get_stats(habit.id, "total_99999999d")
+    with pytest.raises(ValueError, match="Window must be"):
+        service.get_stats(habit.id, "completion_rate_0d")
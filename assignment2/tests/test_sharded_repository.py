@@ -0,0 +1,187 @@
+import threading
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+from habit_tracker.core.habits import Habit, HabitType, Log, Routine
+from habit_tracker.core.stats import RollingTotalStrategy
+from habit_tracker.infra.in_memory.sharded import ShardedInMemoryHabitRepository
+
+
+@pytest.fixture
+def repository() -> ShardedInMemoryHabitRepository:
+    return ShardedInMemoryHabitRepository(shard_count=4)
+
+
+def make_habit(name: str) -> Habit:
+    return Habit(
+        name=name, description="D", category="C", type=HabitType.NUMERIC, goal=1.0
+    )
+
+
+def test_should_route_habits_and_logs_to_shards(
+    repository: ShardedInMemoryHabitRepository,
+) -> None:
+    habits = [make_habit(f"H{i}") for i in range(20)]
+    for habit in habits:
+        repository.save(habit)
+    repository.save_log(Log(habits[3].id, date(2025, 1, 1), 2.0))
+
+    assert repository.get(habits[7].id) is habits[7]
+    assert len(repository.list_all()) == 20
+    assert [log.value for log in repository.get_logs(habits[3].id)] == [2.0]
+
+    repository.delete(habits[7].id)
+    assert repository.get(habits[7].id) is None
+    assert habits[7] not in repository.list_all()
+
+
+def test_should_merge_pages_across_shards(
+    repository: ShardedInMemoryHabitRepository,
+) -> None:
+    habits = [make_habit(f"H{i}") for i in range(15)]
+    for habit in habits:
+        repository.save(habit)
+    first = repository.list_page(6)
+    second = repository.list_page(6, first[-1].id)
+    third = repository.list_page(6, second[-1].id)
+    ids = [h.id for h in first + second + third]
+    assert ids == sorted(habit.id for habit in habits)
+
+
+def test_should_refresh_log_snapshot_after_write(
+    repository: ShardedInMemoryHabitRepository,
+) -> None:
+    habit_id = uuid.uuid4()
+    repository.save_log(Log(habit_id, date(2025, 1, 2), 1.0))
+    assert len(repository.get_logs(habit_id)) == 1
+    repository.save_logs([Log(habit_id, date(2025, 1, 1), 1.0)])
+    assert [log.date.day for log in repository.get_logs(habit_id)] == [1, 2]
+
+
+def test_should_not_lose_logs_under_concurrent_writers(
+    repository: ShardedInMemoryHabitRepository,
+) -> None:
+    habit_ids = [uuid.uuid4() for _ in range(8)]
+    start = date(2020, 1, 1)
+    errors: list[BaseException] = []
+
+    def write(worker: int) -> None:
+        for day in range(worker, 400, 4):
+            for habit_id in habit_ids:
+                repository.save_log(Log(habit_id, start + timedelta(day), 1.0))
+
+    def read() -> None:
+        try:
+            for _ in range(200):
+                for habit_id in habit_ids:
+                    logs = repository.get_logs(habit_id)
+                    days = [log.date for log in logs]
+                    assert days == sorted(days)
+                repository.list_all()
+        except BaseException as e:  # pragma: no cover - surfaced below
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+    threads.append(threading.Thread(target=read))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    for habit_id in habit_ids:
+        assert len(repository.get_logs(habit_id)) == 400
+        assert repository.get_aggregate(habit_id, 1.0).count == 400
+
+
+def test_should_answer_window_stats_under_concurrent_back_dated_writes(
+    repository: ShardedInMemoryHabitRepository,
+) -> None:
+    habit_id = uuid.uuid4()
+    today = date(2025, 1, 1)
+    strategy = RollingTotalStrategy(3650, today)
+    repository.save_log(Log(habit_id, today, 1.0))
+    errors: list[BaseException] = []
+
+    def write() -> None:
+        for day in range(1, 2000):
+            repository.save_log(Log(habit_id, today - timedelta(day), 1.0))
+
+    def read() -> None:
+        try:
+            for _ in range(2000):
+                repository.get_window_stat(habit_id, 1.0, strategy)
+        except BaseException as e:  # pragma: no cover - surfaced below
+            errors.append(e)
+
+    threads = [threading.Thread(target=write), threading.Thread(target=read)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert repository.get_window_stat(habit_id, 1.0, strategy) == 2000.0
+
+
+def test_should_return_window_index_snapshots(
+    repository: ShardedInMemoryHabitRepository,
+) -> None:
+    habit_id = uuid.uuid4()
+    repository.save_log(Log(habit_id, date(2025, 1, 2), 1.0))
+    snapshot = repository.get_window_index(habit_id, 1.0)
+    repository.save_log(Log(habit_id, date(2025, 1, 1), 1.0))
+    assert len(snapshot) == 1
+    assert len(repository.get_window_index(habit_id, 1.0)) == 2
+
+
+def test_should_unlink_deleted_child_from_routines_in_other_shards(
+    repository: ShardedInMemoryHabitRepository,
+) -> None:
+    habit = make_habit("Child")
+    routines = [Routine(name=f"R{i}", description="", category="") for i in range(8)]
+    repository.save(habit)
+    for routine in routines:
+        routine.add(habit)
+        repository.save(routine)
+    repository.save_log(Log(habit.id, date(2025, 1, 1), 1.0))
+    repository.get_logs(habit.id)
+
+    repository.delete(habit.id)
+
+    assert all(routine.get_children() == [] for routine in routines)
+    assert repository.get_logs(habit.id) == []
+    assert repository.compact() == 0
+
+
+def test_should_return_aggregate_snapshots(
+    repository: ShardedInMemoryHabitRepository,
+) -> None:
+    habit_id = uuid.uuid4()
+    repository.save_log(Log(habit_id, date(2025, 1, 1), 2.0))
+    single = repository.get_aggregate(habit_id, 1.0)
+    bulk = repository.get_aggregates({habit_id: 1.0})[habit_id]
+    repository.save_log(Log(habit_id, date(2025, 1, 2), 3.0))
+
+    assert single.total == bulk.total == 2.0
+    assert repository.get_aggregate(habit_id, 1.0).total == 5.0
+
+
+def test_should_keep_children_from_other_shards_when_compacting(
+    repository: ShardedInMemoryHabitRepository,
+) -> None:
+    routine = Routine(name="Morning", description="", category="C")
+    children = [make_habit(f"H{i}") for i in range(12)]
+    for child in children:
+        repository.save(child)
+        routine.add(child)
+    repository.save(routine)
+
+    assert repository.compact() == 0
+
+    loaded = repository.get(routine.id)
+    assert loaded is not None
+    assert [c.id for c in loaded.get_children()] == [c.id for c in children]
+    assert all(repository.get_parent_ids(c.id) == {routine.id} for c in children)
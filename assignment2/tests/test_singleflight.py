@@ -0,0 +1,71 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+
+from habit_tracker.core.habits import HabitType, Log
+from habit_tracker.core.services import HabitService
+from habit_tracker.core.singleflight import SingleFlight
+from habit_tracker.core.stats import LogAggregate
+from habit_tracker.infra.in_memory.repository import InMemoryHabitRepository
+
+
+class SlowAggregateRepository(InMemoryHabitRepository):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+        self.release = threading.Event()
+
+    def get_aggregate(self, habit_id: uuid.UUID, goal: float) -> LogAggregate:
+        self.calls += 1
+        self.release.wait(timeout=5)
+        return super().get_aggregate(habit_id, goal)
+
+
+def test_should_coalesce_concurrent_identical_stats_queries() -> None:
+    repo = SlowAggregateRepository()
+    outcomes: list[str] = []
+    flight = SingleFlight(outcomes.append)
+    service = HabitService(repo, flight)
+    habit = service.create_habit("Run", "", "", HabitType.NUMERIC, 5.0)
+    repo.save_log(Log(habit.id, date(2025, 1, 1), 6.0))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(service.get_stats, habit.id, "streak") for _ in range(8)]
+        while len(outcomes) < 8:
+            threading.Event().wait(0.001)
+        repo.release.set()
+        results = [future.result() for future in futures]
+
+    assert results == [1] * 8
+    assert repo.calls == 1
+    assert sorted(outcomes) == ["coalesced"] * 7 + ["computed"]
+    assert flight.in_flight() == 0
+
+
+def test_should_share_errors_and_forget_finished_calls() -> None:
+    outcomes: list[str] = []
+    flight = SingleFlight(outcomes.append)
+    release = threading.Event()
+
+    def fail() -> int:
+        release.wait(timeout=5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", fail)
+        while not outcomes:
+            threading.Event().wait(0.001)
+        follower = pool.submit(flight.do, "key", lambda: 0)
+        while len(outcomes) < 2:
+            threading.Event().wait(0.001)
+        release.set()
+        with pytest.raises(ValueError):
+            leader.result()
+        with pytest.raises(ValueError):
+            follower.result()
+
+    assert outcomes == ["computed", "coalesced"]
+    assert flight.do("key", lambda: 42) == 42
@@ -0,0 +1,339 @@
+import sqlite3
+import threading
+import uuid
+from collections.abc import Iterator
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+from habit_tracker.core.habits import Habit, HabitType, Log, Routine
+from habit_tracker.core.stats import LogAggregate
+from habit_tracker.infra.fastapi.dependencies import create_repository
+from habit_tracker.infra.sqlite.repository import SqliteHabitRepository
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> str:
+    return str(tmp_path / "habits.db")
+
+
+@pytest.fixture
+def repository(db_path: str) -> Iterator[SqliteHabitRepository]:
+    repo = SqliteHabitRepository(db_path)
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def sample_habit() -> Habit:
+    return Habit(
+        id=uuid.uuid4(),
+        name="Drink Water",
+        description="8 glasses",
+        category="Health",
+        type=HabitType.NUMERIC,
+        goal=8.0,
+    )
+
+
+def test_should_save_and_retrieve_habit(
+    repository: SqliteHabitRepository, sample_habit: Habit
+) -> None:
+    repository.save(sample_habit)
+    assert repository.get(sample_habit.id) == sample_habit
+
+
+def test_should_return_none_for_unknown_habit(
+    repository: SqliteHabitRepository,
+) -> None:
+    assert repository.get(uuid.uuid4()) is None
+
+
+def test_should_persist_routine_children(
+    repository: SqliteHabitRepository, sample_habit: Habit
+) -> None:
+    routine = Routine(id=uuid.uuid4(), name="R", description="D", category="C")
+    routine.add(sample_habit)
+    repository.save(sample_habit)
+    repository.save(routine)
+
+    retrieved = repository.get(routine.id)
+    assert isinstance(retrieved, Routine)
+    assert retrieved.get_children() == [sample_habit]
+    assert len(repository.list_all()) == 2
+
+
+def test_should_delete_habit(
+    repository: SqliteHabitRepository, sample_habit: Habit
+) -> None:
+    repository.save(sample_habit)
+    repository.delete(sample_habit.id)
+    assert repository.get(sample_habit.id) is None
+    assert repository.list_all() == []
+
+
+def test_should_return_logs_in_date_order(repository: SqliteHabitRepository) -> None:
+    habit_id = uuid.uuid4()
+    today = date.today()
+    repository.save_log(Log(habit_id, today, 5.0))
+    repository.save_log(Log(habit_id, today - timedelta(days=1), 3.0))
+    logs = repository.get_logs(habit_id)
+    assert [log.value for log in logs] == [3.0, 5.0]
+    assert repository.get_logs(uuid.uuid4()) == []
+
+
+def test_should_upsert_and_filter_logs_by_day(
+    repository: SqliteHabitRepository,
+) -> None:
+    habit_id = uuid.uuid4()
+    start = date(2025, 1, 1)
+    for offset in (3, 0, 2, 1):
+        repository.save_log(Log(habit_id, start + timedelta(offset), 1.0))
+    repository.save_log(Log(habit_id, start, 4.0))
+    logs = repository.get_logs(habit_id)
+    assert [log.value for log in logs] == [4.0, 1.0, 1.0, 1.0]
+    window = repository.get_logs(habit_id, start + timedelta(1), start + timedelta(2))
+    assert [log.date for log in window] == [start + timedelta(1), start + timedelta(2)]
+
+
+def test_should_survive_restart(db_path: str, sample_habit: Habit) -> None:
+    first = SqliteHabitRepository(db_path)
+    first.save(sample_habit)
+    first.save_log(Log(sample_habit.id, date.today(), 4.0))
+    first.close()
+
+    second = SqliteHabitRepository(db_path)
+    assert second.get(sample_habit.id) == sample_habit
+    assert len(second.get_logs(sample_habit.id)) == 1
+    second.close()
+
+
+def test_should_use_wal_and_log_index(
+    repository: SqliteHabitRepository, db_path: str
+) -> None:
+    assert repository is not None
+    conn = sqlite3.connect(db_path)
+    (mode,) = conn.execute("PRAGMA journal_mode").fetchone()
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(logs)")}
+    conn.close()
+    assert mode == "wal"
+    assert "idx_logs_habit_date" in indexes
+
+
+def test_should_accept_logs_from_many_threads(
+    repository: SqliteHabitRepository,
+) -> None:
+    habit_id = uuid.uuid4()
+
+    def write(offset: int) -> None:
+        for day in range(offset, 100, 4):
+            repository.save_log(Log(habit_id, date(2025, 1, 1) + timedelta(day), 1.0))
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(repository.get_logs(habit_id)) == 100
+
+
+def test_should_select_sqlite_backend_from_environment(
+    monkeypatch: pytest.MonkeyPatch, db_path: str
+) -> None:
+    monkeypatch.setenv("HABIT_TRACKER_STORAGE", "sqlite")
+    monkeypatch.setenv("HABIT_TRACKER_DB_PATH", db_path)
+    repo = create_repository()
+    assert isinstance(repo, SqliteHabitRepository)
+    repo.close()
+
+
+def test_should_maintain_aggregates_across_goal_change(
+    repository: SqliteHabitRepository, sample_habit: Habit
+) -> None:
+    repository.save(sample_habit)
+    today = date.today()
+    repository.save_log(Log(sample_habit.id, today, 9.0))
+    assert repository.get_aggregate(sample_habit.id, 8.0).streak == 1
+
+    repository.save_log(Log(sample_habit.id, today - timedelta(days=1), 2.0))
+    repository.save_log(Log(sample_habit.id, today - timedelta(days=2), 8.5))
+    aggregate = repository.get_aggregate(sample_habit.id, 8.0)
+    assert (aggregate.total, aggregate.compliant, aggregate.count) == (19.5, 2, 3)
+    assert aggregate.streak == 1
+
+    repository.save_log(Log(sample_habit.id, today - timedelta(days=1), 8.0))
+    aggregate = repository.get_aggregate(sample_habit.id, 8.0)
+    assert (aggregate.total, aggregate.compliant, aggregate.count) == (25.5, 3, 3)
+    assert aggregate.streak == 3
+
+    sample_habit.goal = 8.5
+    repository.save(sample_habit)
+    assert repository.get_aggregate(sample_habit.id, 8.5).streak == 1
+
+
+def test_should_save_logs_in_one_transaction(
+    repository: SqliteHabitRepository,
+) -> None:
+    habit_id = uuid.uuid4()
+    start = date(2025, 1, 1)
+    logs = [Log(habit_id, start + timedelta(day), 2.0) for day in range(50)]
+    assert repository.save_logs(logs) == 50
+    assert repository.get_aggregate(habit_id, 1.0).total == 100.0
+
+
+def test_should_page_habits_by_id(repository: SqliteHabitRepository) -> None:
+    habits = [
+        Habit(
+            name=f"H{i}",
+            description="D",
+            category="C",
+            type=HabitType.BOOLEAN,
+            goal=1.0,
+        )
+        for i in range(5)
+    ]
+    for habit in habits:
+        repository.save(habit)
+    expected = sorted(habit.id for habit in habits)
+    first = repository.list_page(3)
+    rest = repository.list_page(3, first[-1].id)
+    assert [h.id for h in first + rest] == expected
+
+
+def test_should_persist_versions_and_storage_id(
+    db_path: str, sample_habit: Habit
+) -> None:
+    repo = SqliteHabitRepository(db_path)
+    repo.save(sample_habit)
+    repo.save_log(Log(habit_id=sample_habit.id, date=date(2024, 1, 1), value=1.0))
+    storage_id = repo.storage_id
+    repo.close()
+
+    reopened = SqliteHabitRepository(db_path)
+    try:
+        assert reopened.storage_id == storage_id
+        assert reopened.get_version(sample_habit.id) == 2
+        assert reopened.collection_version() == 1
+        assert reopened.get_version(uuid.uuid4()) == 0
+    finally:
+        reopened.close()
+
+
+def test_should_read_aggregates_in_bulk(
+    repository: SqliteHabitRepository, sample_habit: Habit
+) -> None:
+    other = Habit(
+        name="Walk", description="", category="", type=HabitType.NUMERIC, goal=1.0
+    )
+    repository.save(sample_habit)
+    repository.save(other)
+    repository.save_log(Log(sample_habit.id, date(2024, 1, 1), 9.0))
+    repository.save_log(Log(other.id, date(2024, 1, 1), 0.5))
+
+    aggregates = repository.get_aggregates({sample_habit.id: 8.0, other.id: 0.5})
+
+    assert aggregates[sample_habit.id].compliant == 1
+    assert aggregates[other.id].total == 0.5
+    assert aggregates[other.id].compliant == 1
+
+
+def test_should_cascade_delete_to_logs_stats_and_parents(
+    repository: SqliteHabitRepository, sample_habit: Habit
+) -> None:
+    routine = Routine(id=uuid.uuid4(), name="R", description="D", category="C")
+    routine.add(sample_habit)
+    repository.save(sample_habit)
+    repository.save(routine)
+    repository.save_log(Log(sample_habit.id, date(2024, 1, 1), 9.0))
+    repository.get_aggregate(sample_habit.id, 8.0)
+    routine_version = repository.get_version(routine.id)
+
+    repository.delete(sample_habit.id)
+
+    retrieved = repository.get(routine.id)
+    assert isinstance(retrieved, Routine)
+    assert retrieved.get_children() == []
+    assert repository.get_version(routine.id) == routine_version + 1
+    assert repository.get_logs(sample_habit.id) == []
+    assert repository.compact() == 0
+
+
+def test_should_compact_orphaned_rows_in_chunks(
+    repository: SqliteHabitRepository, db_path: str
+) -> None:
+    orphan = uuid.uuid4()
+    repository.save_logs(
+        Log(orphan, date(2024, 1, 1) + timedelta(days=day), 1.0) for day in range(3)
+    )
+    repository.get_aggregate(orphan, 1.0)
+
+    assert repository.compact(limit=2) == 2
+    assert repository.compact() == 2
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM logs").fetchone() == (0,)
+        assert conn.execute("SELECT COUNT(*) FROM habit_stats").fetchone() == (0,)
+
+
+def test_should_keep_aggregate_consistent_across_concurrent_writers(
+    db_path: str, sample_habit: Habit
+) -> None:
+    repos = [SqliteHabitRepository(db_path) for _ in range(4)]
+    repos[0].save(sample_habit)
+    repos[0].get_aggregate(sample_habit.id, sample_habit.goal)
+
+    def write(repo: SqliteHabitRepository, value: float) -> None:
+        for day in range(30):
+            repo.save_log(
+                Log(sample_habit.id, date(2025, 1, 1) + timedelta(day), value)
+            )
+
+    threads = [
+        threading.Thread(target=write, args=(repo, float(i)))
+        for i, repo in enumerate(repos)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    logs = repos[0].get_logs(sample_habit.id)
+    assert len(logs) == 30
+    assert repos[0].get_aggregate(sample_habit.id, sample_habit.goal) == (
+        LogAggregate.from_logs(logs, sample_habit.goal)
+    )
+    for repo in repos:
+        repo.close()
+
+
+def test_should_migrate_legacy_non_unique_log_index(
+    db_path: str, sample_habit: Habit
+) -> None:
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE logs (habit_id TEXT NOT NULL, date INTEGER NOT NULL,
+                               value REAL NOT NULL);
+            CREATE INDEX idx_logs_habit_date ON logs (habit_id, date);
+            """
+        )
+        ordinal = date(2025, 1, 1).toordinal()
+        conn.executemany(
+            "INSERT INTO logs VALUES (?, ?, ?)",
+            [
+                (str(sample_habit.id), ordinal, 1.0),
+                (str(sample_habit.id), ordinal, 2.0),
+            ],
+        )
+    conn.close()
+
+    repository = SqliteHabitRepository(db_path)
+    repository.save_log(Log(sample_habit.id, date(2025, 1, 1), 3.0))
+    with sqlite3.connect(db_path) as conn:
+        indexes = {row[1]: row[2] for row in conn.execute("PRAGMA index_list(logs)")}
+    conn.close()
+    assert indexes["idx_logs_habit_date"] == 1
+    assert repository.get_logs(sample_habit.id) == [
+        Log(sample_habit.id, date(2025, 1, 1), 3.0)
+    ]
+    repository.close()
@@ -1,10 +1,18 @@
+import random
 import uuid
 from datetime import date, timedelta
 
+import pytest
+
 from habit_tracker.core.habits import Log
 from habit_tracker.core.stats import (
     CompletionRateStrategy,
     CurrentStreakStrategy,
+    LogAggregate,
+    LogWindowIndex,
+    LongestStreakStrategy,
+    RollingCompletionRateStrategy,
+    RollingTotalStrategy,
     TotalProgressStrategy,
 )
 
@@ -109,3 +117,74 @@ def test_should_calculate_zero_completion() -> None:
     assert strategy.calculate(logs, 5.0) == 0.0
 
 
+def test_aggregate_matches_strategies_for_any_insertion_order() -> None:
+    rng = random.Random(3)
+    today = date.today()
+    for _ in range(300):
+        aggregate = LogAggregate(goal=5.0)
+        by_day: dict[date, Log] = {}
+        for _ in range(rng.randint(0, 12)):
+            log = Log(
+                uuid.uuid4(),
+                today - timedelta(days=rng.randint(0, 6)),
+                float(rng.randint(0, 9)),
+            )
+            newer = sum(1 for day in by_day if day > log.date)
+            previous = by_day.get(log.date)
+            by_day[log.date] = log
+            if previous is None:
+                aggregate.insert(log.value, newer)
+            elif not aggregate.replace(previous.value, log.value, newer):
+                logs = list(by_day.values())
+                aggregate.streak = CurrentStreakStrategy().calculate(logs, 5.0)
+        logs = list(by_day.values())
+        assert aggregate == LogAggregate.from_logs(logs, 5.0)
+        for strategy in (
+            TotalProgressStrategy(),
+            CompletionRateStrategy(),
+            CurrentStreakStrategy(),
+        ):
+            expected = strategy.calculate(logs, 5.0)
+            assert strategy.from_aggregate(aggregate) == expected
+
+
+def test_aggregate_from_values_matches_logs() -> None:
+    rng = random.Random(5)
+    start = date(2024, 1, 1)
+    values = [float(rng.randint(0, 9)) for _ in range(50)]
+    logs = [
+        Log(uuid.uuid4(), start + timedelta(days=i), value)
+        for i, value in enumerate(values)
+    ]
+    assert LogAggregate.from_values(values, 4.0) == LogAggregate.from_logs(logs, 4.0)
+
+
+def test_window_index_matches_strategies_under_incremental_upserts() -> None:
+    rng = random.Random(11)
+    today = date(2025, 6, 30)
+    strategies = [
+        RollingTotalStrategy(7, today),
+        RollingTotalStrategy(30, today),
+        RollingCompletionRateStrategy(7, today),
+        RollingCompletionRateStrategy(365, today),
+        LongestStreakStrategy(),
+    ]
+    for _ in range(100):
+        index = LogWindowIndex(goal=5.0)
+        by_day: dict[date, Log] = {}
+        for _ in range(rng.randint(0, 40)):
+            day = today - timedelta(days=rng.randint(0, 60))
+            log = Log(uuid.uuid4(), day, float(rng.randint(0, 9)))
+            by_day[day] = log
+            index.upsert(day, log.value)
+        logs = list(by_day.values())
+        for strategy in strategies:
+            assert strategy.from_window(index) == strategy.calculate(logs, 5.0)
+        rebuilt = LogWindowIndex.from_logs(logs, 5.0)
+        assert rebuilt.total_prefix == index.total_prefix
+        assert rebuilt.longest_run == index.longest_run
+
+
+def test_window_strategies_reject_aggregates() -> None:
+    with pytest.raises(TypeError):
+        LongestStreakStrategy().from_aggregate(LogAggregate(goal=1.0))
@@ -0,0 +1,105 @@
+import os
+from pathlib import Path
+from typing import Any
+
+import pytest
+import typer
+import uvicorn
+
+from habit_tracker.core.habits import HabitComponent, HabitType
+from habit_tracker.core.hierarchy import HierarchyCycleError
+from habit_tracker.core.services import HabitService
+from habit_tracker.infra.sqlite.repository import SqliteHabitRepository
+from habit_tracker.runner import app as app_module
+
+
+def test_should_start_workers_on_shared_sqlite(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    calls: list[tuple[Any, dict[str, Any]]] = []
+    monkeypatch.setattr(uvicorn, "run", lambda target, **kw: calls.append((target, kw)))
+    monkeypatch.delenv("HABIT_TRACKER_STORAGE", raising=False)
+    monkeypatch.setenv("HABIT_TRACKER_DB_PATH", "unused.db")
+    db_path = str(tmp_path / "habits.db")
+
+    app_module.serve(workers=4, storage=None, db_path=db_path)
+
+    assert calls == [
+        (
+            "habit_tracker.runner.app:app",
+            {"host": "0.0.0.0", "port": 8000, "workers": 4},
+        )
+    ]
+    assert os.environ["HABIT_TRACKER_STORAGE"] == "sqlite"
+    assert os.environ["HABIT_TRACKER_DB_PATH"] == db_path
+
+
+def test_should_reject_workers_on_process_local_storage(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(uvicorn, "run", lambda *_args, **_kwargs: None)
+
+    with pytest.raises(typer.BadParameter, match="shared backend"):
+        app_module.serve(workers=2, storage="sharded", db_path=None)
+
+
+def test_should_see_hierarchy_changes_from_other_workers(tmp_path: Path) -> None:
+    path = str(tmp_path / "habits.db")
+    first = HabitService(SqliteHabitRepository(path))
+    second = HabitService(SqliteHabitRepository(path))
+    outer = first.create_routine("Outer", "", "")
+    inner = first.create_routine("Inner", "", "")
+    habit = first.create_habit("Run", "", "", HabitType.NUMERIC, 1.0)
+    assert second.get_parents(habit.id) == []
+
+    first.add_subhabit(outer.id, inner.id)
+    first.add_subhabit(inner.id, habit.id)
+
+    assert [p.id for p in second.get_parents(habit.id)] == [inner.id]
+    with pytest.raises(ValueError, match="cycle"):
+        second.add_subhabit(inner.id, outer.id)
+
+
+class CountingSqliteRepository(SqliteHabitRepository):
+    full_loads = 0
+
+    def list_all(self) -> list[HabitComponent]:
+        self.full_loads += 1
+        return super().list_all()
+
+
+def test_should_not_reload_hierarchy_on_shared_writes(tmp_path: Path) -> None:
+    repo = CountingSqliteRepository(str(tmp_path / "habits.db"))
+    service = HabitService(repo)
+    routine = service.create_routine("Morning", "", "")
+    habits = [
+        service.create_habit(f"H{i}", "", "", HabitType.NUMERIC, 1.0) for i in range(3)
+    ]
+    for habit in habits:
+        service.add_subhabit(routine.id, habit.id)
+    service.delete_habit(habits[0].id)
+    service.remove_subhabit(routine.id, habits[1].id)
+
+    assert [p.id for p in service.get_parents(habits[2].id)] == [routine.id]
+    assert service.get_parents(habits[1].id) == []
+    assert repo.full_loads == 0
+
+
+def test_should_reject_cycles_inside_the_write_transaction(tmp_path: Path) -> None:
+    path = str(tmp_path / "habits.db")
+    first = SqliteHabitRepository(path)
+    second = SqliteHabitRepository(path)
+    outer = HabitService(first).create_routine("Outer", "", "")
+    inner = HabitService(first).create_routine("Inner", "", "")
+    stale_inner = second.get(inner.id)
+    assert stale_inner is not None
+
+    HabitService(first).add_subhabit(outer.id, inner.id)
+    stale_outer = second.get(outer.id)
+    assert stale_outer is not None
+    stale_inner.add(stale_outer)
+    with pytest.raises(HierarchyCycleError):
+        second.save(stale_inner)
+
+    assert second.get_parent_ids(outer.id) == set()
+    assert first.get_parent_ids(inner.id) == {outer.id}